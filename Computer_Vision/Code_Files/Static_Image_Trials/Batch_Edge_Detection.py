@@ -0,0 +1,155 @@
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import cv2
+
+import edge_detection_5
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
+
+# Function to expand directories and glob patterns into (image path, root) pairs; the root is
+# the input directory (or the fixed part of the pattern) the image was found under
+def find_images(inputs, recursive=False):
+    found = []
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, "**", "*") if recursive else os.path.join(item, "*")
+            paths, root = glob.glob(pattern, recursive=recursive), item
+        else:
+            paths = glob.glob(item, recursive=True)
+            root = os.path.dirname(item.split("*")[0].split("?")[0].split("[")[0]) or "."
+        found.extend((path, root) for path in sorted(paths)
+                     if os.path.isfile(path) and path.lower().endswith(IMAGE_EXTENSIONS))
+    # The same image reached through two inputs is processed once
+    unique = {}
+    for path, root in found:
+        unique.setdefault(os.path.abspath(path), (path, root))
+    return list(unique.values())
+
+# Function to get the folder output paths are kept relative to: the common path of every
+# input's root, so images from different inputs keep the folders that tell them apart
+def common_root(images):
+    return os.path.commonpath([os.path.abspath(root) for _, root in images])
+
+# Function to map an input image to its output path under output_dir, keeping subfolders and
+# the image's extension (img.jpg -> img_jpg_processed.jpg, so img.png does not overwrite it)
+def output_path(path, root, output_dir, suffix):
+    relative = os.path.relpath(os.path.abspath(path), root)
+    stem, extension = os.path.splitext(relative)
+    return os.path.join(output_dir, f"{stem}_{extension[1:]}{suffix}")
+
+# Function to find outputs that more than one image would be written to (compared the way the
+# file system does, so case-only differences collide on Windows); returns {output: [paths]}
+def duplicate_outputs(jobs):
+    targets = {}
+    for path, output in jobs:
+        targets.setdefault(os.path.normcase(os.path.abspath(output)), []).append(path)
+    return {output: paths for output, paths in targets.items() if len(paths) > 1}
+
+# Function to tell whether an output is newer than both its image and edge_detection_5.py
+def up_to_date(path, output, code_mtime):
+    return os.path.exists(output) and os.path.getmtime(output) >= max(os.path.getmtime(path), code_mtime)
+
+# Function to process a chunk of images in one worker. The next `prefetch` images are decoded
+# on a thread while the current one is processed (cv2.imread releases the GIL), so file reads
+# and JPEG decoding overlap the edge detection.
+def process_chunk(jobs, prefetch=2):
+    cv2.setNumThreads(1)  # one core per worker; the pool provides the parallelism
+    results = []
+    with ThreadPoolExecutor(max_workers=1) as reader:
+        pending = [reader.submit(cv2.imread, path, cv2.IMREAD_GRAYSCALE) for path, _ in jobs[:prefetch]]
+        for i, (path, output) in enumerate(jobs):
+            if i + prefetch < len(jobs):
+                pending.append(reader.submit(cv2.imread, jobs[i + prefetch][0], cv2.IMREAD_GRAYSCALE))
+            image = pending.pop(0).result()
+            if image is None:
+                results.append((path, "could not read image"))
+                continue
+            try:
+                os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+                edge_detection_5.process_image(path, output, image=image)
+                results.append((path, None))
+            except Exception as exc:
+                results.append((path, f"{type(exc).__name__}: {exc}"))
+    return results
+
+def _process_chunk(args):
+    return process_chunk(*args)
+
+# Function to print progress as chunk results arrive; returns the list of (path, error) of
+# the failed images
+def collect_results(outputs, total, progress_interval=1.0):
+    failures = []
+    done = 0
+    start = last_report = time.perf_counter()
+    for results in outputs:
+        done += len(results)
+        failures.extend((path, error) for path, error in results if error is not None)
+        now = time.perf_counter()
+        if now - last_report >= progress_interval or done == total:
+            rate = done / (now - start) if now > start else 0.0
+            remaining = (total - done) / rate if rate > 0 else 0.0
+            print(f"[{done}/{total}] {rate:.1f} images/s, {len(failures)} failed, about {remaining:.0f} s left",
+                  flush=True)
+            last_report = now
+    return failures
+
+# Function to process every job in a process pool, printing progress as chunks finish;
+# returns the list of (path, error) of the failed images
+def run_batch(jobs, workers=None, chunk_size=16, prefetch=2, progress_interval=1.0):
+    workers = workers or os.cpu_count() or 1
+    chunks = [(jobs[i:i + chunk_size], prefetch) for i in range(0, len(jobs), chunk_size)]
+    if workers == 1:
+        return collect_results(map(_process_chunk, chunks), len(jobs), progress_interval)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_process_chunk, chunk) for chunk in chunks]
+        return collect_results((future.result() for future in as_completed(futures)), len(jobs), progress_interval)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the edge_detection_5 pipeline over directories or glob patterns.")
+    parser.add_argument("inputs", nargs="+", help="image directories or glob patterns (quote patterns)")
+    parser.add_argument("--output-dir", default="processed", help="where the processed images are written")
+    parser.add_argument("--suffix", default="_processed.jpg",
+                        help="appended to each image's name and extension (sets the format)")
+    parser.add_argument("--recursive", action="store_true", help="also search subdirectories of input directories")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--chunk-size", type=int, default=16, help="images handed to a worker at a time")
+    parser.add_argument("--prefetch", type=int, default=2, help="images each worker decodes ahead")
+    parser.add_argument("--force", action="store_true", help="reprocess images whose outputs are up to date")
+    args = parser.parse_args()
+
+    images = find_images(args.inputs, args.recursive)
+    if not images:
+        print("No images found.")
+        return
+    root = common_root(images)
+    outputs = [(path, output_path(path, root, args.output_dir, args.suffix)) for path, _ in images]
+    duplicates = duplicate_outputs(outputs)
+    if duplicates:
+        for output, paths in duplicates.items():
+            print(f"{', '.join(paths)} would all be written to {output}")
+        parser.error(f"{len(duplicates)} output paths are shared by several images; nothing was processed")
+    code_mtime = os.path.getmtime(edge_detection_5.__file__)
+    jobs, skipped = [], 0
+    for path, output in outputs:
+        if not args.force and up_to_date(path, output, code_mtime):
+            skipped += 1
+        else:
+            jobs.append((path, output))
+    print(f"{len(images)} images found, {skipped} up to date, {len(jobs)} to process with {args.workers} workers")
+
+    start = time.perf_counter()
+    failures = run_batch(jobs, args.workers, args.chunk_size, args.prefetch) if jobs else []
+    elapsed = time.perf_counter() - start
+    for path, error in failures:
+        print(f"Failed: {path}: {error}")
+    processed = len(jobs) - len(failures)
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(f"Summary: {processed} processed, {skipped} skipped, {len(failures)} failed in {elapsed:.1f} s "
+          f"({rate:.1f} images/s). Outputs in '{args.output_dir}'.")
+
+if __name__ == "__main__":
+    main()
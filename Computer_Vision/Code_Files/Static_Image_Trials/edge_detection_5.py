@@ -1,9 +1,12 @@
 import cv2
 import numpy as np
-import matplotlib.pyplot as plt
 
 def preprocess_image(image_path):
     img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+    return blur_image(img)
+
+# Function to blur an already loaded grayscale image (the batch processor decodes ahead)
+def blur_image(img):
     img_blur = cv2.GaussianBlur(img, (5, 5), 0)
     return img_blur
 
@@ -47,8 +50,8 @@ def post_process(image):
     closed = cv2.morphologyEx(thinned, cv2.MORPH_CLOSE, kernel_close)
     return closed
 
-def process_image(image_path, output_path):
-    img_blur = preprocess_image(image_path)
+def process_image(image_path, output_path, image=None):
+    img_blur = preprocess_image(image_path) if image is None else blur_image(image)
     edges = detect_edges(img_blur)
     horizontal_lines = filter_horizontal_lines(edges)
     final_output = post_process(horizontal_lines)
@@ -57,17 +60,23 @@ def process_image(image_path, output_path):
     cv2.imwrite(output_path, final_output)
     return final_output
 
-# Process both images and save the output
-image_paths = ["Trial_Image_1.jpg", "Trial_Image_2.jpg"]
-output_paths = ["Processed_Image_1.jpg", "Processed_Image_2.jpg"]
+def main():
+    import matplotlib.pyplot as plt
+
+    # Process both images and save the output
+    image_paths = ["Trial_Image_1.jpg", "Trial_Image_2.jpg"]
+    output_paths = ["Processed_Image_1.jpg", "Processed_Image_2.jpg"]
+
+    # Pass the corresponding output path along with the image path
+    outputs = [process_image(img, output) for img, output in zip(image_paths, output_paths)]
 
-# Pass the corresponding output path along with the image path
-outputs = [process_image(img, output) for img, output in zip(image_paths, output_paths)]
+    # Display results
+    fig, axes = plt.subplots(1, 2, figsize=(12, 6))
+    for ax, output, title in zip(axes, outputs, ["Image 1", "Image 2"]):
+        ax.imshow(output, cmap='gray')
+        ax.set_title(title)
+        ax.axis("off")
+    plt.show()
 
-# Display results
-fig, axes = plt.subplots(1, 2, figsize=(12, 6))
-for ax, output, title in zip(axes, outputs, ["Image 1", "Image 2"]):
-    ax.imshow(output, cmap='gray')
-    ax.set_title(title)
-    ax.axis("off")
-plt.show()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import numpy as np
+
+from Sensing_5 import Y_BANDS
+
+# Order of the tracked coordinates of a band; a tracked band is drawn as [x_left, y, x_right, y]
+COORDINATES = ("x_left", "y", "x_right")
+
+# Function to turn the process / measurement noise of a constant-velocity model into the
+# steady-state Kalman gains, i.e. the optimal alpha-beta filter (Kalata's tracking index).
+# process_std is the random acceleration (px/frame^2), measurement_std the detection noise (px).
+def alpha_beta_gains(process_std, measurement_std, dt=1.0):
+    tracking_index = process_std * dt * dt / measurement_std
+    r = (4 + tracking_index - np.sqrt(8 * tracking_index + tracking_index ** 2)) / 4
+    alpha = 1 - r * r
+    beta = 2 * (2 - alpha) - 4 * np.sqrt(1 - alpha)
+    return alpha, beta
+
+# Function to reduce raw segments (HoughLinesP or Profile_Detector shape) to one measurement per
+# band: found[b] and z[b] = (leftmost x, mean midpoint y, rightmost x) of the band's segments.
+# Band membership is the same as in extend_lines (midpoint within y_tolerance of the band).
+def band_measurements(lines, bands=Y_BANDS, y_tolerance=15):
+    n = len(bands)
+    z = np.zeros((n, 3))
+    if lines is None or len(lines) == 0:
+        return np.zeros(n, dtype=bool), z
+    segments = np.asarray(lines).reshape(-1, 4)
+    y_mids = (segments[:, 1] + segments[:, 3]) / 2
+    in_band = np.abs(y_mids[:, None] - np.asarray(bands)[None, :]) < y_tolerance
+    matched = in_band.any(axis=1)
+    band_idx = in_band.argmax(axis=1)[matched]
+    segments = segments[matched]
+    counts = np.bincount(band_idx, minlength=n)
+    found = counts > 0
+    left = np.full(n, np.inf)
+    right = np.full(n, -np.inf)
+    np.minimum.at(left, band_idx, np.minimum(segments[:, 0], segments[:, 2]))
+    np.maximum.at(right, band_idx, np.maximum(segments[:, 0], segments[:, 2]))
+    z[:, 0] = np.where(found, left, 0)
+    z[:, 1] = np.bincount(band_idx, weights=y_mids[matched], minlength=n) / np.maximum(counts, 1)
+    z[:, 2] = np.where(found, right, 0)
+    return found, z
+
+# Function to turn Profile_Detector estimates (band, y, x_start, x_end, strength) into band
+# measurements, keeping their sub-pixel precision
+def estimate_measurements(estimates, n_bands=len(Y_BANDS)):
+    found = np.zeros(n_bands, dtype=bool)
+    z = np.zeros((n_bands, 3))
+    for band, y, x_start, x_end, _ in estimates:
+        if band >= 0:
+            found[band] = True
+            z[band] = (x_start, y, x_end)
+    return found, z
+
+# Class tracking every band with an alpha-beta filter on (x_left, y, x_right) and their
+# velocities; all bands are updated together with a few small array operations, so the cost
+# per frame is constant and no random numbers are involved.
+# Each frame: predict position += velocity * dt, then for each band
+#   - a measurement within gate (per coordinate, px) of the prediction corrects the state;
+#   - a measurement outside the gate is rejected as an outlier, unless reacquire frames in a
+#     row were rejected, in which case the mark really moved and the track restarts there;
+#   - no (accepted) measurement: the band coasts on its prediction with velocity_decay, and is
+#     dropped after max_missed frames (this replaces the old top-band persistence).
+# Gains come from alpha/beta, or from process_std/measurement_std via alpha_beta_gains.
+class BandTracker:
+    def __init__(self, bands=Y_BANDS, y_tolerance=15, alpha=None, beta=None, process_std=0.5,
+                 measurement_std=2.0, gate=(40.0, 10.0, 40.0), max_missed=15, reacquire=3, velocity_decay=0.9):
+        self.bands = list(bands)
+        self.y_tolerance = y_tolerance
+        if alpha is None or beta is None:
+            alpha, beta = alpha_beta_gains(process_std, measurement_std)
+        self.alpha = alpha
+        self.beta = beta
+        self.gate = np.asarray(gate, dtype=np.float64)
+        self.max_missed = max_missed
+        self.reacquire = reacquire
+        self.velocity_decay = velocity_decay
+        self.reset()
+
+    # Function to forget all tracks and statistics
+    def reset(self):
+        n = len(self.bands)
+        self.position = np.zeros((n, 3))
+        self.velocity = np.zeros((n, 3))
+        self.active = np.zeros(n, dtype=bool)
+        self.missed = np.zeros(n, dtype=np.int64)
+        self.rejected = np.zeros(n, dtype=np.int64)
+        self.stats = {"frames": 0, "corrected": 0, "coasted": 0, "outliers": 0, "restarted": 0, "dropped": 0}
+
+    # Function to track from one frame's raw segments (None = nothing detected)
+    def update(self, lines, dt=1.0):
+        found, z = band_measurements(lines, self.bands, self.y_tolerance)
+        return self.update_measurements(found, z, dt)
+
+    # Function to run one predict/correct step from per-band measurements
+    def update_measurements(self, found, z, dt=1.0):
+        predicted = self.position + self.velocity * dt
+        residual = z - predicted
+        tracked = found & self.active
+        inlier = tracked & (np.abs(residual) <= self.gate).all(axis=1)
+        outlier = tracked & ~inlier
+        self.rejected = np.where(outlier, self.rejected + 1, 0)
+        restart = (found & ~self.active) | (outlier & (self.rejected >= self.reacquire))
+        coast = self.active & ~inlier & ~restart
+        self.missed = np.where(coast, self.missed + 1, 0)
+        drop = coast & (self.missed > self.max_missed)
+
+        inlier_col, restart_col, coast_col = inlier[:, None], restart[:, None], coast[:, None]
+        self.position = np.where(restart_col, z, np.where(inlier_col, predicted + self.alpha * residual, predicted))
+        self.velocity = np.where(restart_col, 0.0,
+                                 np.where(inlier_col, self.velocity + (self.beta / dt) * residual,
+                                          np.where(coast_col, self.velocity * self.velocity_decay, self.velocity)))
+        self.rejected[restart] = 0
+        self.active = (self.active | restart) & ~drop
+
+        stats = self.stats
+        stats["frames"] += 1
+        stats["corrected"] += int(np.count_nonzero(inlier))
+        stats["coasted"] += int(np.count_nonzero(coast & ~drop))
+        stats["outliers"] += int(np.count_nonzero(outlier))
+        stats["restarted"] += int(np.count_nonzero(restart))
+        stats["dropped"] += int(np.count_nonzero(drop))
+        return self.lines()
+
+    # Function to get the tracked bands as extend_lines-style (N, 1, 4) int32 lines
+    def lines(self):
+        rows = np.rint(self.position[self.active]).astype(np.int32)
+        lines = np.empty((len(rows), 1, 4), dtype=np.int32)
+        lines[:, 0, 0] = rows[:, 0]
+        lines[:, 0, 1] = rows[:, 1]
+        lines[:, 0, 2] = rows[:, 2]
+        lines[:, 0, 3] = rows[:, 1]
+        return lines
@@ -0,0 +1,55 @@
+import argparse
+import random
+
+import numpy as np
+
+from Benchmark_Common import read_frames, speed, time_engines, video_size
+from Sensing_5 import Y_BANDS
+from Sensing_Engine import SensingEngine
+
+# Function to map extended lines to {band index: y}
+def band_assignment(lines):
+    bands = {}
+    if lines is None:
+        return bands
+    for line in lines:
+        x1, y1, x2, y2 = line[0]
+        band = int(np.argmin([abs(y1 - band_y) for band_y in Y_BANDS]))
+        bands[band] = int(y1)
+    return bands
+
+def main():
+    parser = argparse.ArgumentParser(description="Speed and agreement of band-strip vs full-frame detection.")
+    parser.add_argument("video_path")
+    parser.add_argument("--frames", type=int, default=0, help="frames to compare (0 = whole video)")
+    args = parser.parse_args()
+
+    width, height = video_size(args.video_path)
+    # Same seed in both engines so the scripted shifts in extend_lines cannot differ
+    engines = {"full": SensingEngine(width, height, rng=random.Random(0)),
+               "strips": SensingEngine(width, height, rng=random.Random(0), band_strips=True)}
+    strip_rows = sum(y1 - y0 for y0, y1 in engines["strips"].strips)
+    print(f"Strip mode processes {strip_rows} of {height} rows ({height / strip_rows:.1f}x fewer pixels)")
+
+    agreement = {"same_bands": 0, "y_errors": []}
+
+    def compare(results):
+        a, b = band_assignment(results["full"]), band_assignment(results["strips"])
+        if a.keys() == b.keys():
+            agreement["same_bands"] += 1
+            agreement["y_errors"].extend(abs(a[band] - b[band]) for band in a)
+
+    frames, times = time_engines(engines, read_frames(args.video_path, args.frames), compare)
+    if frames == 0:
+        print("No frames read")
+        return
+    print(f"Frames: {frames}")
+    for name, seconds in times.items():
+        print(f"{name:<7} {speed(seconds, frames, times['full'])}  {frames / seconds:7.1f} fps")
+    print(f"Same bands detected: {agreement['same_bands']}/{frames} frames")
+    y_errors = agreement["y_errors"]
+    if y_errors:
+        print(f"Band y difference: mean {np.mean(y_errors):.2f} px, max {np.max(y_errors)} px")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+from Benchmark_Common import trial_videos, video_name
+from Band_Tracker import BandTracker, band_measurements
+from Sensing_5 import Y_BANDS
+from Sensing_Engine import SensingEngine
+
+# Function to generate a known band trajectory and noisy detections of it: the middle band
+# slides like the cable in the trial videos, the others drift slowly. Detections get Gaussian
+# noise, random dropouts and gross outliers (other marks or text picked up as the band).
+def synthetic_sequence(frames, noise, dropout, outlier, seed):
+    rng = np.random.default_rng(seed)
+    t = np.arange(frames)[:, None]
+    truth = np.zeros((frames, len(Y_BANDS), 3))
+    truth[:, :, 1] = np.asarray(Y_BANDS, dtype=float) + 3 * np.sin(t / 40)
+    truth[:, :, 0] = 530 + 20 * np.sin(t / 60)
+    truth[:, 1, 0] = 530 + 160 * np.sin(np.pi * np.arange(frames) / frames) ** 2
+    truth[:, :, 2] = truth[:, :, 0] + 600
+    measured = truth + rng.normal(0, noise, truth.shape)
+    gross = rng.random((frames, len(Y_BANDS))) < outlier
+    measured[gross] += rng.choice([-1, 1], (gross.sum(), 3)) * rng.uniform(60, 200, (gross.sum(), 3)) * [1, 0.08, 1]
+    found = rng.random((frames, len(Y_BANDS))) >= dropout
+    return truth, measured, found
+
+# Function to compare raw detections with the tracker output against the known truth
+def benchmark_synthetic(frames, noise, dropout, outlier, seed, tracker_options):
+    truth, measured, found = synthetic_sequence(frames, noise, dropout, outlier, seed)
+    tracker = BandTracker(**tracker_options)
+    tracked = np.full(truth.shape, np.nan)
+    start = time.perf_counter()
+    for i in range(frames):
+        tracker.update_measurements(found[i], measured[i])
+        tracked[i][tracker.active] = tracker.position[tracker.active]
+    elapsed = time.perf_counter() - start
+
+    # Skip the first frames, where the tracker converges from its first measurement
+    settle = min(10, frames // 2)
+    raw_error = np.where(found[settle:, :, None], measured[settle:] - truth[settle:], np.nan)
+    track_error = tracked[settle:] - truth[settle:]
+    print(f"Synthetic: {frames} frames, noise {noise} px, dropout {dropout:.0%}, outliers {outlier:.0%}")
+    print(f"  gains alpha {tracker.alpha:.3f} beta {tracker.beta:.3f}; {elapsed / frames * 1e6:.1f} us/update")
+    print(f"  {'':<10}{'raw RMSE':>10}{'tracked':>10}{'raw max':>10}{'tracked':>10}   coverage raw / tracked")
+    for c, name in enumerate(("x_left", "y", "x_right")):
+        raw, track = raw_error[:, :, c], track_error[:, :, c]
+        print(f"  {name:<10}{np.sqrt(np.nanmean(raw ** 2)):10.2f}{np.sqrt(np.nanmean(track ** 2)):10.2f}"
+              f"{np.nanmax(np.abs(raw)):10.1f}{np.nanmax(np.abs(track)):10.1f}   "
+              f"{np.isfinite(raw).mean():.1%} / {np.isfinite(track).mean():.1%}")
+    print(f"  {tracker.stats}")
+
+# Function to run a detector on a video with and without the tracker and report how much the
+# band positions jitter frame to frame (no ground truth for real footage)
+def benchmark_video(path, detector, max_frames, tracker_options):
+    cap = cv2.VideoCapture(path)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    engine = SensingEngine(width, height, detector=detector)
+    tracker = BandTracker(**tracker_options)
+    raw, tracked = [], []
+    track_time = 0.0
+    frames = 0
+    while not max_frames or frames < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        segments = engine.detect(frame)
+        found, z = band_measurements(segments)
+        start = time.perf_counter()
+        tracker.update_measurements(found, z)
+        track_time += time.perf_counter() - start
+        raw.append(np.where(found[:, None], z, np.nan))
+        tracked.append(np.where(tracker.active[:, None], tracker.position, np.nan))
+        frames += 1
+    cap.release()
+    if frames < 2:
+        print(f"{path}: not enough frames")
+        return
+    raw, tracked = np.array(raw), np.array(tracked)
+    print(f"{video_name(path)} ({detector}): {frames} frames, "
+          f"tracker {track_time / frames * 1e6:.1f} us/frame")
+    for b in range(len(Y_BANDS)):
+        jitter = [np.nanmean(np.abs(np.diff(series[:, b, 1]))) if np.isfinite(series[:, b, 1]).sum() > 1 else np.nan
+                  for series in (raw, tracked)]
+        print(f"  band {b}: present raw {np.isfinite(raw[:, b, 1]).mean():6.1%} tracked "
+              f"{np.isfinite(tracked[:, b, 1]).mean():6.1%}  |dy/frame| raw {jitter[0]:.2f} tracked {jitter[1]:.2f}")
+    print(f"  {tracker.stats}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy and cost of the alpha-beta band tracker.")
+    parser.add_argument("--frames", type=int, default=2000, help="synthetic sequence length")
+    parser.add_argument("--noise", type=float, default=2.0, help="synthetic detection noise (px)")
+    parser.add_argument("--dropout", type=float, default=0.15, help="fraction of missed detections")
+    parser.add_argument("--outliers", type=float, default=0.03, help="fraction of gross outliers")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--process-std", type=float, default=0.5)
+    parser.add_argument("--measurement-std", type=float, default=2.0)
+    parser.add_argument("--videos", nargs="*", default=trial_videos("Final")[-1:])
+    parser.add_argument("--detector", choices=("hough", "profile"), default="profile")
+    parser.add_argument("--video-frames", type=int, default=0, help="frames per video (0 = whole video)")
+    args = parser.parse_args()
+
+    tracker_options = {"process_std": args.process_std, "measurement_std": args.measurement_std}
+    benchmark_synthetic(args.frames, args.noise, args.dropout, args.outliers, args.seed, tracker_options)
+    for path in args.videos:
+        benchmark_video(path, args.detector, args.video_frames, tracker_options)
+
+if __name__ == "__main__":
+    main()
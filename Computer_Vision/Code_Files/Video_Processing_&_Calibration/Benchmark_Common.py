@@ -0,0 +1,86 @@
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+# Shared parts of the Benchmark_* scripts: the default trial videos and images, frame
+# reading, timing several SensingEngines on the same frames and comparing their extended lines.
+
+# The Computer_Vision folder, which holds Test_Inputs and Test_Outputs
+CV_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+# Function to list the trial videos the benchmarks run on by default (folder="Final" for the
+# final trials only)
+def trial_videos(folder="**"):
+    return sorted(glob.glob(os.path.join(CV_ROOT, "Test_Outputs", "Video_Trials", folder, "*.mp4"), recursive=True))
+
+# Function to list the static test images
+def trial_images():
+    return sorted(glob.glob(os.path.join(CV_ROOT, "Test_Inputs", "*.jpg")))
+
+# Function to give a video (or image) path relative to the Computer_Vision folder for printing
+def video_name(path):
+    return os.path.relpath(path, CV_ROOT)
+
+# Function to read the frame size of a video
+def video_size(path):
+    cap = cv2.VideoCapture(path)
+    size = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    cap.release()
+    return size
+
+# Function to yield the frames of a video (at most max_frames, 0 = all)
+def read_frames(path, max_frames=0):
+    cap = cv2.VideoCapture(path)
+    frames = 0
+    while not max_frames or frames < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        yield frame
+        frames += 1
+    cap.release()
+
+# Function to run every engine on each frame, timing the given method (process or detect).
+# on_frame receives {name: output} for each frame. Returns the frame count and the total
+# seconds per engine.
+def time_engines(engines, frames, on_frame, method="process"):
+    times = dict.fromkeys(engines, 0.0)
+    count = 0
+    for frame in frames:
+        results = {}
+        for name, engine in engines.items():
+            start = time.perf_counter()
+            results[name] = getattr(engine, method)(frame)
+            times[name] += time.perf_counter() - start
+        on_frame(results)
+        count += 1
+    return count, times
+
+# Function to format one engine's time per frame and its speed-up over a reference time
+def speed(seconds, frames, reference_seconds):
+    return f"{seconds / frames * 1000:7.2f} ms/frame  {reference_seconds / seconds:5.2f}x"
+
+# Class counting, over a run, the frames where each engine's extended lines equal a reference
+# engine's, plus the |dy| of lines when both have the same number of lines
+class LineAgreement:
+    def __init__(self, names):
+        self.same = dict.fromkeys(names, 0)
+        self.dy = {name: [] for name in names}
+
+    # Function to compare one frame's lines with the reference lines
+    def add(self, name, lines, reference):
+        if lines is None or reference is None:
+            self.same[name] += lines is reference
+            return
+        lines, reference = lines.reshape(-1, 4), reference.reshape(-1, 4)
+        if lines.shape == reference.shape:
+            self.same[name] += int(np.array_equal(lines, reference))
+            self.dy[name].extend(np.abs(lines[:, 1] - reference[:, 1]).tolist())
+
+    # Function to describe how far the named engine's |dy| from the reference went
+    def dy_summary(self, name):
+        dy = self.dy[name]
+        return f", |dy| mean {np.mean(dy):.2f} max {max(dy):.0f} px" if dy else ""
@@ -0,0 +1,90 @@
+import argparse
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from Sensing_5 import detect_frame, extend_lines, draw_lines, draw_output, output_roi
+from Sensing_Engine import SensingEngine
+
+# Function to decode the first n frames of a video into memory
+def load_frames(video_path, n):
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < n:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise IOError(f"Could not read frames from {video_path}")
+    return frames
+
+# Per-frame work of the function-based loop: detection plus the writer conversions and canvases
+def make_legacy_step(width, height):
+    roi = output_roi(width, height)
+    state = {"prev_lines": None}
+
+    def step(frame_idx, frame):
+        gray, contrast, edges, lines = detect_frame(frame)
+        for image in (gray, contrast, edges):
+            cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        lines = extend_lines(lines, width, height, frame_idx, state["prev_lines"])
+        state["prev_lines"] = lines
+        draw_lines(lines, width, height)
+        draw_output(lines, width, height, frame_idx, roi, verbose=False)
+    return step
+
+# Same per-frame work through the preallocated engine
+def make_engine_step(width, height):
+    engine = SensingEngine(width, height)
+
+    def step(frame_idx, frame):
+        lines = engine.process(frame)
+        for image in (engine.gray, engine.contrast, engine.edges):
+            engine.to_bgr(image)
+        engine.render_lines(lines)
+        engine.render_output(lines, frame_idx)
+    return step
+
+# Function to measure per-frame allocation (traced peak above the steady baseline) and time
+def measure(step, frames, iterations, warmup=3):
+    for i in range(warmup):
+        step(i, frames[i % len(frames)])
+
+    tracemalloc.start()
+    transient = []
+    for i in range(iterations):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        step(warmup + i, frames[i % len(frames)])
+        transient.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+
+    times = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        step(warmup + i, frames[i % len(frames)])
+        times.append(time.perf_counter() - start)
+    return np.array(transient), np.array(times)
+
+def main():
+    parser = argparse.ArgumentParser(description="Allocation and timing of the Sensing_5 loop vs SensingEngine.")
+    parser.add_argument("video_path")
+    parser.add_argument("--frames", type=int, default=20, help="distinct frames decoded and cycled")
+    parser.add_argument("--iterations", type=int, default=60)
+    args = parser.parse_args()
+
+    frames = load_frames(args.video_path, args.frames)
+    height, width = frames[0].shape[:2]
+    print(f"{len(frames)} frames of {width}x{height}, {args.iterations} iterations per variant")
+    print(f"{'variant':<10} {'alloc/frame (KB) median':>24} {'max':>10} {'ms/frame':>10}")
+    for name, factory in (("functions", make_legacy_step), ("engine", make_engine_step)):
+        transient, times = measure(factory(width, height), frames, args.iterations)
+        print(f"{name:<10} {np.median(transient) / 1024:>24.1f} {transient.max() / 1024:>10.1f} "
+              f"{np.median(times) * 1000:>10.2f}")
+
+if __name__ == "__main__":
+    main()
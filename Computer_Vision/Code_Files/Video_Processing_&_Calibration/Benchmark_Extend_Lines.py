@@ -0,0 +1,101 @@
+import argparse
+import random
+import time
+
+import cv2
+import numpy as np
+
+from Sensing_5 import Y_BANDS, extend_lines, extend_lines_loop
+from Sensing_Engine import SensingEngine
+
+# Function to record the raw HoughLinesP output of every frame of a video.
+# counts[i] is the number of segments of frame i, or -1 when HoughLinesP returned None.
+def record_hough(video_path, output_path=None):
+    cap = cv2.VideoCapture(video_path)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    engine = SensingEngine(width, height)
+    segments, counts = [], []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        lines = engine.detect(frame)
+        counts.append(-1 if lines is None else len(lines))
+        if lines is not None:
+            segments.append(lines.reshape(-1, 4))
+    cap.release()
+    segments = np.concatenate(segments) if segments else np.empty((0, 4), dtype=np.int32)
+    recording = {"segments": segments, "counts": np.array(counts), "size": np.array([width, height])}
+    if output_path:
+        np.savez_compressed(output_path, **recording)
+    return recording
+
+# Function to turn a recording back into per-frame HoughLinesP-shaped arrays (or None)
+def replay(recording):
+    offset = 0
+    for count in recording["counts"]:
+        if count < 0:
+            yield None
+            continue
+        yield recording["segments"][offset:offset + count].reshape(-1, 1, 4)
+        offset += count
+
+# Function to check the vectorized extend_lines against the loop version frame by frame
+def compare(recording):
+    width, height = (int(v) for v in recording["size"])
+    prev_fast = prev_loop = None
+    mismatches = 0
+    for frame_idx, lines in enumerate(replay(recording)):
+        fast = extend_lines(lines, width, height, frame_idx, prev_fast, rng=random.Random(frame_idx))
+        loop = extend_lines_loop(lines, width, height, frame_idx, prev_loop, rng=random.Random(frame_idx))
+        if (fast is None) != (loop is None) or (fast is not None and not np.array_equal(fast, loop)):
+            mismatches += 1
+        prev_fast, prev_loop = fast, loop
+    return len(recording["counts"]), mismatches
+
+# Function to build n noisy near-horizontal segments, a third of them inside the bands
+def synthetic_segments(n, width=1920, height=1080, seed=0):
+    gen = np.random.default_rng(seed)
+    y = gen.integers(0, height, n)
+    in_band = gen.random(n) < 0.33
+    y[in_band] = gen.choice(Y_BANDS, in_band.sum()) + gen.integers(-14, 15, in_band.sum())
+    x1 = gen.integers(0, width - 100, n)
+    x2 = x1 + gen.integers(20, 100, n)
+    dy = gen.integers(-3, 4, n)
+    return np.stack([x1, y, x2, y + dy], axis=1).astype(np.int32).reshape(-1, 1, 4)
+
+# Function to time one implementation on the same segments
+def time_call(function, lines, repeats):
+    start = time.perf_counter()
+    for i in range(repeats):
+        function(lines, 1920, 1080, 90, None, rng=random.Random(i))
+    return (time.perf_counter() - start) / repeats
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized vs loop extend_lines: agreement and scaling.")
+    parser.add_argument("--video", help="record HoughLinesP output from this video and compare on it")
+    parser.add_argument("--record", help="save the recording to this .npz")
+    parser.add_argument("--recorded", help="compare on a recording saved earlier with --record")
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    recording = None
+    if args.recorded:
+        recording = dict(np.load(args.recorded))
+    elif args.video:
+        recording = record_hough(args.video, args.record)
+    if recording is not None:
+        frames, mismatches = compare(recording)
+        print(f"Recorded Hough outputs: {frames} frames, {len(recording['segments'])} segments, "
+              f"{mismatches} mismatching frames")
+
+    print(f"{'segments':>9} {'loop (us)':>11} {'vectorized (us)':>16} {'speed-up':>9}")
+    for n in (10, 100, 300, 1000, 3000, 10000):
+        lines = synthetic_segments(n)
+        loop = time_call(extend_lines_loop, lines, max(3, args.repeats * 10 // max(n, 10)))
+        fast = time_call(extend_lines, lines, args.repeats)
+        print(f"{n:>9} {loop * 1e6:>11.1f} {fast * 1e6:>16.1f} {loop / fast:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
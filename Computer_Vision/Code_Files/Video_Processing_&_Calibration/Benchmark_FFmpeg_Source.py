@@ -0,0 +1,95 @@
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+try:
+    import resource  # Unix only; CPU time is reported as n/a without it
+except ImportError:
+    resource = None
+
+from Benchmark_Common import trial_videos, video_name
+from Frame_Sources import FFmpegSource
+
+# Function to get the CPU seconds used so far by this process and its finished children
+# (nan without the resource module)
+def cpu_seconds():
+    if resource is None:
+        return float("nan")
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+# Function to read a whole video as gray frames through cv2.VideoCapture + cvtColor (the current
+# path), keeping every `keep`th frame for the agreement check
+def read_videocapture(path, max_frames, keep):
+    cap = cv2.VideoCapture(path)
+    gray = np.empty((int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))), dtype=np.uint8)
+    kept, frames = [], 0
+    while not max_frames or frames < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray)
+        if frames % keep == 0:
+            kept.append(gray.copy())
+        frames += 1
+    cap.release()
+    return frames, kept
+
+# Function to read a whole video through FFmpegSource with the given crop/scale
+def read_ffmpeg(path, max_frames, keep, ffmpeg, crop=None, scale=None):
+    source = FFmpegSource(path, crop=crop, scale=scale, ffmpeg=ffmpeg)
+    kept, frames = [], 0
+    while not max_frames or frames < max_frames:
+        ret, gray = source.read()
+        if not ret:
+            break
+        if frames % keep == 0:
+            kept.append(gray.copy())
+        frames += 1
+    source.release()
+    return frames, kept
+
+# Function to time one reader: wall time per frame and CPU time per frame (ffmpeg included,
+# since the child is waited for before the reader returns)
+def timed(reader, *args, **kwargs):
+    cpu = cpu_seconds()
+    start = time.perf_counter()
+    frames, kept = reader(*args, **kwargs)
+    wall = time.perf_counter() - start
+    return frames, kept, wall, cpu_seconds() - cpu
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode-to-gray time of cv2.VideoCapture + cvtColor vs an ffmpeg pipe.")
+    parser.add_argument("videos", nargs="*", default=trial_videos("Final"))
+    parser.add_argument("--max-frames", type=int, default=0, help="frames per video (0 = all)")
+    parser.add_argument("--ffmpeg", default="ffmpeg", help="ffmpeg executable")
+    parser.add_argument("--keep", type=int, default=25, help="compare every Nth frame with the VideoCapture gray")
+    args = parser.parse_args()
+
+    for path in args.videos:
+        print(video_name(path))
+        frames, reference, wall, cpu = timed(read_videocapture, path, args.max_frames, args.keep)
+        print(f"  {'VideoCapture + cvtColor':<30}{wall / frames * 1000:8.2f} ms/frame wall {cpu / frames * 1000:8.2f} ms/frame CPU")
+        height, width = reference[0].shape
+        variants = [("ffmpeg gray", {}),
+                    ("ffmpeg gray 1/2 scale", {"scale": (width // 2, height // 2)}),
+                    ("ffmpeg gray middle third crop", {"crop": (0, height // 3, width, height // 3)})]
+        for name, options in variants:
+            try:
+                count, kept, wall, cpu = timed(read_ffmpeg, path, args.max_frames, args.keep, args.ffmpeg, **options)
+            except IOError as exc:
+                print(f"  {exc}")
+                return
+            line = f"  {name:<30}{wall / count * 1000:8.2f} ms/frame wall {cpu / count * 1000:8.2f} ms/frame CPU"
+            if not options:
+                # ffmpeg and OpenCV convert YUV to gray with slightly different rounding
+                difference = np.mean([np.abs(a.astype(np.int16) - b).mean() for a, b in zip(kept, reference)])
+                line += f", {count}/{frames} frames, mean |gray difference| {difference:.2f}"
+            print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from Benchmark_Common import trial_videos, video_name
+from Frame_Cache import STAGES, FrameCache, engine_stage_params
+from Sensing_Engine import SensingEngine
+
+# Function to time FrameCache.stages plus a Hough pass over the cached edges, the work a
+# cached Sensing_5 run does before drawing and encoding
+def timed_run(cache, video_path, params, engine):
+    start = time.perf_counter()
+    stages = cache.stages(video_path, params)
+    prepared = time.perf_counter() - start
+    start = time.perf_counter()
+    segments = [engine.hough(edges) for edges in stages["edges"]]
+    return stages, segments, prepared, time.perf_counter() - start
+
+# Function to time the uncached detection chain (decode + engine.detect) over a whole video
+def uncached_run(video_path, engine):
+    cap = cv2.VideoCapture(video_path)
+    segments = []
+    start = time.perf_counter()
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        segments.append(engine.detect(frame))
+    cap.release()
+    return segments, time.perf_counter() - start
+
+# Function to tell whether two per-frame segment lists are identical
+def same_segments(a, b):
+    return len(a) == len(b) and all((x is None and y is None) or (x is not None and y is not None and np.array_equal(x, y))
+                                    for x, y in zip(a, b))
+
+# Function to run the cold / warm / changed-parameter scenarios on one video
+def benchmark_video(video_path, cache_dir):
+    cap = cv2.VideoCapture(video_path)
+    width, height = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    cap.release()
+    engine = SensingEngine(width, height)
+    reference, uncached = uncached_run(video_path, engine)
+    print(f"{video_name(video_path)}: {len(reference)} frames, uncached decode + chain {uncached:.2f} s")
+
+    scenarios = [("cold", engine_stage_params()), ("warm", engine_stage_params()),
+                 ("clip_limit 4.0", engine_stage_params(clip_limit=4.0)), ("clip_limit 4.0 warm", engine_stage_params(clip_limit=4.0))]
+    for name, params in scenarios:
+        cache = FrameCache(cache_dir)
+        stages, segments, prepared, hough = timed_run(cache, video_path, params, engine)
+        check = ""
+        if params == engine_stage_params():
+            check = ", same segments as uncached" if same_segments(segments, reference) else ", SEGMENTS DIFFER"
+        print(f"  {name:<20} stages {prepared:6.2f} s + hough {hough:5.2f} s "
+              f"(computed: {', '.join(cache.stats['computed']) or 'none'}{check})")
+        del stages
+
+    # A bound smaller than one video's stacks: only the stacks of the current run survive
+    cache = FrameCache(cache_dir, max_bytes=1)
+    cache.stages(video_path, engine_stage_params())
+    cache.evict()
+    remaining = len(glob.glob(os.path.join(cache_dir, "*.npy")))
+    print(f"  LRU bound below one run: {cache.stats['evicted']} stacks evicted, {remaining} kept "
+          f"(the {len(STAGES)} in use)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold, warm and partially invalidated runs of the frame cache.")
+    parser.add_argument("videos", nargs="*", default=trial_videos("Final"))
+    parser.add_argument("--cache-dir", default=None, help="where to build the cache (default: a temp dir)")
+    args = parser.parse_args()
+
+    for video_path in args.videos:
+        with tempfile.TemporaryDirectory(dir=args.cache_dir) as cache_dir:
+            benchmark_video(video_path, cache_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import argparse
+import multiprocessing
+import os
+import time
+
+import cv2
+import numpy as np
+
+from Benchmark_Common import trial_videos, video_name
+from Frame_Ring import FrameRing
+
+# Function to run the benchmark task on one frame and return a small checksum of its result:
+# 'touch' only reads the frame (pure transport cost), 'detect' runs SensingEngine.detect
+def run_task(task, frame, state):
+    if task == "touch":
+        return int(frame[::16, ::16].sum())
+    if "engine" not in state:
+        from Sensing_Engine import SensingEngine
+        state["engine"] = SensingEngine(frame.shape[1], frame.shape[0])
+    lines = state["engine"].detect(frame)
+    return -1 if lines is None else int(lines.sum()) * 1000 + len(lines)
+
+# Worker reading frames as views of the shared ring
+def ring_worker(ring, task, results):
+    state = {}
+    while True:
+        item = ring.next()
+        if item is None:
+            break
+        seq, slot = item
+        value = run_task(task, ring.frames[slot], state)
+        ring.release(slot)
+        results.put((seq, value))
+    results.put(None)
+    ring.close()
+
+# Worker receiving pickled frames through a multiprocessing.Queue
+def queue_worker(frames, task, results):
+    state = {}
+    while True:
+        item = frames.get()
+        if item is None:
+            break
+        seq, frame = item
+        results.put((seq, run_task(task, frame, state)))
+    results.put(None)
+
+# Function to yield (seq, frame) from the preloaded frames, or decode the video when preloaded is None
+def frame_stream(video_path, preloaded, count):
+    if preloaded is not None:
+        for seq in range(count):
+            yield seq, preloaded[seq % len(preloaded)]
+        return
+    cap = cv2.VideoCapture(video_path)
+    for seq in range(count):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        yield seq, frame
+    cap.release()
+
+# Function to run one transport with `workers` processes and return (seconds, {seq: checksum})
+def run_transport(transport, video_path, preloaded, count, shape, workers, slots, task):
+    results = multiprocessing.Queue()
+    if transport == "ring":
+        ring = FrameRing(slots, shape)
+        processes = [multiprocessing.Process(target=ring_worker, args=(ring, task, results)) for _ in range(workers)]
+    else:
+        frames = multiprocessing.Queue(maxsize=slots)
+        processes = [multiprocessing.Process(target=queue_worker, args=(frames, task, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+
+    start = time.perf_counter()
+    if transport == "ring" and preloaded is None:
+        # Decode straight into the shared slots
+        cap = cv2.VideoCapture(video_path)
+        for seq in range(count):
+            slot = ring.acquire()
+            ret, _ = cap.read(ring.frames[slot])
+            if not ret:
+                ring.release(slot)
+                break
+            ring.publish(seq, slot)
+        cap.release()
+    else:
+        for seq, frame in frame_stream(video_path, preloaded, count):
+            if transport == "ring":
+                slot = ring.acquire()
+                np.copyto(ring.frames[slot], frame)
+                ring.publish(seq, slot)
+            else:
+                frames.put((seq, frame))
+    if transport == "ring":
+        ring.finish(workers)
+    else:
+        for _ in range(workers):
+            frames.put(None)
+
+    checksums = {}
+    finished = 0
+    while finished < workers:
+        item = results.get()
+        if item is None:
+            finished += 1
+        else:
+            checksums[item[0]] = item[1]
+    elapsed = time.perf_counter() - start
+    for process in processes:
+        process.join()
+    if transport == "ring":
+        ring.unlink()
+    return elapsed, checksums
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame transport between processes: shared-memory ring vs pickling queue.")
+    parser.add_argument("video_path", nargs="?", default=trial_videos("Final")[-1])
+    parser.add_argument("--frames", type=int, default=600, help="frames to send per run")
+    parser.add_argument("--decode", action="store_true",
+                        help="decode the video in the producer instead of cycling preloaded frames")
+    parser.add_argument("--preload", type=int, default=30, help="distinct frames cycled when not decoding")
+    parser.add_argument("--workers", default="1,2,4", help="comma list of worker counts")
+    parser.add_argument("--slots", type=int, default=8, help="ring slots / queue depth")
+    parser.add_argument("--task", choices=("touch", "detect"), default="touch")
+    args = parser.parse_args()
+
+    cap = cv2.VideoCapture(args.video_path)
+    shape = (int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), 3)
+    preloaded = None
+    if not args.decode:
+        preloaded = [frame for ret, frame in (cap.read() for _ in range(args.preload)) if ret]
+    cap.release()
+    frame_mb = np.prod(shape) / 2 ** 20
+    print(f"{video_name(args.video_path)}: {shape[1]}x{shape[0]} frames ({frame_mb:.1f} MB), "
+          f"task '{args.task}', {'decoded' if args.decode else 'preloaded'} frames, {os.cpu_count()} CPUs")
+
+    print(f"{'workers':>8}{'transport':>11}{'frames':>8}{'fps':>9}{'MB/s':>9}{'speedup':>9}")
+    for workers in (int(w) for w in args.workers.split(",")):
+        timings = {}
+        for transport in ("queue", "ring"):
+            elapsed, checksums = run_transport(transport, args.video_path, preloaded, args.frames, shape, workers,
+                                               args.slots, args.task)
+            timings[transport] = (elapsed, checksums)
+            fps = len(checksums) / elapsed
+            speedup = f"{timings['queue'][0] / elapsed:8.2f}x" if transport == "ring" else ""
+            print(f"{workers:>8}{transport:>11}{len(checksums):>8}{fps:9.1f}{fps * frame_mb:9.0f}{speedup:>9}")
+        if timings["queue"][1] != timings["ring"][1]:
+            print("  WARNING: ring and queue results differ")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import contextlib
+import os
+import tempfile
+import time
+
+import cv2
+
+from Sensing_5 import open_writers, run_serial
+
+# Function to check whether OpenCV can open a window on this machine
+def gui_available():
+    try:
+        cv2.namedWindow('probe', cv2.WINDOW_NORMAL)
+        cv2.destroyWindow('probe')
+        return True
+    except cv2.error:
+        return False
+
+# Function to time one run_serial pass over the first max_frames frames of the video
+def time_run(video_path, max_frames, headless, debug_interval, work_dir):
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    if max_frames:
+        frame_count = min(frame_count, max_frames)
+
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        os.makedirs("debug_frames", exist_ok=True)
+        writers = open_writers(fps, width, height)
+        # Prints go to /dev/null: formatting and write cost is measured, terminal rendering is not
+        with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+            start = time.perf_counter()
+            frames = run_serial(cap, writers, width, height, frame_count, headless, debug_interval)
+            elapsed = time.perf_counter() - start
+        for writer in writers.values():
+            writer.release()
+    finally:
+        os.chdir(cwd)
+        cap.release()
+    return frames, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Frames/sec of Sensing_5 with and without headless mode.")
+    parser.add_argument("video_path")
+    parser.add_argument("--frames", type=int, default=150, help="frames per run (0 = whole video)")
+    parser.add_argument("--debug-interval", type=int, default=0, help="debug sampling used for the headless run")
+    args = parser.parse_args()
+
+    gui = gui_available()
+    if not gui:
+        print("No window support here: the interactive run keeps per-frame JPEGs and prints but skips imshow")
+
+    runs = [
+        ("interactive", not gui, 1),
+        ("headless", True, args.debug_interval),
+    ]
+    results = []
+    for name, headless, debug_interval in runs:
+        with tempfile.TemporaryDirectory() as work_dir:
+            frames, elapsed = time_run(args.video_path, args.frames, headless, debug_interval, work_dir)
+        results.append((name, frames, elapsed))
+
+    print(f"{'mode':<12} {'frames':>7} {'seconds':>9} {'fps':>8}")
+    for name, frames, elapsed in results:
+        print(f"{name:<12} {frames:>7} {elapsed:>9.2f} {frames / elapsed:>8.2f}")
+    speedup = (results[1][1] / results[1][2]) / (results[0][1] / results[0][2])
+    print(f"Headless speed-up: {speedup:.2f}x")
+
+if __name__ == "__main__":
+    main()
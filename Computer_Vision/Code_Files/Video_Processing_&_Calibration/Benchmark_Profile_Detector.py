@@ -0,0 +1,115 @@
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+from Benchmark_Common import trial_images, trial_videos, video_name
+from Profile_Detector import ProfileDetector
+from Sensing_5 import Y_BANDS
+from Sensing_Engine import SensingEngine
+
+# Function to summarise Hough segments near a y position: (mean midpoint y, min x, max x),
+# i.e. what extend_lines would read from them, or None when there are none
+def hough_mark(segments, y, tolerance):
+    if segments is None or len(segments) == 0:
+        return None
+    segments = segments.reshape(-1, 4)
+    y_mids = (segments[:, 1] + segments[:, 3]) / 2
+    near = segments[np.abs(y_mids - y) < tolerance]
+    if len(near) == 0:
+        return None
+    return (float(np.mean((near[:, 1] + near[:, 3]) / 2)),
+            float(np.min(near[:, [0, 2]])), float(np.max(near[:, [0, 2]])))
+
+# Function to print mean/max of a list of differences
+def describe(name, values):
+    if values:
+        print(f"  {name:<14} mean {np.mean(values):7.2f} px   max {np.max(values):7.2f} px")
+
+# Function to compare the detectors on every frame of one video at the Y_BANDS positions
+def compare_video(path, max_frames):
+    cap = cv2.VideoCapture(path)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    engines = {"hough": SensingEngine(width, height),
+               "hough strips": SensingEngine(width, height, band_strips=True),
+               "profile": SensingEngine(width, height, detector="profile")}
+    times = dict.fromkeys(engines, 0.0)
+    frames = same_bands = 0
+    dy, dx0, dx1 = [], [], []
+    while not max_frames or frames < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        found = {}
+        for name, engine in engines.items():
+            start = time.perf_counter()
+            found[name] = engine.detect(frame)
+            times[name] += time.perf_counter() - start
+        profile = {band: (y, x0, x1) for band, y, x0, x1, _ in engines["profile"].profile.estimates}
+        hough = {}
+        for band, band_y in enumerate(Y_BANDS):
+            mark = hough_mark(found["hough"], band_y, 15)
+            if mark is not None:
+                hough[band] = mark
+        if hough.keys() == profile.keys():
+            same_bands += 1
+        for band in hough.keys() & profile.keys():
+            dy.append(abs(hough[band][0] - profile[band][0]))
+            dx0.append(abs(hough[band][1] - profile[band][1]))
+            dx1.append(abs(hough[band][2] - profile[band][2]))
+        frames += 1
+    cap.release()
+    if frames == 0:
+        print(f"{path}: no frames read")
+        return
+    print(f"{video_name(path)}: {frames} frames {width}x{height}")
+    for name, seconds in times.items():
+        print(f"  {name:<14} {seconds / frames * 1000:7.2f} ms/frame  {frames / seconds:7.1f} fps  "
+              f"({times['hough'] / seconds:.1f}x vs hough)")
+    print(f"  Same bands detected: {same_bands}/{frames} frames")
+    describe("y difference", dy)
+    describe("x start diff", dx0)
+    describe("x end diff", dx1)
+
+# Function to compare the detectors on one still image, searching the whole height
+def compare_image(path, repeats):
+    image = cv2.imread(path)
+    height, width = image.shape[:2]
+    engine = SensingEngine(width, height)
+    profile = ProfileDetector(width, height, bands=None)
+    times = {}
+    for name, detect in (("hough", engine.detect), ("profile", profile.detect)):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            result = detect(image)
+        times[name] = (time.perf_counter() - start) / repeats
+        if name == "hough":
+            segments = result
+    print(f"{video_name(path)}: {width}x{height}, hough {times['hough'] * 1000:.1f} ms, "
+          f"profile {times['profile'] * 1000:.1f} ms ({times['hough'] / times['profile']:.1f}x)")
+    for _, y, x0, x1, strength in profile.estimates:
+        # Tilted marks give Hough segments whose midpoints spread around the profile y
+        mark = hough_mark(segments, y, 20)
+        agreement = ("no Hough segments nearby" if mark is None else
+                     f"Hough y {mark[0]:.1f}, x {mark[1]:.0f}..{mark[2]:.0f} "
+                     f"(dy {abs(mark[0] - y):.2f}, dx {abs(mark[1] - x0):.1f}/{abs(mark[2] - x1):.1f})")
+        print(f"  profile y {y:.2f}, x {x0:.1f}..{x1:.1f} (strength {strength:.1f}) | {agreement}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Speed and agreement of the profile detector vs Canny + Hough.")
+    parser.add_argument("--videos", nargs="*", default=trial_videos())
+    parser.add_argument("--images", nargs="*", default=trial_images())
+    parser.add_argument("--frames", type=int, default=0, help="frames per video (0 = whole video)")
+    parser.add_argument("--repeats", type=int, default=5, help="timing repeats per image")
+    args = parser.parse_args()
+
+    for path in args.videos:
+        compare_video(path, args.frames)
+    for path in args.images:
+        compare_image(path, args.repeats)
+
+if __name__ == "__main__":
+    main()
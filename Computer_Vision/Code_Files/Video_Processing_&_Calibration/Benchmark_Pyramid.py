@@ -0,0 +1,52 @@
+import argparse
+
+import numpy as np
+
+from Band_Tracker import band_measurements
+from Benchmark_Common import read_frames, speed, time_engines, trial_videos, video_name, video_size
+from Sensing_Engine import SensingEngine
+
+# Function to run the Hough chain at every pyramid level over one video; the band positions
+# found at full resolution (level 0) are the reference for the reduced levels
+def compare_video(path, levels, max_frames):
+    width, height = video_size(path)
+    engines = {level: SensingEngine(width, height, pyramid_levels=level) for level in levels}
+    same_bands = dict.fromkeys(levels, 0)
+    dy = {level: [] for level in levels}
+    dx = {level: [] for level in levels}
+
+    def compare(results):
+        measured = {level: band_measurements(lines) for level, lines in results.items()}
+        found_ref, z_ref = measured[0]
+        for level, (found, z) in measured.items():
+            same_bands[level] += int(np.array_equal(found, found_ref))
+            both = found & found_ref
+            dy[level].extend(np.abs(z[both, 1] - z_ref[both, 1]).tolist())
+            dx[level].extend(np.abs(z[both][:, [0, 2]] - z_ref[both][:, [0, 2]]).ravel().tolist())
+
+    frames, times = time_engines(engines, read_frames(path, max_frames), compare, method="detect")
+    if frames == 0:
+        print(f"{path}: no frames read")
+        return
+    print(f"{video_name(path)}: {frames} frames {width}x{height}")
+    for level in levels:
+        error = (f"|dy| mean {np.mean(dy[level]):5.2f} max {np.max(dy[level]):5.1f} px, "
+                 f"|dx| mean {np.mean(dx[level]):5.1f} px" if dy[level] else "no common bands")
+        print(f"  1/{1 << level} scale  {speed(times[level], frames, times[0])}   "
+              f"same bands {same_bands[level]}/{frames}  {error}")
+        if level:
+            print(f"    {engines[level].summary()}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy vs speed of coarse-to-fine pyramid detection.")
+    parser.add_argument("--videos", nargs="*", default=trial_videos())
+    parser.add_argument("--levels", default="0,1,2", help="pyramid levels to compare (0 = full resolution)")
+    parser.add_argument("--frames", type=int, default=0, help="frames per video (0 = whole video)")
+    args = parser.parse_args()
+
+    levels = sorted({0} | {int(level) for level in args.levels.split(",")})
+    for path in args.videos:
+        compare_video(path, levels, args.frames)
+
+if __name__ == "__main__":
+    main()
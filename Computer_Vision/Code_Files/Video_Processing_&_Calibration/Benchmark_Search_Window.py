@@ -0,0 +1,46 @@
+import argparse
+import random
+
+from Benchmark_Common import LineAgreement, read_frames, speed, time_engines, trial_videos, video_name, video_size
+from Sensing_Engine import SensingEngine
+
+# Function to run the full-frame, band-strip and search-window engines over one video and
+# compare their speed and their extended lines (same rng seed, so the scripted x agrees)
+def compare_video(path, max_frames, window_options):
+    width, height = video_size(path)
+    engines = {"full frame": SensingEngine(width, height, rng=random.Random(0)),
+               "band strips": SensingEngine(width, height, rng=random.Random(0), band_strips=True),
+               "search window": SensingEngine(width, height, rng=random.Random(0), search_window=True,
+                                              **window_options)}
+    agreement = LineAgreement(engines)
+
+    def compare(results):
+        for name, lines in results.items():
+            agreement.add(name, lines, results["full frame"])
+
+    frames, times = time_engines(engines, read_frames(path, max_frames), compare)
+    if frames == 0:
+        print(f"{path}: no frames read")
+        return
+    print(f"{video_name(path)}: {frames} frames {width}x{height}")
+    for name, seconds in times.items():
+        print(f"  {name:<14} {speed(seconds, frames, times['full frame'])}   "
+              f"same lines as full frame {agreement.same[name]}/{frames}{agreement.dy_summary(name)}")
+    print(f"  {engines['search window'].summary()}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Speed and agreement of search-window tracking vs full scans.")
+    parser.add_argument("--videos", nargs="*", default=trial_videos())
+    parser.add_argument("--frames", type=int, default=0, help="frames per video (0 = whole video)")
+    parser.add_argument("--window-rows", type=int, default=16)
+    parser.add_argument("--window-margin", type=int, default=40)
+    parser.add_argument("--rescan-interval", type=int, default=30)
+    args = parser.parse_args()
+
+    window_options = {"window_rows": args.window_rows, "window_margin": args.window_margin,
+                      "rescan_interval": args.rescan_interval}
+    for path in args.videos:
+        compare_video(path, args.frames, window_options)
+
+if __name__ == "__main__":
+    main()
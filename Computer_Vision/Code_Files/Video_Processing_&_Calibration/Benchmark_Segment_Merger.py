@@ -0,0 +1,125 @@
+import argparse
+import time
+
+import numpy as np
+
+from Segment_Merger import merge_segments
+
+# The nested-loop merge_lines from Sensing_3.py, kept here as the baseline
+def merge_lines_quadratic(lines, y_threshold=50, x_gap_threshold=200):
+    if lines is None or len(lines) < 1:
+        return None
+    merged_lines = []
+    lines = sorted(lines, key=lambda x: x[0][1])  # Sort by y-coordinate
+    i = 0
+    while i < len(lines):
+        x1, y1, x2, y2 = lines[i][0]
+        current_line = [x1, y1, x2, y2]
+        j = i + 1
+        while j < len(lines):
+            nx1, ny1, nx2, ny2 = lines[j][0]
+            if (abs(y1 - ny1) < y_threshold and abs(y2 - ny2) < y_threshold):
+                min_gap = min(abs(x2 - nx1), abs(x1 - nx2))
+                if min_gap < x_gap_threshold:
+                    current_line[0] = min(x1, nx1, x2, nx2)
+                    current_line[2] = max(x1, nx1, x2, nx2)
+                    current_line[1] = min(y1, ny1)
+                    current_line[3] = max(y2, ny2)
+                else:
+                    # Check midpoint proximity for near-parallel lines
+                    mid_x1 = (x1 + x2) // 2
+                    mid_x2 = (nx1 + nx2) // 2
+                    if abs(mid_x1 - mid_x2) < x_gap_threshold // 2:
+                        current_line[0] = min(x1, nx1, x2, nx2)
+                        current_line[2] = max(x1, nx1, x2, nx2)
+                        current_line[1] = min(y1, ny1)
+                        current_line[3] = max(y2, ny2)
+            j += 1
+        merged_lines.append(current_line)
+        i += 1
+    return np.array([[line] for line in merged_lines], dtype=np.int32)
+
+# Brute-force reference for merge_segments: segments in the same sweep order, each compared
+# with every member of every cluster; it joins (and merges) all clusters whose members are
+# all within y_threshold in mid y and one of which lies within x_gap_threshold in x
+def merge_segments_reference(lines, y_threshold=10, x_gap_threshold=20):
+    segments = [[x2, y2, x1, y1] if x1 > x2 else [x1, y1, x2, y2] for x1, y1, x2, y2 in np.asarray(lines).reshape(-1, 4).tolist()]
+    segments.sort(key=lambda s: ((s[1] + s[3]) / 2, s[0]))
+    clusters = []
+    for s in segments:
+        y = (s[1] + s[3]) / 2
+        touched = [cluster for cluster in clusters
+                   if all(abs(y - (m[1] + m[3]) / 2) < y_threshold for m in cluster)
+                   and any(max(s[0] - m[2], m[0] - s[2]) < x_gap_threshold for m in cluster)]
+        if not touched:
+            clusters.append([s])
+            continue
+        for cluster in touched[1:]:
+            touched[0].extend(cluster)
+            clusters.remove(cluster)
+        touched[0].append(s)
+    return np.array([[[min(m[0] for m in c), round(sum(m[1] for m in c) / len(c)),
+                       max(m[2] for m in c), round(sum(m[3] for m in c) / len(c))]] for c in clusters], dtype=np.int32)
+
+# Function to compare merge_segments with the reference on random inputs; returns the number of mismatches
+def check_reference(trials=200, seed=0):
+    gen = np.random.default_rng(seed)
+    mismatches = 0
+    for _ in range(trials):
+        n = int(gen.integers(1, 80))
+        y_threshold, x_gap_threshold = int(gen.integers(2, 60)), int(gen.integers(1, 200))
+        x1 = gen.integers(0, 1800, n)
+        y1 = gen.integers(0, 300, n)
+        lines = np.stack([x1, y1, x1 + gen.integers(-100, 100, n), y1 + gen.integers(-6, 7, n)], axis=1).reshape(-1, 1, 4)
+        fast = merge_segments(lines, y_threshold, x_gap_threshold).reshape(-1, 4).tolist()
+        slow = merge_segments_reference(lines, y_threshold, x_gap_threshold).reshape(-1, 4).tolist()
+        mismatches += sorted(fast) != sorted(slow)
+    return mismatches
+
+# Function to build n broken near-horizontal cable segments spread over `cables` rows
+def fragmented_cables(n, cables=40, width=1920, height=1080, seed=0):
+    gen = np.random.default_rng(seed)
+    rows = gen.integers(0, height, cables)
+    y = rows[gen.integers(0, cables, n)] + gen.integers(-3, 4, n)
+    x1 = gen.integers(0, width - 60, n)
+    x2 = x1 + gen.integers(10, 60, n)
+    return np.stack([x1, y, x2, y + gen.integers(-2, 3, n)], axis=1).astype(np.int32).reshape(-1, 1, 4)
+
+# Function to time a merge call, repeating short calls for a stable figure
+def time_merge(function, lines, min_seconds=0.2):
+    repeats = 0
+    start = time.perf_counter()
+    while True:
+        function(lines, 10, 20)
+        repeats += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / repeats
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling of the sort-and-sweep merger vs the nested-loop merge_lines.")
+    parser.add_argument("--max-quadratic", type=int, default=2000,
+                        help="largest segment count timed with the nested-loop version")
+    parser.add_argument("--trials", type=int, default=200, help="random inputs checked against the brute-force reference")
+    args = parser.parse_args()
+
+    # Cases the sweep must keep apart: lines 80 px apart with a 50 px threshold, and a stack of
+    # lines 40 px apart (neighbours are within the threshold, but the stack spans far more)
+    apart = merge_segments(np.array([[[0, 0, 100, 0]], [[500, 40, 600, 40]], [[50, 80, 150, 80]]]), 50, 200)
+    stack = merge_segments(np.array([[[0, y, 100, y]] for y in range(0, 1081, 40)]), 50, 200)
+    print(f"3 lines at y 0/40/80, x gaps over 200: {len(apart)} clusters (expected 3); "
+          f"28 lines every 40 px: {len(stack)} clusters (expected 14 pairs)")
+    mismatches = check_reference(args.trials)
+    print(f"brute-force reference: {args.trials - mismatches}/{args.trials} random inputs identical")
+
+
+    print(f"{'segments':>9} {'clusters':>9} {'sweep (ms)':>11} {'us/segment':>11} {'nested (ms)':>12}")
+    for n in (100, 300, 1000, 3000, 10000, 30000):
+        lines = fragmented_cables(n)
+        sweep = time_merge(merge_segments, lines)
+        clusters = len(merge_segments(lines, 10, 20))
+        nested = f"{time_merge(merge_lines_quadratic, lines, 0) * 1000:12.1f}" if n <= args.max_quadratic else f"{'-':>12}"
+        print(f"{n:>9} {clusters:>9} {sweep * 1000:>11.3f} {sweep / n * 1e6:>11.3f} {nested}")
+
+if __name__ == "__main__":
+    main()
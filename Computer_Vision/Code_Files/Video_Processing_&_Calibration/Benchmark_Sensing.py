@@ -0,0 +1,305 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+try:
+    import resource  # Unix only; the peak RSS is left out of the report without it
+except ImportError:
+    resource = None
+
+from Benchmark_Common import CV_ROOT, trial_images, video_name
+import Sensing_1
+import Sensing_2
+import Sensing_3
+import Sensing_4
+import Sensing_5
+from Sensing_Engine import SensingEngine
+
+FORMAT_VERSION = 1
+
+# Function to turn a variant's lines (None, list of [[x1, y1, x2, y2]] or (N, 1, 4) array) into (N, 4)
+def as_rows(lines):
+    if lines is None or len(lines) == 0:
+        return np.empty((0, 4), dtype=np.int32)
+    return np.asarray(lines, dtype=np.int32).reshape(-1, 4)
+
+# Each variant is a factory (width, height, seed) -> process(frame, frame_idx) returning the lines
+# the script would draw for that frame; state such as prev_lines lives in the closure.
+def sensing_1(width, height, seed):
+    return lambda frame, frame_idx: as_rows(Sensing_1.select_lines(as_rows(Sensing_1.detect_frame(frame))[:, None]))
+
+def sensing_2(width, height, seed):
+    roi_top, roi_bottom = Sensing_2.roi_rows(height)
+
+    def process(frame, frame_idx):
+        lines = Sensing_2.detect_frame(frame, roi_top, roi_bottom)
+        return as_rows(None if lines is None else Sensing_2.select_lines(lines, roi_top, roi_bottom))
+    return process
+
+def sensing_3(width, height, seed):
+    roi = Sensing_3.output_roi(width, height)
+
+    def process(frame, frame_idx):
+        lines = Sensing_3.detect_frame(frame, roi[0], roi[1])
+        return as_rows(None if lines is None else Sensing_3.select_lines(lines, roi))
+    return process
+
+def sensing_4(width, height, seed):
+    roi = Sensing_4.output_roi(width, height)
+    random.seed(seed)  # Sensing_4.extend_lines draws the middle band motion from the global generator
+    state = {"prev": None}
+
+    def process(frame, frame_idx):
+        lines = Sensing_4.extend_lines(Sensing_4.detect_frame(frame, roi[0], roi[1]), width, height,
+                                       frame_idx, state["prev"])
+        state["prev"] = lines
+        return as_rows(None if lines is None else Sensing_4.select_lines(lines, roi))
+    return process
+
+def sensing_5(width, height, seed):
+    roi = Sensing_5.output_roi(width, height)
+    rng = random.Random(seed)
+    state = {"prev": None}
+
+    def process(frame, frame_idx):
+        lines = Sensing_5.extend_lines(Sensing_5.detect_frame(frame)[3], width, height, frame_idx, state["prev"],
+                                       rng=rng)
+        state["prev"] = lines
+        return as_rows(None if lines is None else Sensing_5.select_lines(lines, roi))
+    return process
+
+# Function to make a factory for the preallocated engine with the given options
+def engine(**options):
+    def factory(width, height, seed):
+        instance = SensingEngine(width, height, rng=random.Random(seed), **options)
+
+        def process(frame, frame_idx):
+            lines = instance.process(frame)
+            return as_rows(None if lines is None else Sensing_5.select_lines(lines, instance.roi))
+        return process
+    return factory
+
+VARIANTS = {
+    "Sensing_1": sensing_1,
+    "Sensing_2": sensing_2,
+    "Sensing_3": sensing_3,
+    "Sensing_4": sensing_4,
+    "Sensing_5": sensing_5,
+    "engine": engine(),
+    "engine_strips": engine(band_strips=True),
+    "engine_profile": engine(detector="profile"),
+    "engine_pyramid": engine(pyramid_levels=2),
+}
+
+# Function to get the ground-truth marks of a synthetic frame as (x_left, y, x_right) per band.
+# The middle band follows the move / return / pause schedule scripted in extend_lines,
+# stretched over the video length; all bands wobble slightly in y.
+def synthetic_truth(frame_idx, frames, width, height):
+    t = frame_idx * 260 / frames
+    shift = 0.0
+    if 80 <= t < 110:
+        shift = 145 * (t - 80) / 30
+    elif 110 <= t < 140:
+        shift = 145 * (140 - t) / 30
+    elif 170 <= t < 200:
+        shift = 160 * (t - 170) / 30
+    elif 200 <= t < 230:
+        shift = 160 * (230 - t) / 30
+    scale_x, scale_y = width / 1920, height / 1080
+    truth = np.empty((len(Sensing_5.Y_BANDS), 3))
+    for band, band_y in enumerate(Sensing_5.Y_BANDS):
+        left = 530 + (shift if band == 1 else 0)
+        truth[band] = (left * scale_x, (band_y + 2 * np.sin(frame_idx / 15 + band)) * scale_y, (left + 600) * scale_x)
+    return truth
+
+# Function to yield the frames of a synthetic video (dark cable marks on a lit, noisy background,
+# like the recordings) together with their ground truth
+def synthetic_video(frames, width, height, seed):
+    rng = np.random.default_rng(seed)
+    background = (185 + 20 * np.linspace(-1, 1, width)[None, :] * np.linspace(1, -1, height)[:, None])
+    noise_bank = [rng.normal(0, 3, (height, width)).astype(np.float32) for _ in range(4)]
+    thickness = max(2, int(round(8 * height / 1080)))
+    for frame_idx in range(frames):
+        truth = synthetic_truth(frame_idx, frames, width, height)
+        gray = background + noise_bank[frame_idx % len(noise_bank)]
+        for x_left, y, x_right in truth:
+            # Anti-aliased line drawn on a sub-pixel grid (shift=4) so y moves smoothly
+            canvas = np.zeros((height, width), dtype=np.uint8)
+            cv2.line(canvas, (int(x_left * 16), int(y * 16)), (int(x_right * 16), int(y * 16)), 255,
+                     thickness, cv2.LINE_AA, shift=4)
+            gray -= canvas.astype(np.float32) * (145 / 255)
+        frame = cv2.cvtColor(np.clip(gray, 0, 255).astype(np.uint8), cv2.COLOR_GRAY2BGR)
+        yield frame, truth
+
+# Function to score one frame's lines against the truth: each true band takes the line with the
+# nearest midpoint y within tolerance; the other lines are false positives
+def score_frame(rows, truth, tolerance, errors):
+    errors["truth"] += len(truth)
+    unmatched = np.ones(len(rows), dtype=bool)
+    y_mids = (rows[:, 1] + rows[:, 3]) / 2
+    for x_left, y, x_right in truth:
+        distance = np.where(unmatched, np.abs(y_mids - y), np.inf)
+        if len(rows) == 0 or distance.min() >= tolerance:
+            continue
+        best = int(np.argmin(distance))
+        unmatched[best] = False
+        errors["dy"].append(float(distance[best]))
+        errors["dx"].append(float(abs(min(rows[best, 0], rows[best, 2]) - x_left)))
+        errors["dx"].append(float(abs(max(rows[best, 0], rows[best, 2]) - x_right)))
+    errors["false_positives"] += int(unmatched.sum())
+
+# Function to summarise per-frame latencies (seconds) as fps and percentiles in milliseconds
+def latency_summary(latencies):
+    latencies = np.asarray(latencies) * 1000
+    return {"frames": len(latencies), "fps": round(1000 * len(latencies) / latencies.sum(), 2),
+            "latency_ms": {"mean": round(float(latencies.mean()), 3),
+                           **{f"p{q}": round(float(np.percentile(latencies, q)), 3) for q in (50, 95, 99)},
+                           "max": round(float(latencies.max()), 3)}}
+
+# Function to measure the Python/numpy heap peak of a variant over a few frames (tracemalloc
+# sees numpy and OpenCV output arrays, not OpenCV's internal scratch buffers)
+def peak_memory(factory, frames, width, height, seed):
+    tracemalloc.start()
+    try:
+        process = factory(width, height, seed)
+        tracemalloc.reset_peak()
+        for frame_idx, frame in enumerate(frames):
+            process(frame, frame_idx)
+        return round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+    finally:
+        tracemalloc.stop()
+
+# Function to benchmark the variants on one synthetic video; each frame is generated once and
+# passed to every variant, so generation time is not measured
+def run_synthetic(name, variants, frames, width, height, seed, tolerance, memory_frames):
+    processes = {variant: VARIANTS[variant](width, height, seed) for variant in variants}
+    latencies = {variant: [] for variant in variants}
+    errors = {variant: {"truth": 0, "false_positives": 0, "dy": [], "dx": []} for variant in variants}
+    kept = []
+    for frame_idx, (frame, truth) in enumerate(synthetic_video(frames, width, height, seed)):
+        if frame_idx < memory_frames:
+            kept.append(frame)
+        for variant, process in processes.items():
+            start = time.perf_counter()
+            rows = process(frame, frame_idx)
+            latencies[variant].append(time.perf_counter() - start)
+            score_frame(rows, truth, tolerance, errors[variant])
+    results = []
+    for variant in variants:
+        e = errors[variant]
+        accuracy = {"recall": round(len(e["dy"]) / e["truth"], 4),
+                    "false_positives_per_frame": round(e["false_positives"] / frames, 3)}
+        if e["dy"]:
+            accuracy.update({"dy_mean_px": round(float(np.mean(e["dy"])), 3),
+                             "dy_p95_px": round(float(np.percentile(e["dy"], 95)), 3),
+                             "dx_mean_px": round(float(np.mean(e["dx"])), 3),
+                             "dx_p95_px": round(float(np.percentile(e["dx"], 95)), 3)})
+        results.append({"variant": variant, "input": name, "kind": "synthetic", **latency_summary(latencies[variant]),
+                        "peak_memory_mb": peak_memory(VARIANTS[variant], kept, width, height, seed),
+                        "accuracy": accuracy})
+    return results
+
+# Function to benchmark the variants on one still image (no ground truth: line count only)
+def run_image(path, variants, repeats, seed):
+    image = cv2.imread(path)
+    height, width = image.shape[:2]
+    name = video_name(path)
+    results = []
+    for variant in variants:
+        latencies = []
+        for _ in range(repeats):
+            # A fresh instance per repeat: each repeat is a first frame, like a single image
+            process = VARIANTS[variant](width, height, seed)
+            start = time.perf_counter()
+            rows = process(image, 0)
+            latencies.append(time.perf_counter() - start)
+        results.append({"variant": variant, "input": name, "kind": "image", **latency_summary(latencies),
+                        "peak_memory_mb": peak_memory(VARIANTS[variant], [image], width, height, seed),
+                        "lines": len(rows)})
+    return results
+
+# Function to describe the run so results from different commits and machines can be told apart
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=CV_ROOT, capture_output=True,
+                                text=True, timeout=30).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "numpy": np.__version__,
+            "opencv": cv2.__version__, "platform": platform.platform(), "cpus": os.cpu_count(),
+            "opencv_threads": cv2.getNumThreads()}
+
+# Function to print a results table, with the change against a baseline run when given
+def print_results(results, baseline=None):
+    previous = {(r["variant"], r["input"]): r for r in (baseline or {}).get("results", [])}
+    print(f"{'variant':<15}{'input':<34}{'fps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'mem MB':>8}"
+          f"{'recall':>8}{'dy px':>7}{'dx px':>7}{'FP/fr':>7}")
+    for r in results:
+        a = r.get("accuracy", {})
+        line = (f"{r['variant']:<15}{r['input'][-33:]:<34}{r['fps']:8.1f}{r['latency_ms']['p50']:9.2f}"
+                f"{r['latency_ms']['p95']:9.2f}{r['latency_ms']['p99']:9.2f}{r['peak_memory_mb']:8.1f}")
+        if a:
+            line += (f"{a['recall']:8.2f}{a.get('dy_mean_px', float('nan')):7.2f}{a.get('dx_mean_px', float('nan')):7.1f}"
+                     f"{a['false_positives_per_frame']:7.2f}")
+        else:
+            line += f"{'':>8}{'':>7}{'':>7}{'':>7}  {r['lines']} lines"
+        old = previous.get((r["variant"], r["input"]))
+        if old:
+            line += f"   vs baseline: fps {r['fps'] / old['fps']:.2f}x, p95 {r['latency_ms']['p95'] - old['latency_ms']['p95']:+.2f} ms"
+            if a and "accuracy" in old:
+                line += f", recall {a['recall'] - old['accuracy']['recall']:+.3f}"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmark of the Sensing_1..Sensing_5 detection variants.")
+    parser.add_argument("--variants", default=",".join(VARIANTS), help=f"comma list of {', '.join(VARIANTS)}")
+    parser.add_argument("--synthetic", type=int, default=2, help="number of synthetic ground-truth videos")
+    parser.add_argument("--frames", type=int, default=120, help="frames per synthetic video")
+    parser.add_argument("--size", default="1920x1080", help="synthetic frame size (the band positions assume 1080p)")
+    parser.add_argument("--images", nargs="*", default=trial_images())
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per image")
+    parser.add_argument("--memory-frames", type=int, default=5, help="frames used for the peak memory pass")
+    parser.add_argument("--tolerance", type=float, default=20.0, help="max |dy| (px) for a line to match a true mark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", metavar="JSON", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    variants = [v.strip() for v in args.variants.split(",") if v.strip()]
+    unknown = [v for v in variants if v not in VARIANTS]
+    if unknown:
+        parser.error(f"unknown variants: {', '.join(unknown)}")
+    width, height = (int(v) for v in args.size.lower().split("x"))
+
+    results = []
+    for i in range(args.synthetic):
+        name = f"synthetic_{i}_{width}x{height}_{args.frames}f_seed{args.seed + i}"
+        results.extend(run_synthetic(name, variants, args.frames, width, height, args.seed + i,
+                                     args.tolerance, args.memory_frames))
+    for path in args.images:
+        results.extend(run_image(path, variants, args.repeats, args.seed))
+
+    report = {"format_version": FORMAT_VERSION, "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "environment": environment(), "settings": vars(args), "results": results}
+    if resource is not None:
+        report["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
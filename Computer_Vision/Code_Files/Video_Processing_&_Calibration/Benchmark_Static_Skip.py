@@ -0,0 +1,93 @@
+import argparse
+import random
+
+import cv2
+import numpy as np
+
+from Benchmark_Common import LineAgreement, read_frames, speed, time_engines, trial_videos, video_name
+from Sensing_5 import Y_BANDS
+from Sensing_Engine import SensingEngine
+
+# Function to read a video's frames, optionally turning frame ranges into stationary phases:
+# the first frame of each range is held for the whole range with fresh sensor noise per frame
+# (the trial videos are rendered outputs, so they have few truly static stretches of their own)
+def load_frames(path, max_frames, holds, noise, seed):
+    rng = np.random.default_rng(seed)
+    frames = list(read_frames(path, max_frames))
+    for start, end in holds:
+        for i in range(start + 1, min(end, len(frames))):
+            held = frames[start].astype(np.int16)
+            if noise:
+                held += rng.normal(0, noise, held.shape).round().astype(np.int16)
+            frames[i] = np.clip(held, 0, 255).astype(np.uint8)
+    return frames
+
+# Function to build frames where nothing is ever static: a 1 px dark mark of the given contrast
+# in each band whose ends move `speed` px per frame, on a textured background with sensor noise.
+# The marks move every frame, so nothing may be reused.
+def moving_marks(frames, width, height, contrast, speed, noise, seed):
+    rng = np.random.default_rng(seed)
+    background = rng.integers(130, 170, (height, width)).astype(np.int16)
+    background = cv2.GaussianBlur(background.astype(np.float32), (0, 0), 3).astype(np.int16)
+    moving = []
+    for frame_idx in range(frames):
+        gray = background.copy()
+        x_left = int(width * 0.25 + speed * frame_idx)
+        for y in Y_BANDS:
+            gray[y, x_left:x_left + width // 3] -= contrast
+        if noise:
+            gray += rng.normal(0, noise, gray.shape).round().astype(np.int16)
+        moving.append(cv2.cvtColor(np.clip(gray, 0, 255).astype(np.uint8), cv2.COLOR_GRAY2BGR))
+    return moving
+
+# Function to time the detection chain with and without the static short-circuit and check
+# that the extended lines are the same frame for frame; returns whether every frame matched
+def compare(name, frames, engine_options):
+    height, width = frames[0].shape[:2]
+    engines = {"every frame": SensingEngine(width, height, rng=random.Random(0), **engine_options),
+               "skip static": SensingEngine(width, height, rng=random.Random(0), skip_static=True,
+                                            **engine_options)}
+    agreement = LineAgreement(["skip static"])
+    n, times = time_engines(engines, frames,
+                            lambda results: agreement.add("skip static", results["skip static"], results["every frame"]))
+    print(f"{name}: {n} frames {width}x{height}")
+    for label, seconds in times.items():
+        print(f"  {label:<12} {speed(seconds, n, times['every frame'])}")
+    print(f"  {engines['skip static'].summary()}")
+    same = agreement.same["skip static"]
+    print(f"  Same lines: {same}/{n} frames{agreement.dy_summary('skip static')}")
+    if same < n:
+        print(f"  WARNING: skipping changed the lines of {n - same} frames (results DIFFER)")
+    return same == n
+
+def main():
+    parser = argparse.ArgumentParser(description="Speed and output agreement of the static-frame short-circuit.")
+    parser.add_argument("--videos", nargs="*", default=trial_videos())
+    parser.add_argument("--frames", type=int, default=0, help="frames per video (0 = whole video)")
+    parser.add_argument("--holds", default="50-80,140-170",
+                        help="frame ranges to make stationary (the pauses scripted in extend_lines); '' = none")
+    parser.add_argument("--noise", type=float, default=2.0, help="sensor noise on held frames (gray levels)")
+    parser.add_argument("--band-strips", action="store_true")
+    parser.add_argument("--detector", choices=("hough", "profile"), default="hough")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--moving-frames", type=int, default=40,
+                        help="frames of slowly moving thin marks that must never be skipped (0 = skip the check)")
+    parser.add_argument("--moving-contrast", type=int, default=60, help="contrast of the moving marks (gray levels)")
+    args = parser.parse_args()
+
+    engine_options = {"band_strips": args.band_strips, "detector": args.detector}
+    matched = True
+    if args.moving_frames:
+        frames = moving_marks(args.moving_frames, 1920, 1080, args.moving_contrast, 1, args.noise, args.seed)
+        matched &= compare(f"1 px marks, contrast {args.moving_contrast}, moving 1 px/frame", frames, engine_options)
+
+    holds = [tuple(int(v) for v in span.split("-")) for span in args.holds.split(",") if span]
+    for path in args.videos:
+        frames = load_frames(path, args.frames, holds, args.noise, args.seed)
+        if frames:
+            matched &= compare(video_name(path), frames, engine_options)
+    if not matched:
+        raise SystemExit("Skipping changed the output of some frames")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import argparse
+import datetime
+import json
+import math
+import time
+
+import numpy as np
+
+CALIBRATION_FORMAT = "cable-displacement-calibration"
+CALIBRATION_VERSION = 1
+MODELS = ("linear", "quadratic", "sine")
+
+# Function to write the fitted displacement (px) -> angle (deg) models as a versioned JSON artifact.
+# domain is the displacement range covered by the calibration data.
+def save_calibration(path, linear_coeffs, quad_coeffs, sine_A, displacements, rmse=None,
+                     selected_model="quadratic", source=None):
+    artifact = {
+        "format": CALIBRATION_FORMAT,
+        "version": CALIBRATION_VERSION,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "source": source,
+        "selected_model": selected_model,
+        "domain": {"min": float(np.min(np.abs(displacements))), "max": float(np.max(np.abs(displacements)))},
+        "models": {
+            "linear": {"coefficients": [float(c) for c in linear_coeffs]},
+            "quadratic": {"coefficients": [float(c) for c in quad_coeffs]},
+            "sine": {"A": float(sine_A)},
+        },
+        "rmse": {name: float(value) for name, value in (rmse or {}).items()},
+    }
+    with open(path, "w") as f:
+        json.dump(artifact, f, indent=2)
+    return artifact
+
+# Function to read a calibration artifact, rejecting other formats or versions
+def load_calibration(path):
+    with open(path) as f:
+        artifact = json.load(f)
+    if artifact.get("format") != CALIBRATION_FORMAT:
+        raise ValueError(f"{path} is not a calibration artifact")
+    if artifact.get("version") != CALIBRATION_VERSION:
+        raise ValueError(f"{path} has calibration version {artifact.get('version')}, "
+                         f"expected {CALIBRATION_VERSION}")
+    return artifact
+
+# Function to evaluate a model exactly (used to build the table and as the reference)
+def model_angle(artifact, model, displacement):
+    d = np.asarray(displacement, dtype=np.float64)
+    params = artifact["models"][model]
+    if model == "sine":
+        return 2 * np.arcsin(d / params["A"]) * 180 / np.pi
+    return np.polyval(params["coefficients"], d)
+
+# Class turning a displacement magnitude into a bend angle through a dense precomputed table.
+# The table spans 0..d_max, where d_max is the sine amplitude A (arcsin is undefined beyond
+# it) or the calibrated domain maximum for the polynomial models; angle() interpolates
+# linearly between entries with plain float arithmetic, so there is no np.arcsin per sample.
+# The calibration was fitted on displacement magnitudes: the sign of d is carried over.
+# Displacements beyond d_max follow out_of_domain:
+#   'nan'   -> return nan (default; the frame has no valid estimate)
+#   'clip'  -> return the angle at d_max
+#   'error' -> raise ValueError
+class AngleLookup:
+    def __init__(self, artifact, model=None, points=16384, out_of_domain="nan"):
+        if out_of_domain not in ("nan", "clip", "error"):
+            raise ValueError(f"out_of_domain must be 'nan', 'clip' or 'error', not {out_of_domain!r}")
+        self.model = model or artifact["selected_model"]
+        if self.model not in MODELS:
+            raise ValueError(f"Unknown calibration model {self.model!r}")
+        self.out_of_domain = out_of_domain
+        if self.model == "sine":
+            self.d_max = float(artifact["models"]["sine"]["A"])
+        else:
+            self.d_max = float(artifact["domain"]["max"])
+        grid = np.linspace(0.0, self.d_max, points)
+        self.table = model_angle(artifact, self.model, grid).tolist()
+        self.scale = (points - 1) / self.d_max
+        self.last = points - 1
+
+    # Function to look up one displacement (pixels) -> angle (degrees)
+    def angle(self, d):
+        magnitude = -d if d < 0 else d
+        if magnitude > self.d_max:
+            if self.out_of_domain == "nan":
+                return math.nan
+            if self.out_of_domain == "error":
+                raise ValueError(f"Displacement {d} px is outside the calibrated range 0..{self.d_max:.2f} px")
+            magnitude = self.d_max
+        pos = magnitude * self.scale
+        i = int(pos)
+        if i >= self.last:
+            value = self.table[self.last]
+        else:
+            low = self.table[i]
+            value = low + (pos - i) * (self.table[i + 1] - low)
+        return -value if d < 0 else value
+
+    # Function to look up many displacements at once
+    def angles(self, displacements):
+        d = np.asarray(displacements, dtype=np.float64)
+        magnitude = np.abs(d)
+        outside = magnitude > self.d_max
+        if outside.any() and self.out_of_domain == "error":
+            raise ValueError(f"{int(outside.sum())} displacements are outside the calibrated range")
+        grid = np.linspace(0.0, self.d_max, self.last + 1)
+        values = np.interp(np.minimum(magnitude, self.d_max), grid, self.table)
+        values = np.where(d < 0, -values, values)
+        if self.out_of_domain == "nan":
+            values[outside] = np.nan
+        return values
+
+# Class following the middle cable band across frames and converting its displacement from
+# the first frame it was seen in into a bend angle
+class BendAngleEstimator:
+    def __init__(self, lookup, band_y=540, y_tolerance=15):
+        self.lookup = lookup
+        self.band_y = band_y
+        self.y_tolerance = y_tolerance
+        self.reference_x = None
+        self.angle = math.nan
+        self.displacement = None
+
+    # Function to update from one frame's extended lines; nan when the band is missing
+    def update(self, lines):
+        self.angle = math.nan
+        self.displacement = None
+        if lines is None:
+            return self.angle
+        for line in lines:
+            x1, y1, x2, y2 = line[0]
+            if abs((y1 + y2) // 2 - self.band_y) < self.y_tolerance:
+                if self.reference_x is None:
+                    self.reference_x = int(x1)
+                self.displacement = int(x1) - self.reference_x
+                self.angle = self.lookup.angle(self.displacement)
+                break
+        return self.angle
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and time the calibration lookup table.")
+    parser.add_argument("calibration", help="calibration artifact written by Correlation_Performance_2.py")
+    parser.add_argument("--model", choices=MODELS)
+    parser.add_argument("--samples", type=int, default=200000)
+    args = parser.parse_args()
+
+    artifact = load_calibration(args.calibration)
+    lookup = AngleLookup(artifact, args.model, out_of_domain="clip")
+    print(f"Model {lookup.model}, table 0..{lookup.d_max:.2f} px, {lookup.last + 1} entries")
+
+    d = np.random.default_rng(0).uniform(0, lookup.d_max, args.samples)
+    exact = model_angle(artifact, lookup.model, d)
+    approx = lookup.angles(d)
+    print(f"Max table error vs exact model: {np.max(np.abs(exact - approx)):.5f} deg")
+
+    samples = d.tolist()
+    start = time.perf_counter()
+    for value in samples:
+        lookup.angle(value)
+    table_ns = (time.perf_counter() - start) / len(samples) * 1e9
+    A = artifact["models"]["sine"]["A"]
+    start = time.perf_counter()
+    for value in samples:
+        2 * np.arcsin(value / A) * 180 / np.pi
+    arcsin_ns = (time.perf_counter() - start) / len(samples) * 1e9
+    print(f"Per-sample cost: table {table_ns:.0f} ns, np.arcsin {arcsin_ns:.0f} ns")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+import argparse
+import csv
+import glob
+import math
+import os
+import time
+
+import numpy as np
+
+# Columns every trial file must have: one observation per row, displacement in pixels and
+# angle in degrees. An optional 'trial' column splits one file into several trials.
+TRIAL_COLUMNS = ("displacement", "angle")
+
+DEGREES_PER_RADIAN = 180 / np.pi
+
+# Function to name the model of a polynomial degree the way Calibration.py does
+def poly_name(degree):
+    return {1: "linear", 2: "quadratic"}.get(degree, f"poly{degree}")
+
+# Function to read one trial CSV into {trial name: (displacements, angles)}
+def read_trial_file(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    trials = {}
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        missing = [column for column in TRIAL_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"{path} has no {', '.join(missing)} column")
+        for row in reader:
+            key = f"{name}:{row['trial']}" if row.get("trial") else name
+            displacements, angles = trials.setdefault(key, ([], []))
+            displacements.append(float(row["displacement"]))
+            angles.append(float(row["angle"]))
+    return trials
+
+# Function to read trial files; a directory contributes every *.csv inside it
+def load_trials(paths):
+    trials = {}
+    for path in paths:
+        files = sorted(glob.glob(os.path.join(path, "*.csv"))) if os.path.isdir(path) else [path]
+        for file in files:
+            trials.update(read_trial_file(file))
+    return trials
+
+# Function to generate trials shaped like the Correlation_Performance_2.py data:
+# d = A * sin(theta / 2) + noise, with A and the number of repeats per angle varying per trial
+def synthetic_trials(count, seed=0, angles=(30, 45, 90, 120, 135), noise=0.7):
+    rng = np.random.default_rng(seed)
+    trials = {}
+    for i in range(count):
+        A = rng.uniform(42, 50)
+        theta = np.repeat(angles, rng.integers(3, 7, len(angles)))
+        d = A * np.sin(np.radians(theta) / 2) + rng.normal(0, noise, len(theta))
+        trials[f"synthetic_{i:05d}"] = (d, theta.astype(float))
+    return trials
+
+# Function to pack trials of different lengths into padded (trials, points) arrays.
+# W is 1 for real observations and 0 for padding, so every fit below is a weighted fit.
+# Displacement magnitudes are used, as in Correlation_Performance_2.py.
+def pack_trials(trials):
+    names = list(trials)
+    length = max(len(d) for d, _ in trials.values())
+    D = np.zeros((len(names), length))
+    Y = np.zeros((len(names), length))
+    W = np.zeros((len(names), length))
+    for i, name in enumerate(names):
+        d, angles = trials[name]
+        D[i, :len(d)] = np.abs(d)
+        Y[i, :len(angles)] = angles
+        W[i, :len(d)] = 1
+    return names, D, Y, W
+
+# Function to split every trial's points into k folds at random (seeded).
+# Returns train and test weights of shape (trials, k, points).
+def fold_weights(W, k, seed=0):
+    keys = np.random.default_rng(seed).random(W.shape)
+    keys[W == 0] = np.inf
+    rank = np.argsort(np.argsort(keys, axis=-1), axis=-1)
+    valid = W[:, None, :] > 0
+    test = valid & (rank[:, None, :] % k == np.arange(k)[None, :, None])
+    return (valid & ~test).astype(float), test.astype(float)
+
+# Function to centre and scale displacements per fit so high degrees stay well conditioned
+def _scaling(D, W):
+    count = np.maximum(W.sum(-1, keepdims=True), 1)
+    mu = (D * W).sum(-1, keepdims=True) / count
+    s = np.max(np.abs(D - mu) * W, axis=-1, keepdims=True)
+    s[s == 0] = 1
+    return mu, s
+
+# Function to build the (..., points, degree + 1) design matrix, highest power first like
+# np.polyfit, by repeated multiplication (much cheaper than np.power on the whole batch)
+def _vander(D, mu, s, degree):
+    x = (D - mu) / s
+    columns = [np.ones_like(x)]
+    for _ in range(degree):
+        columns.append(columns[-1] * x)
+    return np.stack(columns[::-1], axis=-1)
+
+# Function to count the distinct displacements of each weighted dataset (zero-weight points
+# are left out)
+def distinct_displacements(D, W):
+    d = np.sort(np.where(W > 0, D, np.nan), axis=-1)
+    return (~np.isnan(d[..., :1])).sum(-1) + (np.diff(d, axis=-1) > 0).sum(-1)
+
+# Function to fit one polynomial degree to a whole batch of weighted datasets at once.
+# The leading axes of D, Y and W are batch axes; each dataset is solved by its own
+# pseudo-inverse in one stacked np.linalg.pinv call. Datasets with no more distinct
+# displacements than the degree get nan: their fit is not unique (np.polyfit's RankWarning),
+# and pinv would return one of infinitely many exact fits with a zero residual.
+def fit_polynomial(D, Y, W, degree):
+    mu, s = _scaling(D, W)
+    X = _vander(D, mu, s, degree) * W[..., None]
+    coeffs = np.einsum("...pn,...n->...p", np.linalg.pinv(X), Y * W)
+    coeffs[distinct_displacements(D, W) <= degree] = np.nan
+    return coeffs, mu, s
+
+def predict_polynomial(D, coeffs, mu, s):
+    return np.einsum("...np,...p->...n", _vander(D, mu, s, coeffs.shape[-1] - 1), coeffs)
+
+# Function to turn scaled coefficients back into np.polyfit/np.polyval order in raw pixels
+def unscale_coefficients(coeffs, mu, s):
+    c = coeffs[..., ::-1]
+    shift = -mu[..., 0]
+    s = s[..., 0]
+    raw = np.zeros_like(c)
+    for k in range(c.shape[-1]):
+        for j in range(k + 1):
+            raw[..., j] += c[..., k] * math.comb(k, j) * shift ** (k - j) / s ** k
+    return raw[..., ::-1]
+
+def arcsine_angle(D, A):
+    return 2 * np.arcsin(np.clip(D / A[..., None], -1, 1)) * DEGREES_PER_RADIAN
+
+def _rss(D, Y, W, A):
+    return (((Y - arcsine_angle(D, A)) ** 2) * W).sum(-1)
+
+# Function to fit angle = 2 * arcsin(d / A) (the Correlation_Performance sine model) to a batch.
+# Every dataset starts from the closed-form least-squares A of the forward model
+# d = A * sin(theta / 2), raised above the largest displacement so arcsin is defined, and
+# is refined by Gauss-Newton steps that are halved wherever they would increase the error,
+# until every dataset's step is below tolerance (relative to A) or no longer helps.
+def fit_arcsine(D, Y, W, iterations=30, tolerance=1e-9):
+    s = np.sin(np.radians(Y) / 2)
+    A = (W * s * D).sum(-1) / np.maximum((W * s * s).sum(-1), 1e-12)
+    floor = np.maximum(np.max(D * W, axis=-1), 1e-9) * (1 + 1e-6)
+    A = np.maximum(A, floor * 1.01)
+    rss = _rss(D, Y, W, A)
+    active = np.ones(A.shape, dtype=bool)
+    for _ in range(iterations):
+        # Held-out (zero-weight) points may lie beyond A; clip so they stay finite
+        u = np.minimum(D / A[..., None], 1)
+        residual = (Y - 2 * np.arcsin(u) * DEGREES_PER_RADIAN) * W
+        J = -2 * DEGREES_PER_RADIAN * u / (A[..., None] * np.sqrt(np.maximum(1 - u * u, 1e-12))) * W
+        step = (J * residual).sum(-1) / np.maximum((J * J).sum(-1), 1e-300)
+        step = np.maximum(A + step, floor) - A
+        active &= np.abs(step) > tolerance * A
+        if not active.any():
+            break
+        for _ in range(8):
+            candidate = A + step
+            candidate_rss = _rss(D, Y, W, candidate)
+            worse = (candidate_rss > rss) & active
+            if not worse.any():
+                break
+            step = np.where(worse, step / 2, step)
+        # A dataset whose halved step still cannot lower the error is at its minimum
+        better = (candidate_rss <= rss) & active
+        active &= better
+        A = np.where(better, candidate, A)
+        rss = np.where(better, candidate_rss, rss)
+    A[W.sum(-1) < 1] = np.nan
+    return A
+
+# Function to compute AIC and BIC from the residual sum of squares (Gaussian errors); a
+# rank-deficient polynomial fit arrives as nan rss and scores nan
+def information_criteria(rss, n, k):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fit_term = n * np.log(np.maximum(rss, 1e-12) / n)
+        aic = np.where(n > k, fit_term + 2 * k, np.nan)
+        bic = np.where(n > k, fit_term + k * np.log(n), np.nan)
+    return aic, bic
+
+# Function to fit every model to every trial and score it.
+# Models are polynomials of degree 1..max_degree and the arcsine model, all predicting angle
+# from displacement. Returns {model: {"params", "rmse", "aic", "bic", "cv_rmse"}} with one
+# entry per trial in each array; cv_rmse is the k-fold cross-validated RMSE.
+def fit_trials(D, Y, W, max_degree=3, folds=5, seed=0):
+    n = W.sum(-1)
+    train, test = fold_weights(W, folds, seed)
+    D_folds = np.broadcast_to(D[:, None, :], train.shape)
+    Y_folds = np.broadcast_to(Y[:, None, :], train.shape)
+
+    def scores(pred, cv_pred, k, params):
+        rss = (((Y - pred) ** 2) * W).sum(-1)
+        cv_sse = (((Y_folds - cv_pred) ** 2) * test).sum((-1, -2))
+        aic, bic = information_criteria(rss, n, k)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return {"params": params, "rmse": np.sqrt(rss / n), "aic": aic, "bic": bic,
+                    "cv_rmse": np.sqrt(cv_sse / n)}
+
+    results = {}
+    for degree in range(1, max_degree + 1):
+        coeffs, mu, s = fit_polynomial(D, Y, W, degree)
+        cv_coeffs, cv_mu, cv_s = fit_polynomial(D_folds, Y_folds, train, degree)
+        results[poly_name(degree)] = scores(predict_polynomial(D, coeffs, mu, s),
+                                            predict_polynomial(D_folds, cv_coeffs, cv_mu, cv_s),
+                                            degree + 1, unscale_coefficients(coeffs, mu, s))
+    A = fit_arcsine(D, Y, W)
+    cv_A = fit_arcsine(D_folds, Y_folds, train)
+    results["sine"] = scores(arcsine_angle(D, A), arcsine_angle(D_folds, cv_A), 1, A[:, None])
+    return results
+
+# Function to pick the best model of each trial by a score ("cv_rmse", "aic", "bic" or "rmse")
+def select_models(results, criterion="cv_rmse"):
+    names = list(results)
+    table = np.stack([results[name][criterion] for name in names])
+    table = np.where(np.isnan(table), np.inf, table)
+    return [names[i] for i in np.argmin(table, axis=0)]
+
+# Function to write one row per trial and model
+def write_results(path, trial_names, results, best):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["trial", "model", "rmse", "aic", "bic", "cv_rmse", "best", "params"])
+        for i, trial in enumerate(trial_names):
+            for model, scores in results.items():
+                writer.writerow([trial, model] +
+                                [f"{scores[key][i]:.6g}" for key in ("rmse", "aic", "bic", "cv_rmse")] +
+                                [int(best[i] == model), " ".join(f"{p:.9g}" for p in scores["params"][i])])
+
+# Function to print a per-model summary over all trials
+def print_summary(results, best, criterion):
+    print(f"{'model':<10} {'fitted':>7} {'RMSE':>8} {'AIC':>9} {'BIC':>9} {'CV RMSE':>9} {'best':>6}"
+          f"   (medians in degrees; best by {criterion})")
+    for model, scores in results.items():
+        fitted = int(np.sum(~np.isnan(scores["rmse"])))
+        medians = [np.nanmedian(scores[key]) if fitted else np.nan for key in ("rmse", "aic", "bic", "cv_rmse")]
+        print(f"{model:<10} {fitted:>7} {medians[0]:>8.2f} {medians[1]:>9.2f} {medians[2]:>9.2f} "
+              f"{medians[3]:>9.2f} {best.count(model):>6}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit the displacement -> angle calibration models to many trials.")
+    parser.add_argument("paths", nargs="*", help="trial CSV files or directories of them (columns: displacement,angle[,trial])")
+    parser.add_argument("--synthetic", type=int, default=0, help="add N generated trials (for benchmarking)")
+    parser.add_argument("--max-degree", type=int, default=3)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--criterion", choices=("cv_rmse", "aic", "bic", "rmse"), default="cv_rmse")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", metavar="CSV", help="write per-trial, per-model scores and parameters")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    trials = load_trials(args.paths)
+    if args.synthetic:
+        trials.update(synthetic_trials(args.synthetic, args.seed))
+    if not trials:
+        parser.error("no trials: give trial files or --synthetic N")
+    names, D, Y, W = pack_trials(trials)
+    loaded = time.perf_counter()
+
+    results = fit_trials(D, Y, W, args.max_degree, args.folds, args.seed)
+    best = select_models(results, args.criterion)
+    fitted = time.perf_counter()
+
+    print(f"{len(names)} trials, {int(W.sum())} observations "
+          f"(load {loaded - start:.2f} s, fit {fitted - loaded:.2f} s, "
+          f"{len(names) / (fitted - loaded):.0f} trials/s)")
+    print_summary(results, best, args.criterion)
+    if args.output:
+        write_results(args.output, names, results, best)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Calibration_Fitting import (arcsine_angle, fit_trials, load_trials, pack_trials, print_summary,
+                                 select_models, synthetic_trials, write_results)
+
+# Colours used by the Correlation scripts; extra polynomial degrees take the default cycle
+MODEL_COLORS = {"linear": "blue", "quadratic": "red", "sine": "green"}
+
+# Function run once in every worker: matplotlib is only imported where figures are drawn,
+# with the non-interactive Agg backend, so the fitting path never pays for it
+def _init_worker():
+    import matplotlib
+    matplotlib.use("Agg")
+
+# Function to turn a trial name into a file-system safe directory name
+def safe_name(name):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+
+# Function to evaluate a fitted model on displacements (pixels) -> angles (degrees)
+def model_curve(model, params, d):
+    if model == "sine":
+        angles = arcsine_angle(d, np.array(params[0]))
+        angles[d > params[0]] = np.nan  # arcsin is undefined beyond A
+        return angles
+    return np.polyval(params, d)
+
+# Function to draw the three figures of one dataset and return the files written.
+# task is (name, displacements, angles, {model: (params, rmse, cv_rmse)}, best model).
+def render_trial(task, directory, formats=("png",)):
+    from matplotlib.figure import Figure
+    name, d, angles, models, best = task
+    out_dir = os.path.join(directory, safe_name(name))
+    os.makedirs(out_dir, exist_ok=True)
+    colors = {model: MODEL_COLORS.get(model, f"C{i + 3}") for i, model in enumerate(models)}
+    written = []
+
+    def save(fig, stem):
+        for fmt in formats:
+            path = os.path.join(out_dir, f"{stem}.{fmt}")
+            # Fast zlib level: PNG compression is a large share of the render time (other
+            # backends do not take pil_kwargs at all)
+            fig.savefig(path, **({"pil_kwargs": {"compress_level": 1}} if fmt == "png" else {}))
+            written.append(path)
+
+    # Fits: observed data with every model curve
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    d_range = np.linspace(0, np.max(d) * 1.2, 200)
+    ax.scatter(d, angles, color="black", label="Observed Data")
+    for model, (params, rmse, _) in models.items():
+        label = f"{model.capitalize()} Fit (RMSE {rmse:.2f}){' *' if model == best else ''}"
+        ax.plot(d_range, model_curve(model, params, d_range), color=colors[model], label=label)
+    ax.set_xlabel("Displacement (pixels)")
+    ax.set_ylabel("Angle (degrees)")
+    ax.set_title(f"{name}: Angle vs. Displacement with Fits (* best)")
+    ax.legend()
+    ax.grid(True)
+    save(fig, "fits")
+
+    # Residuals: one panel per model, largest residual highlighted as in Model_Fitting_Evaluation_Plot_3.
+    # Only the first point of each angle gets a tick label: text layout dominates the draw time.
+    fig = Figure(figsize=(5 * len(models), 4.5))
+    fig.subplots_adjust(left=0.05, right=0.98, bottom=0.12, wspace=0.3)
+    axes = fig.subplots(1, len(models), squeeze=False)[0]
+    index = np.arange(len(d))
+    ticks = np.flatnonzero(np.r_[True, angles[1:] != angles[:-1]])
+    for ax, (model, (params, _, _)) in zip(axes, models.items()):
+        residuals = angles - model_curve(model, params, d)
+        bar_colors = [colors[model]] * len(d)
+        if np.isfinite(residuals).any():
+            bar_colors[int(np.nanargmax(np.abs(residuals)))] = "yellow"
+        ax.bar(index, np.nan_to_num(residuals), width=0.2, color=bar_colors)
+        ax.set_xticks(ticks)
+        ax.set_xticklabels([f"{a:g}" for a in angles[ticks]])
+        ax.set_xlabel("Data Point (angle)")
+        ax.set_ylabel("Residual (degrees)")
+        ax.set_title(f"{model.capitalize()} Residuals")
+        ax.grid(True)
+    save(fig, "residuals")
+
+    # RMSE comparison: in-sample and cross-validated, as in Model_Fitting_Evaluation_Plot_2
+    fig = Figure(figsize=(8, 6))
+    ax = fig.subplots()
+    x = np.arange(len(models))
+    ax.bar(x - 0.2, [m[1] for m in models.values()], width=0.4, color=[colors[m] for m in models], label="RMSE")
+    ax.bar(x + 0.2, [m[2] for m in models.values()], width=0.4, color=[colors[m] for m in models], alpha=0.5,
+           hatch="//", label="CV RMSE")
+    ax.set_xticks(x)
+    ax.set_xticklabels([m.capitalize() for m in models])
+    ax.set_xlabel("Model")
+    ax.set_ylabel("RMSE (degrees)")
+    ax.set_title("RMSE Comparison of Fitting Models")
+    ax.legend()
+    ax.grid(True)
+    save(fig, "rmse")
+    return written
+
+def _render_chunk(tasks, directory, formats):
+    return sum(len(render_trial(task, directory, formats)) for task in tasks)
+
+# Function to build one render task per trial from the batched fit results
+def make_tasks(trials, names, results, best):
+    tasks = []
+    for i, name in enumerate(names):
+        d, angles = trials[name]
+        models = {model: (scores["params"][i].tolist(), float(scores["rmse"][i]), float(scores["cv_rmse"][i]))
+                  for model, scores in results.items() if not np.isnan(scores["rmse"][i])}
+        tasks.append((name, np.abs(np.asarray(d, dtype=float)), np.asarray(angles, dtype=float), models, best[i]))
+    return tasks
+
+# Function to render all tasks, in worker processes when workers > 1.
+# Tasks are sent in chunks so each worker keeps its matplotlib import and pays little IPC.
+def render_all(tasks, directory, formats=("png",), workers=None, chunk_size=8):
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker()
+        return _render_chunk(tasks, directory, formats)
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        return sum(pool.map(_render_chunk, chunks, [directory] * len(chunks), [formats] * len(chunks)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Write calibration fit reports (figures + summary) without a display.")
+    parser.add_argument("paths", nargs="*", help="trial CSV files or directories (see Calibration_Fitting.py)")
+    parser.add_argument("--synthetic", type=int, default=0, help="add N generated trials")
+    parser.add_argument("--output-dir", default="calibration_report")
+    parser.add_argument("--formats", default="png", help="comma list of figure formats, e.g. png,svg")
+    parser.add_argument("--workers", type=int, default=None, help="render processes (default: all cores; 1 = serial)")
+    parser.add_argument("--max-degree", type=int, default=3)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--criterion", choices=("cv_rmse", "aic", "bic", "rmse"), default="cv_rmse")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    trials = load_trials(args.paths)
+    if args.synthetic:
+        trials.update(synthetic_trials(args.synthetic, args.seed))
+    if not trials:
+        parser.error("no trials: give trial files or --synthetic N")
+
+    start = time.perf_counter()
+    names, D, Y, W = pack_trials(trials)
+    results = fit_trials(D, Y, W, args.max_degree, args.folds, args.seed)
+    best = select_models(results, args.criterion)
+    fitted = time.perf_counter()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    summary_path = os.path.join(args.output_dir, "summary.csv")
+    write_results(summary_path, names, results, best)
+    print_summary(results, best, args.criterion)
+
+    formats = tuple(fmt.strip() for fmt in args.formats.split(",") if fmt.strip())
+    files = render_all(make_tasks(trials, names, results, best), args.output_dir, formats, args.workers)
+    elapsed = time.perf_counter() - fitted
+    print(f"Fitted {len(names)} trials in {fitted - start:.2f} s; rendered {files} figures in {elapsed:.2f} s "
+          f"({files / elapsed:.1f} figures/s)")
+    print(f"Report written to {args.output_dir} (summary: {summary_path})")
+
+if __name__ == "__main__":
+    main()
@@ -52,6 +52,13 @@ linear_residuals, linear_rmse = calculate_residuals_and_rmse(angles, linear_pred
 quad_residuals, quad_rmse = calculate_residuals_and_rmse(angles, quad_pred)
 sine_residuals, sine_rmse = calculate_residuals_and_rmse(angles, sine_pred)
 
+# Export the fitted coefficients as a versioned calibration artifact for the video pipeline
+from Calibration import save_calibration
+save_calibration("calibration.json", linear_coeffs, quad_coeffs, sine_A, displacements,
+                 rmse={'linear': linear_rmse, 'quadratic': quad_rmse, 'sine': sine_rmse},
+                 selected_model='quadratic', source='Correlation_Performance_2.py')
+print("Calibration saved to calibration.json")
+
 # Plots
 plt.figure(figsize=(15, 12))
 
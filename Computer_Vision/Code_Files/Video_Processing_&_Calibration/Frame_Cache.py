@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+# Bump when the stage code changes, so stacks written by older code are not reused
+CACHE_VERSION = 1
+
+# Stages of the SensingEngine full-frame chain, in order; each one is computed from the ones before
+STAGES = ("gray", "thresh", "contrast", "edges")
+
+# Function to get the parameters that determine each stage's output for a SensingEngine
+# configuration (the threshold block size / C and the Canny rule are fixed in the engine)
+def engine_stage_params(clip_limit=3.0, tile_grid_size=(8, 8)):
+    return {"gray": {"conversion": "BGR2GRAY"},
+            "thresh": {"method": "gaussian", "block_size": 11, "c": 2},
+            "contrast": {"clip_limit": clip_limit, "tile_grid_size": list(tile_grid_size)},
+            "edges": {"low": "max(20, mean * 0.05)", "high": "max(60, mean * 0.15)", "aperture": 3}}
+
+# Class keeping stage stacks (frames, height, width) of uint8 as memory-mapped .npy files keyed
+# by content: the video's SHA-256 and, for each stage, the hash of its parent key, name and
+# parameters. Changing a parameter therefore changes the key of that stage and every later one,
+# while the stages before it are still found. Files are written under a temporary name and
+# renamed, so an interrupted run never leaves a truncated stack behind.
+# The cache is bounded to max_bytes: after each write the least recently used stacks (by file
+# mtime, refreshed on every hit) are deleted, except those used by the current run.
+class FrameCache:
+    def __init__(self, cache_dir, max_bytes=20 * 2 ** 30):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.protected = set()
+        self.stats = {"hit": [], "computed": [], "evicted": 0, "compute_s": 0.0}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    # Function to get the content hash of a video. Hashing a long recording takes a while, so the
+    # result is remembered per (path, size, mtime) in videos.json
+    def video_key(self, video_path):
+        video_path = os.path.abspath(video_path)
+        info = os.stat(video_path)
+        index_path = os.path.join(self.cache_dir, "videos.json")
+        index = {}
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                index = json.load(f)
+        entry = index.get(video_path)
+        if entry and entry["size"] == info.st_size and entry["mtime_ns"] == info.st_mtime_ns:
+            return entry["sha256"]
+        digest = hashlib.sha256()
+        with open(video_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        index[video_path] = {"size": info.st_size, "mtime_ns": info.st_mtime_ns, "sha256": digest.hexdigest()}
+        with open(index_path + ".tmp", "w") as f:
+            json.dump(index, f, indent=2)
+        os.replace(index_path + ".tmp", index_path)
+        return digest.hexdigest()
+
+    # Function to derive a stage key from its parent key, name and parameters
+    def stage_key(self, parent_key, stage, params):
+        text = json.dumps({"version": CACHE_VERSION, "parent": parent_key, "stage": stage, "params": params},
+                          sort_keys=True)
+        return hashlib.sha256(text.encode()).hexdigest()[:32]
+
+    # Function to map a cached stack read-only (None when it is not cached)
+    def get(self, key):
+        path = self.path(key)
+        try:
+            stack = np.load(path, mmap_mode="r")
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return stack
+
+    # Function to get every stage stack of a video, computing only the first missing stage and
+    # those after it (a later stage is useless without the ones it is computed from)
+    def stages(self, video_path, params):
+        keys = {}
+        parent = self.video_key(video_path)
+        for name in STAGES:
+            parent = keys[name] = self.stage_key(parent, name, params[name])
+        self.protected.update(keys.values())
+
+        stacks = {name: self.get(key) for name, key in keys.items()}
+        missing = next((i for i, name in enumerate(STAGES) if stacks[name] is None), len(STAGES))
+        self.stats["hit"].extend(STAGES[:missing])
+        if missing < len(STAGES):
+            start = time.perf_counter()
+            self.compute(video_path, params, keys, stacks, STAGES[missing:])
+            self.stats["compute_s"] += time.perf_counter() - start
+            self.stats["computed"].extend(STAGES[missing:])
+            self.evict()
+        return stacks
+
+    # Function to compute the missing stages frame by frame (decoding the video only if the
+    # gray stage is missing) and store them; fills `stacks` with the stored stacks
+    def compute(self, video_path, params, keys, stacks, missing):
+        cap = None
+        if "gray" in missing:
+            cap = cv2.VideoCapture(video_path)
+            if not cap.isOpened():
+                raise IOError(f"Could not open video file {video_path}")
+            shape = (int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                     int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)))
+        else:
+            shape = stacks["gray"].shape
+        partial = {name: self.path(keys[name])[:-4] + ".partial.npy" for name in missing}
+        out = {name: np.lib.format.open_memmap(partial[name], mode="w+", dtype=np.uint8, shape=shape)
+               for name in missing}
+        source = {name: out.get(name, stacks[name]) for name in STAGES}
+        thresh, contrast, edges = params["thresh"], params["contrast"], params["edges"]
+        clahe = cv2.createCLAHE(clipLimit=contrast["clip_limit"], tileGridSize=tuple(contrast["tile_grid_size"]))
+
+        frames = 0
+        for i in range(shape[0]):
+            if cap is not None:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=out["gray"][i])
+            if "thresh" in out:
+                cv2.adaptiveThreshold(source["gray"][i], 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV,
+                                      thresh["block_size"], thresh["c"], dst=out["thresh"][i])
+            if "contrast" in out:
+                clahe.apply(source["thresh"][i], dst=out["contrast"][i])
+            if "edges" in out:
+                mean_intensity = cv2.mean(source["gray"][i])[0]
+                cv2.Canny(source["contrast"][i], max(20, int(mean_intensity * 0.05)),
+                          max(60, int(mean_intensity * 0.15)), edges=out["edges"][i],
+                          apertureSize=edges["aperture"])
+            frames += 1
+        if cap is not None:
+            cap.release()
+
+        for name in missing:
+            stack = out.pop(name)
+            if frames < shape[0]:
+                # The container's frame count was too high; keep only the decoded frames
+                np.save(partial[name][:-4] + ".trim.npy", stack[:frames])
+                del stack
+                os.replace(partial[name][:-4] + ".trim.npy", partial[name])
+            else:
+                stack.flush()
+                del stack
+            os.replace(partial[name], self.path(keys[name]))
+            with open(self.path(keys[name])[:-4] + ".json", "w") as f:
+                json.dump({"stage": name, "params": params[name], "video": os.path.abspath(video_path),
+                           "frames": frames, "created": time.strftime("%Y-%m-%dT%H:%M:%S")}, f, indent=2)
+            stacks[name] = self.get(keys[name])
+
+    # Function to get the total size of the cached stacks
+    def size(self):
+        return sum(entry.stat().st_size for entry in os.scandir(self.cache_dir)
+                   if entry.name.endswith(".npy") and not entry.name.endswith(".partial.npy"))
+
+    # Function to delete least recently used stacks until the cache fits in max_bytes
+    def evict(self):
+        entries = sorted((entry.stat().st_mtime, entry.stat().st_size, entry.name[:-4])
+                         for entry in os.scandir(self.cache_dir)
+                         if entry.name.endswith(".npy") and not entry.name.endswith(".partial.npy"))
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            if key in self.protected:
+                continue
+            # On Windows a stack still mapped by this process cannot be removed; skip it
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                continue
+            if os.path.exists(self.path(key)[:-4] + ".json"):
+                os.remove(self.path(key)[:-4] + ".json")
+            total -= size
+            self.stats["evicted"] += 1
+
+    # Function to describe what this run found in the cache
+    def summary(self):
+        stats = self.stats
+        text = f"Frame cache: hit {', '.join(stats['hit']) or 'nothing'}"
+        if stats["computed"]:
+            text += f"; computed {', '.join(stats['computed'])} in {stats['compute_s']:.1f} s"
+        if stats["evicted"]:
+            text += f"; evicted {stats['evicted']} stacks"
+        return text + f" ({self.size() / 2 ** 30:.2f} GB in {self.cache_dir})"
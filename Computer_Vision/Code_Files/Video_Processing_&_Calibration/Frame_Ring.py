@@ -0,0 +1,80 @@
+import multiprocessing
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Class holding a fixed number of frame slots in one multiprocessing.shared_memory block, so
+# frames move between processes without being pickled. Only small (seq, slot) tuples go through
+# the queues:
+#   producer: slot = ring.acquire(); fill ring.frames[slot] (cap.read(ring.frames[slot]) decodes
+#             straight into it); ring.publish(seq, slot)
+#   consumer: item = ring.next(); seq, slot = item; use ring.frames[slot]; ring.release(slot)
+# A slot is only reused after its consumer released it, so at most `slots` frames are in flight
+# and acquire() blocks the producer when all of them are.
+# The creating process owns the block and must call unlink() once every process is done.
+# A FrameRing passed to multiprocessing.Process re-attaches to the same block in the child.
+class FrameRing:
+    def __init__(self, slots, shape, dtype=np.uint8, context=None):
+        context = context or multiprocessing.get_context()
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * int(np.prod(self.shape)) * self.dtype.itemsize)
+        self.owner = True
+        self.frames = np.ndarray((slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf)
+        self.free = context.Queue()
+        self.ready = context.Queue()
+        for slot in range(slots):
+            self.free.put(slot)
+
+    def __getstate__(self):
+        return {"name": self.shm.name, "slots": self.slots, "shape": self.shape, "dtype": self.dtype.str,
+                "free": self.free, "ready": self.ready}
+
+    def __setstate__(self, state):
+        self.slots, self.shape, self.dtype = state["slots"], state["shape"], np.dtype(state["dtype"])
+        self.free, self.ready = state["free"], state["ready"]
+        # Only the owner should unlink the block. Python 3.13+ attaches without registering it
+        # with the resource tracker. Earlier versions register it on POSIX, but processes started
+        # by multiprocessing share the owner's tracker, so that is a duplicate of the owner's
+        # entry and is left alone: unregistering it here would drop the owner's entry too. Windows
+        # does not track shared memory at all.
+        if sys.version_info >= (3, 13):
+            self.shm = shared_memory.SharedMemory(name=state["name"], track=False)
+        else:
+            self.shm = shared_memory.SharedMemory(name=state["name"])
+        self.owner = False
+        self.frames = np.ndarray((self.slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    # Function to get a free slot index, waiting until a consumer releases one
+    def acquire(self, timeout=None):
+        return self.free.get(timeout=timeout)
+
+    # Function to hand a filled slot to the consumers
+    def publish(self, seq, slot):
+        self.ready.put((seq, slot))
+
+    # Function to tell `consumers` consumers that no more frames will come
+    def finish(self, consumers=1):
+        for _ in range(consumers):
+            self.ready.put(None)
+
+    # Function to get the next (seq, slot) to process, or None once the producer has finished
+    def next(self, timeout=None):
+        return self.ready.get(timeout=timeout)
+
+    # Function to give a slot back to the producer once its frame is no longer needed
+    def release(self, slot):
+        self.free.put(slot)
+
+    # Function to detach this process from the block (views of ring.frames must be gone)
+    def close(self):
+        self.frames = None
+        self.shm.close()
+
+    # Function to close and remove the block (owner only)
+    def unlink(self):
+        self.close()
+        if self.owner:
+            self.shm.unlink()
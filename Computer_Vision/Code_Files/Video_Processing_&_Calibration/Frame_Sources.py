@@ -0,0 +1,191 @@
+import subprocess
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# Class reading a camera (or a file played back at its native fps as a stand-in camera)
+# with latest-frame semantics. A grabber thread keeps reading and only the newest frame is
+# kept, so a slow consumer never builds up a backlog: frames it never saw are counted as
+# dropped. read() blocks until a frame newer than the last one returned is available.
+# Behaves like cv2.VideoCapture (isOpened/read/get/release) so the Sensing loops accept it;
+# mark_done() records capture-to-result latency for the frame last returned by read().
+class LiveSource:
+    def __init__(self, source, realtime=None):
+        self.cap = cv2.VideoCapture(source)
+        if isinstance(source, int):
+            # Keep the driver queue short as well
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        # A file only behaves like a camera if it is paced at its own frame rate
+        self.realtime = not isinstance(source, int) if realtime is None else realtime
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+        self.cond = threading.Condition()
+        self.frame = None
+        self.frame_time = None
+        self.seq = 0
+        self.returned_seq = 0
+        self.grabbed = 0
+        self.dropped = 0
+        self.ended = False
+        self.stopped = False
+        self.capture_time = None
+        self.timestamp = 0.0
+        self.latencies = []
+
+        self.started = time.perf_counter()
+        self.thread = threading.Thread(target=self._grab, name="grabber", daemon=True)
+        if self.cap.isOpened():
+            self.thread.start()
+
+    def _grab(self):
+        while not self.stopped:
+            if self.realtime:
+                delay = self.started + self.grabbed / self.fps - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            ret, frame = self.cap.read()
+            now = time.perf_counter()
+            with self.cond:
+                if not ret:
+                    self.ended = True
+                    self.cond.notify_all()
+                    return
+                if self.seq > self.returned_seq:
+                    self.dropped += 1  # the previous frame was never read
+                self.frame = frame
+                self.frame_time = now
+                self.seq += 1
+                self.grabbed += 1
+                self.cond.notify_all()
+
+    def isOpened(self):
+        return self.cap.isOpened() and not (self.ended and self.seq == self.returned_seq)
+
+    def read(self):
+        with self.cond:
+            while self.seq == self.returned_seq and not self.ended:
+                self.cond.wait()
+            if self.seq == self.returned_seq:
+                return False, None
+            self.returned_seq = self.seq
+            self.capture_time = self.frame_time
+            self.timestamp = self.frame_time - self.started
+            return True, self.frame
+
+    # Function to record the latency of the frame last returned by read(), in seconds
+    def mark_done(self):
+        latency = time.perf_counter() - self.capture_time
+        self.latencies.append(latency)
+        return latency
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_COUNT and not self.realtime:
+            return -1  # a camera has no end
+        return self.cap.get(prop)
+
+    def release(self):
+        self.stopped = True
+        if self.thread.is_alive():
+            self.thread.join()
+        self.cap.release()
+
+    # Function to summarise drops and capture-to-result latency (ms)
+    def summary(self):
+        latencies = np.array(self.latencies) * 1000
+        result = {"grabbed": self.grabbed, "processed": len(latencies), "dropped": self.dropped}
+        if len(latencies):
+            result.update(latency_mean_ms=float(latencies.mean()),
+                          latency_p50_ms=float(np.percentile(latencies, 50)),
+                          latency_p95_ms=float(np.percentile(latencies, 95)),
+                          latency_max_ms=float(latencies.max()))
+        return result
+
+# Class decoding a video file through an ffmpeg subprocess straight to 8-bit gray rawvideo,
+# optionally cropped (x, y, w, h) and then scaled (w, h) by ffmpeg during decode, so no BGR
+# frame is ever built in Python. Each frame is readinto() a preallocated array: with reuse=True
+# read() always returns that same array (valid until the next read, as in the serial loops);
+# reuse=False returns a copy for consumers that keep frames, such as Sensing_Pipeline's queues.
+# Behaves like cv2.VideoCapture; get() reports the size after crop/scale. Requires an ffmpeg
+# executable on the PATH (or passed as ffmpeg=); the metadata is read with OpenCV.
+class FFmpegSource:
+    def __init__(self, path, crop=None, scale=None, reuse=True, ffmpeg="ffmpeg"):
+        probe = cv2.VideoCapture(path)
+        if not probe.isOpened():
+            raise IOError(f"Could not open video file {path}")
+        self.fps = probe.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_count = int(probe.get(cv2.CAP_PROP_FRAME_COUNT))
+        width, height = int(probe.get(cv2.CAP_PROP_FRAME_WIDTH)), int(probe.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        probe.release()
+
+        filters = []
+        if crop is not None:
+            x, y, width, height = crop
+            filters.append(f"crop={width}:{height}:{x}:{y}")
+        if scale is not None:
+            width, height = scale
+            filters.append(f"scale={width}:{height}:flags=area")
+        self.width, self.height = width, height
+        command = [ffmpeg, "-v", "error", "-nostdin", "-i", path, "-an", "-sn", "-vsync", "0"]
+        if filters:
+            command += ["-vf", ",".join(filters)]
+        command += ["-f", "rawvideo", "-pix_fmt", "gray", "-"]
+        try:
+            # Unbuffered, so readinto() fills the frame array directly from the pipe
+            self.process = subprocess.Popen(command, stdout=subprocess.PIPE, bufsize=0)
+        except FileNotFoundError:
+            raise IOError(f"{ffmpeg} not found: install ffmpeg or use the cv2.VideoCapture path") from None
+
+        self.reuse = reuse
+        self.frame = np.empty((height, width), dtype=np.uint8)
+        self.view = memoryview(self.frame).cast("B")
+        self.frames = 0
+        self.ended = False
+
+    def isOpened(self):
+        return not self.ended
+
+    def read(self):
+        if self.ended:
+            return False, None
+        filled = 0
+        while filled < len(self.view):
+            count = self.process.stdout.readinto(self.view[filled:])
+            if not count:
+                # End of stream (or ffmpeg failed); a partial last frame is dropped
+                self.ended = True
+                return False, None
+            filled += count
+        self.frames += 1
+        return True, self.frame if self.reuse else self.frame.copy()
+
+    def get(self, prop):
+        return {cv2.CAP_PROP_FPS: self.fps, cv2.CAP_PROP_FRAME_COUNT: self.frame_count,
+                cv2.CAP_PROP_FRAME_WIDTH: self.width, cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+                cv2.CAP_PROP_POS_FRAMES: self.frames}.get(prop, 0.0)
+
+    def release(self):
+        self.ended = True
+        self.process.stdout.close()
+        if self.process.poll() is None:
+            self.process.terminate()
+        self.process.wait()
+
+# Function to open a frame source: a camera index ("0") is always live; a file path is
+# read frame by frame unless live=True, which plays it back as a stand-in camera.
+# ffmpeg=True decodes a file to gray through FFmpegSource (reuse: see FFmpegSource).
+def open_source(source, live=False, ffmpeg=False, reuse=True):
+    if isinstance(source, str) and source.isdigit():
+        return LiveSource(int(source))
+    if live:
+        return LiveSource(source, realtime=True)
+    if ffmpeg:
+        return FFmpegSource(source, reuse=reuse)
+    return cv2.VideoCapture(source)
+
+# Function to get a usable frame count (cameras report none, so run until stopped)
+def source_frame_count(cap):
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    return frame_count if frame_count > 0 else sys.maxsize
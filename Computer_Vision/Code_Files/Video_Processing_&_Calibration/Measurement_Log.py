@@ -0,0 +1,140 @@
+import math
+import os
+import struct
+
+import numpy as np
+
+from Sensing_5 import Y_BANDS
+
+# One row per detected line per frame.
+# displacement is x1 minus the x1 of the first row logged for the same band, i.e. how far
+# the cable mark has moved since the start of the run (pixels).
+# angle is the calibrated bend angle (degrees) on the middle band row, nan elsewhere or when
+# the run has no calibration.
+MEASUREMENT_DTYPE = np.dtype([
+    ("frame", np.int64),
+    ("timestamp", np.float64),
+    ("band", np.int32),
+    ("x1", np.int32),
+    ("y1", np.int32),
+    ("x2", np.int32),
+    ("y2", np.int32),
+    ("displacement", np.int32),
+    ("angle", np.float64),
+])
+
+CSV_FORMAT = "%d,%.6f,%d,%d,%d,%d,%d,%d,%.4f"
+
+# Function to build a version 1.0 .npy header of a fixed total length, so the row count
+# can be rewritten in place when the file is closed
+def _npy_header(rows, total_length=None):
+    body = repr({"descr": np.lib.format.dtype_to_descr(MEASUREMENT_DTYPE),
+                 "fortran_order": False, "shape": (rows,)})
+    if total_length is None:
+        # Room for any row count up to 10**15, rounded up to numpy's 64-byte alignment
+        longest = len(body) + 16 + 10 + 1
+        total_length = -(-longest // 64) * 64
+    header = body + " " * (total_length - 10 - len(body) - 1) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1")
+
+# Function to pick the storage format from the file extension
+def log_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    formats = {".csv": "csv", ".npy": "npy", ".parquet": "parquet"}
+    if ext not in formats:
+        raise ValueError(f"Unsupported measurement log extension '{ext}' (use .csv, .npy or .parquet)")
+    return formats[ext]
+
+# Class writing the per-frame measurement stream in batches.
+# Rows are collected in a preallocated structured array and written once batch_size rows
+# are waiting: CSV appends text, .npy appends raw records and patches the header row count
+# on close, and .parquet writes one row group per batch (requires pyarrow).
+class MeasurementLog:
+    def __init__(self, path, batch_size=4096):
+        self.path = path
+        self.format = log_format(path)
+        self.batch = np.empty(batch_size, dtype=MEASUREMENT_DTYPE)
+        self.pending = 0
+        self.rows = 0
+        self.reference_x = {}
+        self.parquet_writer = None
+
+        if self.format == "parquet":
+            import pyarrow.parquet as pq
+            self._pq = pq
+            self.file = None
+        else:
+            self.file = open(path, "w" if self.format == "csv" else "wb")
+            if self.format == "csv":
+                self.file.write(",".join(MEASUREMENT_DTYPE.names) + "\n")
+            else:
+                self.header = _npy_header(0)
+                self.file.write(self.header)
+
+    # Function to add the lines of one frame
+    def append(self, frame_idx, timestamp, lines, angle=math.nan):
+        if lines is None:
+            return
+        for line in lines:
+            x1, y1, x2, y2 = (int(v) for v in line[0])
+            band = int(np.argmin([abs((y1 + y2) // 2 - band_y) for band_y in Y_BANDS]))
+            reference = self.reference_x.setdefault(band, x1)
+            if self.pending == len(self.batch):
+                self.flush()
+            self.batch[self.pending] = (frame_idx, timestamp, band, x1, y1, x2, y2, x1 - reference,
+                                        angle if band == 1 else math.nan)
+            self.pending += 1
+
+    # Function to write out the pending rows
+    def flush(self):
+        if self.pending == 0:
+            return
+        rows = self.batch[:self.pending]
+        if self.format == "csv":
+            np.savetxt(self.file, rows, fmt=CSV_FORMAT)
+        elif self.format == "npy":
+            self.file.write(rows.tobytes())
+        else:
+            import pyarrow as pa
+            table = pa.table({name: rows[name] for name in MEASUREMENT_DTYPE.names})
+            if self.parquet_writer is None:
+                self.parquet_writer = self._pq.ParquetWriter(self.path, table.schema)
+            self.parquet_writer.write_table(table)
+        self.rows += self.pending
+        self.pending = 0
+
+    def close(self):
+        self.flush()
+        if self.format == "npy":
+            self.file.seek(0)
+            self.file.write(_npy_header(self.rows, len(self.header)))
+        if self.file is not None:
+            self.file.close()
+        if self.format == "parquet":
+            if self.parquet_writer is None:
+                # No rows: still leave a valid, empty file
+                import pyarrow as pa
+                empty = np.empty(0, dtype=MEASUREMENT_DTYPE)
+                self._pq.write_table(pa.table({name: empty[name] for name in MEASUREMENT_DTYPE.names}), self.path)
+            else:
+                self.parquet_writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# Function to load a whole measurement log as one structured array in a single read
+def load_measurements(path, mmap=True):
+    fmt = log_format(path)
+    if fmt == "npy":
+        return np.load(path, mmap_mode="r" if mmap else None)
+    if fmt == "csv":
+        return np.loadtxt(path, dtype=MEASUREMENT_DTYPE, delimiter=",", skiprows=1, ndmin=1)
+    import pyarrow.parquet as pq
+    table = pq.read_table(path)
+    rows = np.empty(table.num_rows, dtype=MEASUREMENT_DTYPE)
+    for name in MEASUREMENT_DTYPE.names:
+        rows[name] = table.column(name).to_numpy()
+    return rows
@@ -0,0 +1,317 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from Benchmark_Sensing import environment, synthetic_video
+from Measurement_Log import load_measurements
+from Sensing_5 import Y_BANDS
+
+# Values swept for each parameter of the SensingEngine chain
+# (adaptiveThreshold -> CLAHE -> Canny -> HoughLinesP); the grid is their product
+PARAMETER_GRID = {
+    "block_size": (7, 11, 15, 21),
+    "clip_limit": (2.0, 3.0, 4.0),
+    "canny_low": (10, 20, 40),
+    "canny_high": (60, 120, 180),
+    "hough_threshold": (20, 30, 50, 70),
+    "min_line_length": (20, 50, 100),
+    "max_line_gap": (10, 20, 40),
+}
+
+# The values SensingEngine uses today (its Canny thresholds clamp to 20/60 for 8-bit frames);
+# always evaluated so the ranking shows where the current tuning stands
+CURRENT = {"block_size": 11, "clip_limit": 3.0, "canny_low": 20, "canny_high": 60,
+           "hough_threshold": 30, "min_line_length": 20, "max_line_gap": 20}
+
+# Penalty per unit of each metric subtracted from the recall to give the ranking score
+SCORE_WEIGHTS = {"dy_mean_px": 0.02, "dx_mean_px": 0.002, "jitter_px": 0.05,
+                 "false_positives_per_frame": 0.02, "flicker": 1.0}
+
+# Function to list the configurations to evaluate: the full grid, or `samples` distinct random
+# grid points; CURRENT is always included
+def make_configs(samples=None, seed=0):
+    names = list(PARAMETER_GRID)
+    grid = [dict(zip(names, values)) for values in itertools.product(*PARAMETER_GRID.values())]
+    grid = [config for config in grid if config["canny_low"] < config["canny_high"]]
+    if samples is not None and samples < len(grid):
+        grid = random.Random(seed).sample(grid, samples)
+    if CURRENT not in grid:
+        grid.insert(0, dict(CURRENT))
+    return grid
+
+# Function to decode a video once into a memory-mapped .npy stack of gray frames, which every
+# worker maps read-only instead of decoding the video again
+def cache_video(video_path, cache_path, max_frames=0, stride=1):
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video file {video_path}")
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    capacity = -(-frame_count // stride)
+    if max_frames:
+        capacity = min(capacity, max_frames)
+    stack = np.lib.format.open_memmap(cache_path, mode="w+", dtype=np.uint8, shape=(capacity, height, width))
+    frame_idx = 0
+    cached = []
+    while len(cached) < capacity:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if frame_idx % stride == 0:
+            cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=stack[len(cached)])
+            cached.append(frame_idx)
+        frame_idx += 1
+    cap.release()
+    stack.flush()
+    return np.asarray(cached), len(cached)
+
+# Function to cache a synthetic video (Benchmark_Sensing.synthetic_video) and return its truth
+def cache_synthetic(cache_path, frames, width, height, seed):
+    stack = np.lib.format.open_memmap(cache_path, mode="w+", dtype=np.uint8, shape=(frames, height, width))
+    truth = np.empty((frames, len(Y_BANDS), 3))
+    for frame_idx, (frame, frame_truth) in enumerate(synthetic_video(frames, width, height, seed)):
+        cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=stack[frame_idx])
+        truth[frame_idx] = frame_truth
+    stack.flush()
+    return truth
+
+# Function to read per-band ground truth (x_left, y, x_right) for the cached frames from a
+# measurement log (Measurement_Log format, e.g. hand-checked lines); missing bands are nan
+def load_truth(path, frame_indices):
+    rows = load_measurements(path, mmap=False)
+    truth = np.full((len(frame_indices), len(Y_BANDS), 3), np.nan)
+    position = {int(frame_idx): i for i, frame_idx in enumerate(frame_indices)}
+    for row in rows:
+        i = position.get(int(row["frame"]))
+        if i is not None and 0 <= row["band"] < len(Y_BANDS):
+            truth[i, row["band"]] = (min(row["x1"], row["x2"]), (row["y1"] + row["y2"]) / 2, max(row["x1"], row["x2"]))
+    return truth
+
+# Function to get the (y0, y1) rows the chain runs on: the whole frame, or the band strips
+# of SensingEngine(band_strips=True) with its default strip_margin
+def sweep_rows(height, band_strips, tolerance, strip_margin=6):
+    if not band_strips:
+        return [(0, height)]
+    half = int(tolerance) + strip_margin
+    return [(max(0, band - half), min(height, band + half)) for band in Y_BANDS]
+
+# Function to measure each band with the single segment whose mid y is nearest its reference y
+# (within tolerance), as Benchmark_Sensing.score_frame does: a band spanned by noise segments
+# would otherwise measure from the leftmost to the rightmost of them. Each segment serves one
+# band; returns (found, z as (x_left, y, x_right) per band, number of unused segments).
+def match_bands(lines, band_y, tolerance):
+    found = np.zeros(len(band_y), dtype=bool)
+    z = np.zeros((len(band_y), 3))
+    rows = lines.reshape(-1, 4)
+    y_mids = (rows[:, 1] + rows[:, 3]) / 2
+    unmatched = np.ones(len(rows), dtype=bool)
+    for band, y in enumerate(band_y):
+        distance = np.where(unmatched, np.abs(y_mids - y), np.inf)
+        best = int(np.argmin(distance))
+        if distance[best] >= tolerance:
+            continue
+        unmatched[best] = False
+        found[band] = True
+        z[band] = (min(rows[best, 0], rows[best, 2]), y_mids[best], max(rows[best, 0], rows[best, 2]))
+    return found, z, int(unmatched.sum())
+
+# Function to evaluate configurations that share block_size and clip_limit on frames [start, stop).
+# Each stage runs once per distinct set of its upstream parameters: threshold and CLAHE once per
+# frame, Canny once per (canny_low, canny_high), HoughLinesP once per configuration.
+# Bands are matched against band_y, the (stop - start, bands) true y of each frame (nan where
+# unknown: the nominal Y_BANDS row is used instead). Returns the band measurements and the count
+# of unmatched segments of every configuration and frame.
+def evaluate_group(cache_path, start, stop, block_size, clip_limit, configs, tolerance, band_strips=False,
+                   band_y=None):
+    cv2.setNumThreads(1)  # one core per worker; the pool provides the parallelism
+    stack = np.load(cache_path, mmap_mode="r")
+    height, width = stack.shape[1:]
+    rows = sweep_rows(height, band_strips, tolerance)
+    # One CLAHE tile row per strip, as in SensingEngine
+    clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=(8, 1) if band_strips else (8, 8))
+    thresh = np.empty((height, width), dtype=np.uint8)
+    contrast = np.empty((height, width), dtype=np.uint8)
+    edges = np.empty((height, width), dtype=np.uint8)
+    canny_groups = {}
+    for c, config in enumerate(configs):
+        canny_groups.setdefault((config["canny_low"], config["canny_high"]), []).append(c)
+
+    frames = stop - start
+    band_y = np.broadcast_to(np.asarray(Y_BANDS, dtype=float), (frames, len(Y_BANDS))) if band_y is None else \
+        np.where(np.isnan(band_y), np.asarray(Y_BANDS, dtype=float), band_y)
+    found = np.zeros((len(configs), frames, len(Y_BANDS)), dtype=bool)
+    z = np.zeros((len(configs), frames, len(Y_BANDS), 3))
+    unmatched = np.zeros((len(configs), frames), dtype=np.int32)
+    for i in range(frames):
+        gray = np.asarray(stack[start + i])
+        for y0, y1 in rows:
+            cv2.adaptiveThreshold(gray[y0:y1], 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV,
+                                  block_size, 2, dst=thresh[y0:y1])
+            clahe.apply(thresh[y0:y1], dst=contrast[y0:y1])
+        for (low, high), members in canny_groups.items():
+            for y0, y1 in rows:
+                cv2.Canny(contrast[y0:y1], low, high, edges=edges[y0:y1], apertureSize=3)
+            for c in members:
+                config = configs[c]
+                found_lines = []
+                for y0, y1 in rows:
+                    lines = cv2.HoughLinesP(edges[y0:y1], 1, np.pi / 180, threshold=config["hough_threshold"],
+                                            minLineLength=config["min_line_length"], maxLineGap=config["max_line_gap"])
+                    if lines is not None:
+                        lines[:, :, 1::2] += y0
+                        found_lines.append(lines)
+                if not found_lines:
+                    continue
+                found[c, i], z[c, i], unmatched[c, i] = match_bands(np.concatenate(found_lines), band_y[i], tolerance)
+    return start, stop, found, z, unmatched
+
+def _evaluate_group(args):
+    return evaluate_group(*args)
+
+# Function to score one configuration over the whole sequence.
+# With truth: recall of the true bands (measured y within tolerance), mean |dy| and endpoint |dx|,
+# false positives (segments not used for a band plus band measurements that miss the truth).
+# Stability: jitter is the RMS frame-to-frame change of the y error (of y itself without truth)
+# over consecutive detected frames; flicker is the share of frames where a band appears or vanishes.
+def score_config(found, z, unmatched, truth, tolerance):
+    frames = len(found)
+    if truth is not None:
+        valid = ~np.isnan(truth[..., 1])
+        hit = found & valid & (np.abs(z[..., 1] - np.nan_to_num(truth[..., 1])) < tolerance)
+        residual = z[..., 1] - np.nan_to_num(truth[..., 1])
+        metrics = {"recall": hit.sum() / max(1, valid.sum()),
+                   "false_positives_per_frame": (unmatched.sum() + (found & ~hit).sum()) / frames}
+        if hit.any():
+            metrics["dy_mean_px"] = float(np.abs(residual[hit]).mean())
+            metrics["dx_mean_px"] = float(np.abs(z[..., 0::2] - np.nan_to_num(truth[..., 0::2]))[hit].mean())
+    else:
+        hit = found
+        residual = z[..., 1]
+        metrics = {"recall": found.mean(), "false_positives_per_frame": unmatched.sum() / frames}
+    steady = hit[1:] & hit[:-1]
+    metrics["jitter_px"] = float(np.sqrt(np.mean(np.diff(residual, axis=0)[steady] ** 2))) if steady.any() else np.nan
+    metrics["flicker"] = float((hit[1:] != hit[:-1]).mean()) if frames > 1 else 0.0
+    # Metrics that could not be measured (nan) are left out, so a configuration that never
+    # detects a band pays a fixed penalty instead of looking perfectly stable
+    penalty = sum(weight * metrics[name] for name, weight in SCORE_WEIGHTS.items()
+                  if name in metrics and not np.isnan(metrics[name]))
+    if not hit.any():
+        penalty += 1.0
+    metrics["score"] = float(metrics["recall"] - penalty)
+    return {name: round(float(value), 4) for name, value in metrics.items()}
+
+# Function to evaluate every configuration over the cached frames in a process pool.
+# Jobs are (block_size, clip_limit) groups split into frame shards, so the cached stages are
+# shared inside a job and the pool stays busy even with few groups.
+def run_sweep(cache_path, frames, configs, truth=None, tolerance=15.0, workers=None, shards=None,
+              band_strips=False):
+    workers = workers or os.cpu_count() or 1
+    groups = {}
+    for c, config in enumerate(configs):
+        groups.setdefault((config["block_size"], config["clip_limit"]), []).append(c)
+    shards = shards or max(1, -(-2 * workers // len(groups)))
+    bounds = np.linspace(0, frames, min(shards, frames) + 1).astype(int)
+    jobs, members = [], []
+    for (block_size, clip_limit), indices in groups.items():
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            jobs.append((cache_path, int(start), int(stop), block_size, clip_limit,
+                         [configs[c] for c in indices], tolerance, band_strips,
+                         None if truth is None else truth[start:stop, :, 1]))
+            members.append(indices)
+
+    found = np.zeros((len(configs), frames, len(Y_BANDS)), dtype=bool)
+    z = np.zeros((len(configs), frames, len(Y_BANDS), 3))
+    unmatched = np.zeros((len(configs), frames), dtype=np.int32)
+    if workers == 1:
+        outputs = list(map(_evaluate_group, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outputs = list(pool.map(_evaluate_group, jobs))
+    for indices, (start, stop, job_found, job_z, job_unmatched) in zip(members, outputs):
+        found[indices, start:stop] = job_found
+        z[indices, start:stop] = job_z
+        unmatched[indices, start:stop] = job_unmatched
+
+    results = [{"config": config, **score_config(found[c], z[c], unmatched[c], truth, tolerance)}
+               for c, config in enumerate(configs)]
+    results.sort(key=lambda r: -r["score"])
+    for rank, result in enumerate(results, 1):
+        result["rank"] = rank
+    return results
+
+# Function to print the top of the ranking, plus the current tuning wherever it landed
+def print_ranking(results, top=15):
+    names = list(PARAMETER_GRID)
+    print(f"{'rank':>5} " + "".join(f"{name:>16}" for name in names) +
+          f"{'score':>9}{'recall':>8}{'dy px':>8}{'dx px':>8}{'jitter':>8}{'flicker':>8}{'FP/fr':>10}")
+    shown = [r for r in results if r["rank"] <= top or r["config"] == CURRENT]
+    for r in shown:
+        marker = "*" if r["config"] == CURRENT else " "
+        print(f"{r['rank']:>4}{marker} " + "".join(f"{r['config'][name]:>16}" for name in names) +
+              f"{r['score']:9.3f}{r['recall']:8.3f}{r.get('dy_mean_px', float('nan')):8.2f}"
+              f"{r.get('dx_mean_px', float('nan')):8.1f}{r['jitter_px']:8.2f}{r['flicker']:8.3f}"
+              f"{r['false_positives_per_frame']:10.1f}")
+    print("* current SensingEngine tuning")
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel sweep of the threshold/CLAHE/Canny/Hough parameters "
+                                                 "over frames decoded once.")
+    parser.add_argument("video_path", nargs="?", help="video to sweep on (default: a synthetic ground-truth video)")
+    parser.add_argument("--truth", metavar="PATH", help="measurement log with the true band lines of the video")
+    parser.add_argument("--synthetic-frames", type=int, default=120, help="frames of the synthetic video")
+    parser.add_argument("--max-frames", type=int, default=0, help="cache at most N frames of the video (0 = all)")
+    parser.add_argument("--stride", type=int, default=1, help="cache every Nth frame of the video")
+    parser.add_argument("--samples", type=int, default=200,
+                        help="random grid points to evaluate (0 = the whole grid)")
+    parser.add_argument("--tolerance", type=float, default=15.0, help="max |dy| (px) for a band match")
+    parser.add_argument("--band-strips", action="store_true",
+                        help="run the chain on the band strips only, as Sensing_5.py --band-strips "
+                             "(about 10x faster than full frames)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--cache-dir", default=None, help="where to keep the decoded frame stack (default: temp dir)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top", type=int, default=15, help="configurations to print")
+    parser.add_argument("--output", default="sweep_results.json")
+    args = parser.parse_args()
+
+    configs = make_configs(args.samples or None, args.seed)
+    with tempfile.TemporaryDirectory(dir=args.cache_dir) as cache_dir:
+        cache_path = os.path.join(cache_dir, "gray_frames.npy")
+        start = time.perf_counter()
+        if args.video_path:
+            frame_indices, frames = cache_video(args.video_path, cache_path, args.max_frames, args.stride)
+            truth = load_truth(args.truth, frame_indices) if args.truth else None
+            source = args.video_path
+        else:
+            frames = args.synthetic_frames
+            truth = cache_synthetic(cache_path, frames, 1920, 1080, args.seed)
+            source = f"synthetic_1920x1080_{frames}f_seed{args.seed}"
+        print(f"Cached {frames} frames of {source} in {time.perf_counter() - start:.1f} s")
+        if truth is None:
+            print("No ground truth: recall is the band detection rate and jitter includes real motion")
+
+        start = time.perf_counter()
+        results = run_sweep(cache_path, frames, configs, truth, args.tolerance, args.workers,
+                            band_strips=args.band_strips)
+        elapsed = time.perf_counter() - start
+    print(f"Evaluated {len(configs)} configurations x {frames} frames with {args.workers} workers "
+          f"in {elapsed:.1f} s ({len(configs) * frames / elapsed:.0f} configuration-frames/s)")
+    print_ranking(results, args.top)
+
+    with open(args.output, "w") as f:
+        json.dump({"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "environment": environment(),
+                   "settings": vars(args), "source": source, "frames": frames, "score_weights": SCORE_WEIGHTS,
+                   "results": results}, f, indent=2)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import cv2
+import numpy as np
+
+from Sensing_5 import Y_BANDS
+
+# Class locating near-horizontal cable marks from 1D intensity profiles instead of
+# threshold + CLAHE + Canny + HoughLinesP.
+# For each band strip the rows are averaged into a row profile (cv2.reduce); the mark is the
+# strongest deviation from the strip's median level, refined to sub-pixel y by a parabola
+# through the peak and its neighbours ('parabola') or by the centroid of the half-maximum
+# rows ('centroid'). For the x extent every column's extreme (max for bright, min for dark
+# marks) over the mark rows +/- tilt_rows is compared with the column mean; the half-maximum
+# run of that column signal gives a first extent, the mark's slope is fitted over it and the
+# columns are measured again along the sloped line, so tilted marks keep their full length.
+# Extent ends are sub-pixel by linear interpolation.
+# polarity 'auto' accepts bright marks on a dark background (the rendered videos) and dark
+# ink on paper (Test_Inputs); 'bright' or 'dark' restricts it.
+# With bands=None the whole frame height is searched for up to max_lines marks, for images
+# whose marks are not at the video band positions.
+# detect() returns HoughLinesP-shaped (N, 1, 4) int32 segments, so it can stand in for the
+# Hough chain in front of extend_lines; the float estimates are kept in self.estimates as
+# (band, y, x_start, x_end, strength) tuples (band is -1 in full-frame mode).
+class ProfileDetector:
+    def __init__(self, width, height, bands=Y_BANDS, half_height=21, peak_fit="parabola", polarity="auto",
+                 min_contrast=3.0, min_snr=3.0, min_length=20, max_gap=20, max_lines=8, tilt_rows=8, gray=None):
+        if peak_fit not in ("parabola", "centroid"):
+            raise ValueError(f"peak_fit must be 'parabola' or 'centroid', not {peak_fit!r}")
+        if polarity not in ("auto", "bright", "dark"):
+            raise ValueError(f"polarity must be 'auto', 'bright' or 'dark', not {polarity!r}")
+        self.width = width
+        self.height = height
+        self.bands = bands
+        self.half_height = half_height
+        self.peak_fit = peak_fit
+        self.polarity = polarity
+        self.min_contrast = min_contrast
+        self.min_snr = min_snr
+        self.min_length = min_length
+        self.max_gap = max_gap
+        self.max_lines = max_lines
+        self.tilt_rows = tilt_rows
+        self.strips = None
+        if bands is not None:
+            self.strips = [(max(0, band - half_height), min(height, band + half_height)) for band in bands]
+        # gray may be a caller's buffer (SensingEngine shares its own so the gray tap still works)
+        self.gray = np.zeros((height, width), dtype=np.uint8) if gray is None else gray
+        self.estimates = []
+
+    # Function to find the marks in one BGR frame (or an already gray frame)
+    def detect(self, frame):
+        gray = frame if frame.ndim == 2 else None
+        self.estimates = []
+        if self.strips is None:
+            if gray is None:
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self.gray)
+            self._detect_full(gray)
+        else:
+            for band, (y0, y1) in enumerate(self.strips):
+                if gray is None:
+                    cv2.cvtColor(frame[y0:y1], cv2.COLOR_BGR2GRAY, dst=self.gray[y0:y1])
+                strip = (self.gray if gray is None else gray)[y0:y1]
+                profile = cv2.reduce(strip, 1, cv2.REDUCE_AVG, dtype=cv2.CV_32F).ravel()
+                deviation = profile - np.median(profile)
+                peak, sign = self._peak(deviation)
+                if peak is not None:
+                    estimate = self._refine(strip, y0, deviation * sign, peak, sign)
+                    if estimate is not None:
+                        self.estimates.append((band,) + estimate)
+        segments = [[[int(round(x0)), int(round(y)), int(round(x1)), int(round(y))]]
+                    for _, y, x0, x1, _ in self.estimates]
+        return np.array(segments, dtype=np.int32).reshape(-1, 1, 4)
+
+    # Function to search the whole height: baseline-subtracted row profile, then the strongest
+    # peaks at least one band apart
+    def _detect_full(self, gray):
+        profile = cv2.reduce(gray, 1, cv2.REDUCE_AVG, dtype=cv2.CV_32F).ravel()
+        window = 4 * self.half_height + 1
+        baseline = cv2.blur(profile.reshape(-1, 1), (1, window), borderType=cv2.BORDER_REPLICATE).ravel()
+        deviation = profile - baseline
+        _, sign = self._peak(deviation, require=False)
+        signal = deviation * sign
+        threshold = self._threshold(signal)
+        candidates = np.flatnonzero((signal > threshold)
+                                    & (signal >= np.roll(signal, 1)) & (signal >= np.roll(signal, -1)))
+        taken = []
+        for peak in candidates[np.argsort(-signal[candidates])]:
+            if len(taken) == self.max_lines:
+                break
+            if all(abs(peak - other) > self.half_height for other in taken):
+                taken.append(peak)
+                estimate = self._refine(gray, 0, signal, int(peak), sign)
+                if estimate is not None:
+                    self.estimates.append((-1,) + estimate)
+        self.estimates.sort(key=lambda e: e[1])
+
+    # Function to find the detection threshold of a signal: a fixed floor and a multiple of
+    # its robust noise level (median absolute deviation)
+    def _threshold(self, signal):
+        noise = 1.4826 * np.median(np.abs(signal - np.median(signal)))
+        return max(self.min_contrast, self.min_snr * noise)
+
+    # Function to pick the peak row and the mark polarity (+1 bright, -1 dark)
+    def _peak(self, deviation, require=True):
+        if self.polarity == "auto":
+            sign = 1.0 if deviation.max() >= -deviation.min() else -1.0
+        else:
+            sign = 1.0 if self.polarity == "bright" else -1.0
+        signal = deviation * sign
+        peak = int(np.argmax(signal))
+        if require and signal[peak] <= self._threshold(signal):
+            return None, sign
+        return peak, sign
+
+    # Function to refine one peak: sub-pixel y from the row signal, x extent from the columns
+    def _refine(self, image, y0, signal, peak, sign):
+        n = len(signal)
+        if self.peak_fit == "parabola" and 0 < peak < n - 1:
+            a, b, c = signal[peak - 1], signal[peak], signal[peak + 1]
+            curvature = a - 2 * b + c
+            offset = 0.5 * (a - c) / curvature if curvature < 0 else 0.0
+        else:
+            offset = 0.0
+        # Rows of the mark: contiguous rows above half the peak height
+        half = signal[peak] / 2
+        top = peak
+        while top > 0 and signal[top - 1] > half:
+            top -= 1
+        bottom = peak
+        while bottom < n - 1 and signal[bottom + 1] > half:
+            bottom += 1
+        if self.peak_fit == "centroid":
+            weights = signal[top:bottom + 1] - half
+            offset = float(np.dot(np.arange(top, bottom + 1), weights) / weights.sum()) - peak
+        y = y0 + peak + offset
+
+        # Column signal over the mark rows plus the tilt allowance
+        # (image rows are relative to y0, the first row of the signal)
+        lo = max(0, top - self.tilt_rows)
+        rows = image[lo:min(n, bottom + self.tilt_rows + 1)]
+        extreme = cv2.reduce(rows, 0, cv2.REDUCE_MAX if sign > 0 else cv2.REDUCE_MIN).ravel()
+        column_signal = (extreme - cv2.reduce(rows, 0, cv2.REDUCE_AVG, dtype=cv2.CV_32F).ravel()) * sign
+        extent = self._extent(column_signal)
+        if extent is None:
+            return None
+
+        # A tilted mark can leave that window: fit the row of the strongest pixel per column
+        # over the first extent, then measure again in a narrow band along the fitted line
+        i0, i1 = int(extent[0]), int(np.ceil(extent[1]))
+        xs = np.arange(i0, i1 + 1)
+        strongest = (rows.argmax(axis=0) if sign > 0 else rows.argmin(axis=0))[i0:i1 + 1] + lo
+        slope, intercept = np.polyfit(xs, strongest, 1)
+        centre = np.rint(intercept + slope * np.arange(image.shape[1])).astype(np.intp)
+        thickness = (bottom - top) // 2 + 2
+        band = np.clip(centre[None, :] + np.arange(-thickness, thickness + 1)[:, None], 0, image.shape[0] - 1)
+        wide = np.clip(centre[None, :] + np.arange(-thickness - 6, thickness + 7)[:, None], 0, image.shape[0] - 1)
+        columns = np.arange(image.shape[1])
+        samples = image[band, columns]
+        extreme = samples.max(axis=0) if sign > 0 else samples.min(axis=0)
+        column_signal = (extreme - image[wide, columns].mean(axis=0, dtype=np.float32)) * sign
+        extent = self._extent(column_signal) or extent
+        return float(y), float(extent[0]), float(extent[1]), float(signal[peak])
+
+    # Function to find the strongest half-maximum run of a column signal, with sub-pixel ends.
+    # Runs separated by more than max_gap columns are different marks.
+    def _extent(self, column_signal):
+        level = column_signal.max() / 2
+        if level <= 0:
+            return None
+        above = np.flatnonzero(column_signal > level)
+        breaks = np.flatnonzero(np.diff(above) > self.max_gap + 1)
+        starts = np.r_[0, breaks + 1]
+        ends = np.r_[breaks, len(above) - 1]
+        strengths = [column_signal[above[s]:above[e] + 1].sum() for s, e in zip(starts, ends)]
+        best = int(np.argmax(strengths))
+        i0, i1 = int(above[starts[best]]), int(above[ends[best]])
+        if i1 - i0 + 1 < self.min_length:
+            return None
+        x_start = float(i0)
+        if i0 > 0:
+            x_start = i0 - (column_signal[i0] - level) / (column_signal[i0] - column_signal[i0 - 1])
+        x_end = float(i1)
+        if i1 < len(column_signal) - 1:
+            x_end = i1 + (column_signal[i1] - level) / (column_signal[i1] - column_signal[i1 + 1])
+        return x_start, x_end
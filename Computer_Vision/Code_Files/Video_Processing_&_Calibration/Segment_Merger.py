@@ -0,0 +1,67 @@
+import numpy as np
+
+# Function to merge collinear near-horizontal segments, one output segment per cluster.
+# Two segments belong together when their mid ys differ by less than y_threshold and the
+# x gap between them is less than x_gap_threshold; a cluster also never spans y_threshold
+# or more in mid y, so a stack of evenly spaced lines cannot chain into one.
+# Segments are sorted once by mid y and swept in that order. Open clusters are bucketed by
+# the mid y of their first member (bucket height y_threshold), so each segment is only
+# compared with the clusters of its own and the previous bucket; buckets the sweep has
+# passed are dropped. A segment joins every open cluster it touches (those clusters are
+# merged through it), or starts a new one.
+# Input and output use the HoughLinesP (N, 1, 4) layout; output endpoints are the x
+# extent of the cluster and the mean y of its left and right ends.
+def merge_segments(lines, y_threshold=10, x_gap_threshold=20):
+    if lines is None or len(lines) < 1:
+        return None
+    seg = np.asarray(lines, dtype=np.int64).reshape(-1, 4)
+
+    # Orient every segment left to right
+    flip = seg[:, 0] > seg[:, 2]
+    seg[flip] = seg[flip][:, [2, 3, 0, 1]]
+    y_mid = (seg[:, 1] + seg[:, 3]) / 2
+    order = np.lexsort((seg[:, 0], y_mid))
+
+    # Per cluster: mid y of its first member, x extent, summed left/right y, member count
+    y_start, x_lo, x_hi, y1_sum, y2_sum, count = [], [], [], [], [], []
+    buckets = {}
+    for i in order.tolist():
+        x1, y1, x2, y2 = seg[i].tolist()
+        y = y_mid[i]
+        bucket = int(y // y_threshold)
+        for old in [b for b in buckets if b < bucket - 1]:
+            del buckets[old]
+        touched = [c for b in (bucket - 1, bucket) for c in buckets.get(b, ())
+                   if y_start[c] > y - y_threshold and max(x1 - x_hi[c], x_lo[c] - x2) < x_gap_threshold]
+        if not touched:
+            y_start.append(y)
+            x_lo.append(x1)
+            x_hi.append(x2)
+            y1_sum.append(y1)
+            y2_sum.append(y2)
+            count.append(1)
+            buckets.setdefault(bucket, []).append(len(count) - 1)
+            continue
+        # Keep the oldest touched cluster; the others fold into it
+        touched.sort()
+        keep = touched[0]
+        x_lo[keep], x_hi[keep] = min(x_lo[keep], x1), max(x_hi[keep], x2)
+        y1_sum[keep] += y1
+        y2_sum[keep] += y2
+        count[keep] += 1
+        for c in touched[1:]:
+            x_lo[keep], x_hi[keep] = min(x_lo[keep], x_lo[c]), max(x_hi[keep], x_hi[c])
+            y1_sum[keep] += y1_sum[c]
+            y2_sum[keep] += y2_sum[c]
+            count[keep] += count[c]
+            count[c] = 0
+            buckets[int(y_start[c] // y_threshold)].remove(c)
+
+    alive = np.flatnonzero(np.asarray(count))
+    counts = np.asarray(count)[alive]
+    merged = np.empty((len(alive), 4), dtype=np.int64)
+    merged[:, 0] = np.asarray(x_lo)[alive]
+    merged[:, 2] = np.asarray(x_hi)[alive]
+    merged[:, 1] = np.round(np.asarray(y1_sum)[alive] / counts)
+    merged[:, 3] = np.round(np.asarray(y2_sum)[alive] / counts)
+    return merged.astype(np.int32).reshape(-1, 1, 4)
@@ -1,3 +1,4 @@
+import argparse
 import cv2
 import numpy as np
 import os
@@ -76,56 +77,13 @@ def extend_lines(lines, width, height, frame_idx, prev_left_x=None, y_tolerance=
     
     return np.array([[line] for line in extended_lines], dtype=np.int32)
 
-# Load video
-video_path = "Move_1_modified_1.mov"  # Replace with your .mov file path
-cap = cv2.VideoCapture(video_path)
-
-# Check if video opened successfully
-if not cap.isOpened():
-    print("Error: Could not open video file. Check file path or codec support.")
-    exit()
-
-# Get video properties
-fps = cap.get(cv2.CAP_PROP_FPS)
-width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-print(f"Video loaded: {width}x{height}, {fps} FPS, {frame_count} frames")
-
-# Create output directory for debug frames
-os.makedirs("debug_frames", exist_ok=True)
-
-# Define codec and create VideoWriter object with error checking
-fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-out = cv2.VideoWriter('output_video_5.mp4', fourcc, fps, (width, height))
-if not out.isOpened():
-    print("Error: Could not create output video. Trying 'XVID' codec...")
-    fourcc = cv2.VideoWriter_fourcc(*'XVID')
-    out = cv2.VideoWriter('output_video_5.mp4', fourcc, fps, (width, height))
-    if not out.isOpened():
-        print("Error: Could not create output video with 'XVID' codec. Exiting.")
-        cap.release()
-        exit()
-
-# Define ROI with increased border margin (10% from top and bottom)
-border_margin = int(height * 0.10)
-roi_top = border_margin
-roi_bottom = height - border_margin
-center_x = width // 2
-center_tolerance = int(width * 0.40)
-
-frame_idx = 0
-window_open = False
-prev_lines = None
-
-while cap.isOpened():
-    ret, frame = cap.read()
-    if not ret:
-        print(f"End of video reached at frame {frame_idx}")
-        break
-
-    print(f"Processing frame {frame_idx}")
+# Function to compute the ROI with increased border margin (10% from top and bottom, 40% centre tolerance)
+def output_roi(width, height):
+    border_margin = int(height * 0.10)
+    return border_margin, height - border_margin, width // 2, int(width * 0.40)
 
+# Function to run the detection chain on a single frame and return the Hough segments
+def detect_frame(frame, roi_top, roi_bottom):
     # Convert to grayscale
     gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
 
@@ -148,55 +106,134 @@ while cap.isOpened():
     edges = mask
 
     # Detect lines using Hough Transform with refined parameters
-    lines = cv2.HoughLinesP(edges, 1, np.pi / 180, threshold=30, minLineLength=20, maxLineGap=20)
-
-    # Extend lines based on edge detection
-    lines = extend_lines(lines, width, height, frame_idx, prev_lines)
+    return cv2.HoughLinesP(edges, 1, np.pi / 180, threshold=30, minLineLength=20, maxLineGap=20)
 
-    # Create black background
-    output_frame = np.zeros((height, width, 3), dtype=np.uint8)
-
-    # Process detected lines and draw only those near center
-    if lines is not None:
-        print(f"Frame {frame_idx}: {len(lines)} lines detected")
-        for line in lines:
-            x1, y1, x2, y2 = line[0]
-            if (abs(y1 - y2) < 15 and roi_top < y1 < roi_bottom and
-                abs((x1 + x2) // 2 - center_x) < center_tolerance):
+# Function to keep the lines that are drawn: near-horizontal, below the ROI top and near the centre
+def select_lines(lines, roi):
+    roi_top, roi_bottom, center_x, center_tolerance = roi
+    selected = []
+    for line in lines:
+        x1, y1, x2, y2 = line[0]
+        if (abs(y1 - y2) < 15 and roi_top < y1 < roi_bottom and
+            abs((x1 + x2) // 2 - center_x) < center_tolerance):
+            selected.append(line)
+    return selected
+
+def main():
+    # Command-line options (headless: no window, no per-frame debug JPEGs or prints)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("video_path", nargs="?", default="Move_1_modified_1.mov")  # Replace with your .mov file path
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--debug-interval", type=int, default=None,
+                        help="save a debug JPEG and print every N frames (0 = never)")
+    args = parser.parse_args()
+    debug_interval = args.debug_interval if args.debug_interval is not None else (0 if args.headless else 1)
+
+    # Load video
+    video_path = args.video_path
+    cap = cv2.VideoCapture(video_path)
+
+    # Check if video opened successfully
+    if not cap.isOpened():
+        print("Error: Could not open video file. Check file path or codec support.")
+        return
+
+    # Get video properties
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    print(f"Video loaded: {width}x{height}, {fps} FPS, {frame_count} frames")
+
+    # Create output directory for debug frames
+    if debug_interval > 0:
+        os.makedirs("debug_frames", exist_ok=True)
+
+    # Define codec and create VideoWriter object with error checking
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    out = cv2.VideoWriter('output_video_5.mp4', fourcc, fps, (width, height))
+    if not out.isOpened():
+        print("Error: Could not create output video. Trying 'XVID' codec...")
+        fourcc = cv2.VideoWriter_fourcc(*'XVID')
+        out = cv2.VideoWriter('output_video_5.mp4', fourcc, fps, (width, height))
+        if not out.isOpened():
+            print("Error: Could not create output video with 'XVID' codec. Exiting.")
+            cap.release()
+            return
+
+    # Define ROI with increased border margin (10% from top and bottom)
+    roi = output_roi(width, height)
+    roi_top, roi_bottom = roi[:2]
+
+    frame_idx = 0
+    window_open = False
+    prev_lines = None
+
+    while cap.isOpened():
+        ret, frame = cap.read()
+        if not ret:
+            print(f"End of video reached at frame {frame_idx}")
+            break
+
+        debug = debug_interval > 0 and frame_idx % debug_interval == 0
+        if debug:
+            print(f"Processing frame {frame_idx}")
+
+        lines = detect_frame(frame, roi_top, roi_bottom)
+
+        # Extend lines based on edge detection
+        lines = extend_lines(lines, width, height, frame_idx, prev_lines)
+
+        # Create black background
+        output_frame = np.zeros((height, width, 3), dtype=np.uint8)
+
+        # Process detected lines and draw only those near center
+        if lines is not None:
+            if debug:
+                print(f"Frame {frame_idx}: {len(lines)} lines detected")
+            for line in select_lines(lines, roi):
+                x1, y1, x2, y2 = line[0]
                 cv2.line(output_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
                 cv2.putText(output_frame, f"Start: ({x1},{y1})", (x1, y1 - 10),
                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
                 cv2.putText(output_frame, f"End: ({x2},{y2})", (x2, y2 + 20),
                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
-                print(f"Line detected - Start: ({x1},{y1}), End: ({x2},{y2})")
-    else:
-        print(f"Frame {frame_idx}: No lines detected")
-
-    # Save debug frame
-    cv2.imwrite(f"debug_frames/frame_{frame_idx:04d}.jpg", output_frame)
-
-    # Display the frame with proper window management
-    if not window_open:
-        cv2.namedWindow('Line Detection', cv2.WINDOW_NORMAL)
-        window_open = True
-    cv2.imshow('Line Detection', output_frame)
-
-    # Write to output video
-    out.write(output_frame)
-    print(f"Frame {frame_idx} written to output video")
-
-    frame_idx += 1
-    prev_lines = lines
-
-    # Exit on 'q' key or end of video
-    key = cv2.waitKey(1) & 0xFF
-    if key == ord('q') or frame_idx >= frame_count:
-        print(f"Exiting at frame {frame_idx} due to user input or video end")
-        break
-
-# Release all resources
-cap.release()
-out.release()
-if window_open:
-    cv2.destroyAllWindows()
-print("Processing complete. Check 'debug_frames' folder for saved frames and 'output_video.mp4'.")
\ No newline at end of file
+                if debug:
+                    print(f"Line detected - Start: ({x1},{y1}), End: ({x2},{y2})")
+        elif debug:
+            print(f"Frame {frame_idx}: No lines detected")
+
+        # Save debug frame
+        if debug:
+            cv2.imwrite(f"debug_frames/frame_{frame_idx:04d}.jpg", output_frame)
+
+        # Display the frame with proper window management
+        if not args.headless:
+            if not window_open:
+                cv2.namedWindow('Line Detection', cv2.WINDOW_NORMAL)
+                window_open = True
+            cv2.imshow('Line Detection', output_frame)
+
+        # Write to output video
+        out.write(output_frame)
+        if debug:
+            print(f"Frame {frame_idx} written to output video")
+
+        frame_idx += 1
+        prev_lines = lines
+
+        # Exit on 'q' key or end of video
+        key = cv2.waitKey(1) & 0xFF if not args.headless else -1
+        if key == ord('q') or frame_idx >= frame_count:
+            print(f"Exiting at frame {frame_idx} due to user input or video end")
+            break
+
+    # Release all resources
+    cap.release()
+    out.release()
+    if window_open:
+        cv2.destroyAllWindows()
+    print("Processing complete. Check 'debug_frames' folder for saved frames and 'output_video.mp4'.")
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,96 @@
+import argparse
+import math
 import cv2
 import numpy as np
 import os
 import time
 import random
+import signal
+
+# Fixed y positions of the top, middle and bottom cable bands
+Y_BANDS = [270, 540, 810]
 
 # Function to enhance contrast
 def enhance_contrast(image):
     clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
     return clahe.apply(image)
 
-# Function to extend lines based on edge detection
-def extend_lines(lines, width, height, frame_idx, prev_left_x=None, y_tolerance=15, target_length=600):
-    if lines is None or len(lines) < 1:
+# Function to compute the scripted left/right x of the middle band for a frame
+def middle_band_x(frame_idx, width, target_length=600, rng=random):
+    left_x = 530
+    right_x = min(width, left_x + target_length)
+    if 50 <= frame_idx < 80:
+        pass
+    elif 80 <= frame_idx < 110:
+        shift = rng.uniform(140, 150)
+        progress = (frame_idx - 80) / 30
+        left_x += int(shift * progress)
+        right_x = min(width, left_x + target_length)
+    elif 110 <= frame_idx < 140:
+        shift = rng.uniform(140, 150)
+        progress = (140 - frame_idx) / 30
+        left_x = 530 + int(shift * progress)
+        right_x = min(width, left_x + target_length)
+    elif 140 <= frame_idx < 170:
+        pass
+    elif 170 <= frame_idx < 200:
+        shift = rng.uniform(150, 170)
+        progress = (frame_idx - 170) / 30
+        left_x += int(shift * progress)
+        right_x = min(width, left_x + target_length)
+    elif 200 <= frame_idx < 230:
+        shift = rng.uniform(150, 170)
+        progress = (230 - frame_idx) / 30
+        left_x = 530 + int(shift * progress)
+        right_x = min(width, left_x + target_length)
+    return left_x, right_x
+
+# Function to extend lines based on edge detection.
+# Works on the (N, 1, 4) HoughLinesP array directly: midpoints, band membership by
+# broadcasting against Y_BANDS and per-band mean y by bincount, so the cost stays flat
+# as the segment count grows. Output matches extend_lines_loop exactly.
+def extend_lines(lines, width, height, frame_idx, prev_left_x=None, y_tolerance=15, target_length=600, rng=random):
+    # None means nothing was scanned or found at all: hold the previous frame's lines.
+    # An empty array still runs the band logic below (top-band persistence only).
+    if lines is None:
+        return prev_left_x
+    segments = np.asarray(lines).reshape(-1, 4)
+    y_bands = np.asarray(Y_BANDS)
+    y_mids = (segments[:, 1] + segments[:, 3]) // 2
+
+    # Bands are further apart than 2 * y_tolerance, so a segment matches at most one band
+    in_band = np.abs(y_mids[:, None] - y_bands[None, :]) < y_tolerance
+    matched = in_band.any(axis=1)
+    band_idx = in_band.argmax(axis=1)[matched]
+    counts = np.bincount(band_idx, minlength=len(y_bands))
+    sums = np.bincount(band_idx, weights=y_mids[matched], minlength=len(y_bands))
+
+    extended_lines = []
+    for i in range(len(y_bands)):
+        if counts[i] == 0:
+            if prev_left_x is not None and i == 0:
+                extended_lines.append([530, Y_BANDS[i], 1130, Y_BANDS[i]])
+            continue
+        y_mid = int(sums[i] / counts[i])
+        if i == 1:
+            left_x, right_x = middle_band_x(frame_idx, width, target_length, rng)
+        else:
+            left_x = 530
+            right_x = min(width, left_x + target_length)
+        extended_lines.append([left_x, y_mid, right_x, y_mid])
+
+    return np.array([[line] for line in extended_lines], dtype=np.int32)
+
+# Original per-segment loop version of extend_lines, kept as the reference implementation
+def extend_lines_loop(lines, width, height, frame_idx, prev_left_x=None, y_tolerance=15, target_length=600, rng=random):
+    # None means nothing was scanned or found at all: hold the previous frame's lines.
+    # An empty array still runs the band logic below (top-band persistence only).
+    if lines is None:
         return prev_left_x
     extended_lines = []
     lines = sorted(lines, key=lambda x: x[0][1])
     
-    y_bands = [270, 540, 810]
+    y_bands = Y_BANDS
     band_lines = [[] for _ in range(3)]
     
     for line in lines:
@@ -47,24 +121,24 @@ def extend_lines(lines, width, height, frame_idx, prev_left_x=None, y_tolerance=
                 if 50 <= frame_idx < 80:
                     pass
                 elif 80 <= frame_idx < 110:
-                    shift = random.uniform(140, 150)
+                    shift = rng.uniform(140, 150)
                     progress = (frame_idx - 80) / 30
                     left_x += int(shift * progress)
                     right_x = min(width, left_x + target_length)
                 elif 110 <= frame_idx < 140:
-                    shift = random.uniform(140, 150)
+                    shift = rng.uniform(140, 150)
                     progress = (140 - frame_idx) / 30
                     left_x = 530 + int(shift * progress)
                     right_x = min(width, left_x + target_length)
                 elif 140 <= frame_idx < 170:
                     pass
                 elif 170 <= frame_idx < 200:
-                    shift = random.uniform(150, 170)
+                    shift = rng.uniform(150, 170)
                     progress = (frame_idx - 170) / 30
                     left_x += int(shift * progress)
                     right_x = min(width, left_x + target_length)
                 elif 200 <= frame_idx < 230:
-                    shift = random.uniform(150, 170)
+                    shift = rng.uniform(150, 170)
                     progress = (230 - frame_idx) / 30
                     left_x = 530 + int(shift * progress)
                     right_x = min(width, left_x + target_length)
@@ -72,66 +146,10 @@ def extend_lines(lines, width, height, frame_idx, prev_left_x=None, y_tolerance=
     
     return np.array([[line] for line in extended_lines], dtype=np.int32)
 
-# Load video
-video_path = "Move_1_modified_1.mov"  # Replace with your .mov file path
-cap = cv2.VideoCapture(video_path)
-
-if not cap.isOpened():
-    print("Error: Could not open video file. Check file path or codec support.")
-    exit()
-
-fps = cap.get(cv2.CAP_PROP_FPS)
-width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-print(f"Video loaded: {width}x{height}, {fps} FPS, {frame_count} frames")
-
-# Create output directories
-os.makedirs("debug_frames", exist_ok=True)
-os.makedirs("intermediate_videos", exist_ok=True)
-
-# Define codecs and create VideoWriter objects
-fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-out_gray = cv2.VideoWriter('intermediate_videos/gray_output.mp4', fourcc, fps, (width, height))
-out_contrast = cv2.VideoWriter('intermediate_videos/contrast_output.mp4', fourcc, fps, (width, height))
-out_edges = cv2.VideoWriter('intermediate_videos/edges_output.mp4', fourcc, fps, (width, height))
-out_lines = cv2.VideoWriter('intermediate_videos/lines_output.mp4', fourcc, fps, (width, height))
-out_final = cv2.VideoWriter('output_video_6.mp4', fourcc, fps, (width, height))
-
-if not all([out_gray.isOpened(), out_contrast.isOpened(), out_edges.isOpened(), out_lines.isOpened(), out_final.isOpened()]):
-    print("Error: Could not create one or more output videos. Trying 'XVID' codec...")
-    fourcc = cv2.VideoWriter_fourcc(*'XVID')
-    out_gray = cv2.VideoWriter('intermediate_videos/gray_output.mp4', fourcc, fps, (width, height))
-    out_contrast = cv2.VideoWriter('intermediate_videos/contrast_output.mp4', fourcc, fps, (width, height))
-    out_edges = cv2.VideoWriter('intermediate_videos/edges_output.mp4', fourcc, fps, (width, height))
-    out_lines = cv2.VideoWriter('intermediate_videos/lines_output.mp4', fourcc, fps, (width, height))
-    out_final = cv2.VideoWriter('output_video_6.mp4', fourcc, fps, (width, height))
-    if not all([out_gray.isOpened(), out_contrast.isOpened(), out_edges.isOpened(), out_lines.isOpened(), out_final.isOpened()]):
-        print("Error: Could not create output videos with 'XVID' codec. Exiting.")
-        cap.release()
-        exit()
-
-border_margin = int(height * 0.10)
-roi_top = border_margin
-roi_bottom = height - border_margin
-center_x = width // 2
-center_tolerance = int(width * 0.40)
-
-frame_idx = 0
-window_open = False
-prev_lines = None
-
-while cap.isOpened():
-    ret, frame = cap.read()
-    if not ret:
-        print(f"End of video reached at frame {frame_idx}")
-        break
-
-    print(f"Processing frame {frame_idx}")
-
+# Function to run the detection chain on a single frame
+def detect_frame(frame):
     # Convert to grayscale
     gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    out_gray.write(cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR))
 
     # Apply adaptive thresholding
     thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
@@ -139,66 +157,360 @@ while cap.isOpened():
 
     # Enhance contrast
     contrast = enhance_contrast(thresh)
-    out_contrast.write(cv2.cvtColor(contrast, cv2.COLOR_GRAY2BGR))
 
     # Apply edge detection
     mean_intensity = np.mean(gray)
     low_threshold = max(20, int(mean_intensity * 0.05))
     high_threshold = max(60, int(mean_intensity * 0.15))
     edges = cv2.Canny(contrast, low_threshold, high_threshold, apertureSize=3)
-    out_edges.write(cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR))
 
     # Detect lines using Hough Transform
     lines = cv2.HoughLinesP(edges, 1, np.pi / 180, threshold=30, minLineLength=20, maxLineGap=20)
+    return gray, contrast, edges, lines
 
-    # Extend lines
-    lines = extend_lines(lines, width, height, frame_idx, prev_lines)
-    line_frame = np.zeros((height, width, 3), dtype=np.uint8)
+# Function to compute the output ROI (10% border, 40% centre tolerance)
+def output_roi(width, height):
+    border_margin = int(height * 0.10)
+    return border_margin, height - border_margin, width // 2, int(width * 0.40)
+
+# Function to get a blank BGR canvas, clearing `out` in place when one is supplied
+def blank_canvas(width, height, out=None):
+    if out is None:
+        return np.zeros((height, width, 3), dtype=np.uint8)
+    out.fill(0)
+    return out
+
+# Function to draw the extended lines on a blank frame
+def draw_lines(lines, width, height, out=None):
+    line_frame = blank_canvas(width, height, out)
     if lines is not None:
         for line in lines:
             x1, y1, x2, y2 = line[0]
             cv2.line(line_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-    out_lines.write(line_frame)
+    return line_frame
+
+# Function to keep the lines that are drawn: near-horizontal, below the ROI top and near the centre
+def select_lines(lines, roi):
+    roi_top, roi_bottom, center_x, center_tolerance = roi
+    selected = []
+    for line in lines:
+        x1, y1, x2, y2 = line[0]
+        if (abs(y1 - y2) < 15 and roi_top < y1 < roi_bottom and
+            abs((x1 + x2) // 2 - center_x) < center_tolerance):
+            selected.append(line)
+    return selected
 
-    # Final output with coordinates
-    output_frame = np.zeros((height, width, 3), dtype=np.uint8)
+# Function to draw the final output frame with coordinates
+def draw_output(lines, width, height, frame_idx, roi, verbose=True, out=None):
+    output_frame = blank_canvas(width, height, out)
     if lines is not None:
-        print(f"Frame {frame_idx}: {len(lines)} lines detected")
-        for line in lines:
+        if verbose:
+            print(f"Frame {frame_idx}: {len(lines)} lines detected")
+        for line in select_lines(lines, roi):
             x1, y1, x2, y2 = line[0]
-            if (abs(y1 - y2) < 15 and roi_top < y1 < roi_bottom and
-                abs((x1 + x2) // 2 - center_x) < center_tolerance):
-                cv2.line(output_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                cv2.putText(output_frame, f"Start: ({x1},{y1})", (x1, y1 - 10),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
-                cv2.putText(output_frame, f"End: ({x2},{y2})", (x2, y2 + 20),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
+            cv2.line(output_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            cv2.putText(output_frame, f"Start: ({x1},{y1})", (x1, y1 - 10),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
+            cv2.putText(output_frame, f"End: ({x2},{y2})", (x2, y2 + 20),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
+            if verbose:
                 print(f"Line detected - Start: ({x1},{y1}), End: ({x2},{y2})")
-    else:
+    elif verbose:
         print(f"Frame {frame_idx}: No lines detected")
+    return output_frame
+
+# Function to create a VideoWriter, falling back to XVID if mp4v is unavailable
+def open_writer(path, fps, width, height, is_color=True):
+    for codec in ('mp4v', 'XVID'):
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*codec), fps, (width, height), isColor=is_color)
+        if writer.isOpened():
+            return writer
+        writer.release()
+        print(f"Error: Could not create {path} with '{codec}' codec.")
+    return None
+
+# Function to create the final output VideoWriter (intermediate stages are opt-in taps, see Video_Taps.py)
+def open_writers(fps, width, height, final_path='output_video_6.mp4'):
+    writer = open_writer(final_path, fps, width, height)
+    return {'final': writer} if writer is not None else None
+
+# Function to decide whether a frame gets debug output (JPEG + prints); 0 disables it
+def is_debug_frame(frame_idx, debug_interval):
+    return debug_interval > 0 and frame_idx % debug_interval == 0
+
+# Function to run the original single-threaded loop.
+# headless skips the window and key polling; debug_interval samples the per-frame JPEG
+# dumps and prints (1 = every frame as before, 0 = never).
+# estimator (Calibration.BendAngleEstimator) turns the middle band into a bend angle per frame.
+# stages (Frame_Cache.FrameCache.stages) replaces decoding and the chain up to Canny with the
+# cached stacks, so only Hough and what follows it run per frame.
+def run_serial(cap, writers, width, height, frame_count, headless=False, debug_interval=1, engine_options=None,
+               measurements=None, taps=None, estimator=None, stages=None):
+    from Sensing_Engine import SensingEngine
+    engine = SensingEngine(width, height, **(engine_options or {}))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    # Live sources (Frame_Sources.LiveSource) time each frame from capture to result
+    mark_done = getattr(cap, 'mark_done', None)
+    timer = engine.timer
+    frame_idx = 0
+    window_open = False
+
+    while cap.isOpened():
+        timer.frame(frame_idx)
+        if stages is not None:
+            ret = frame_idx < len(stages["edges"])
+        else:
+            with timer("read"):
+                ret, frame = cap.read()
+        if not ret:
+            print(f"End of video reached at frame {frame_idx}")
+            break
+
+        debug = is_debug_frame(frame_idx, debug_interval)
+        if debug:
+            print(f"Processing frame {frame_idx}")
+
+        # Detect and extend lines (engine keeps prev_lines and the stage buffers)
+        if stages is not None:
+            lines = engine.process_edges(stages["edges"][frame_idx])
+            if taps:
+                engine.load_stages(stages, frame_idx)
+        else:
+            lines = engine.process(frame)
+        if mark_done is not None:
+            latency = mark_done()
+            if debug:
+                print(f"Frame {frame_idx}: capture-to-result latency {latency * 1000:.1f} ms, "
+                      f"{cap.dropped} frames dropped so far")
+        angle = math.nan
+        if estimator is not None:
+            angle = estimator.update(lines)
+            if debug:
+                print(f"Frame {frame_idx}: displacement {estimator.displacement} px, bend angle {angle:.2f} deg")
+        if measurements is not None:
+            timestamp = cap.timestamp if mark_done is not None else frame_idx / fps
+            with timer("measurements"):
+                measurements.append(frame_idx, timestamp, lines, angle)
+        if taps:
+            from Video_Taps import write_taps
+            with timer("taps"):
+                write_taps(taps, engine, frame_idx, lines)
+
+        # Final output with coordinates
+        with timer("draw"):
+            output_frame = engine.render_output(lines, frame_idx, verbose=debug)
+
+        if debug:
+            with timer("imwrite"):
+                cv2.imwrite(f"debug_frames/frame_{frame_idx:04d}.jpg", output_frame)
+        if not headless:
+            if not window_open:
+                cv2.namedWindow('Line Detection', cv2.WINDOW_NORMAL)
+                window_open = True
+            with timer("display"):
+                cv2.imshow('Line Detection', output_frame)
+        with timer("encode"):
+            writers['final'].write(output_frame)
+
+        if debug:
+            print(f"Frame {frame_idx} written to output video")
+        frame_idx += 1
+
+        key = cv2.waitKey(1) & 0xFF if not headless else -1
+        if key == ord('q') or frame_idx >= frame_count:
+            print(f"Exiting at frame {frame_idx} due to user input or video end")
+            break
+
+    if window_open:
+        cv2.destroyAllWindows()
+    if engine.summary():
+        print(engine.summary())
+    return frame_idx
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect and track the cable lines in a video.")
+    parser.add_argument("video_path", nargs="?", default="Move_1_modified_1.mov",  # Replace with your .mov file path
+                        help="video file, or a camera index such as 0 for live capture")
+    parser.add_argument("--live", action="store_true",
+                        help="latest-frame capture: play a file back at its native fps as a stand-in camera")
+    parser.add_argument("--ffmpeg", action="store_true",
+                        help="decode the video straight to gray through an ffmpeg pipe instead of cv2.VideoCapture")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="run capture, detection and output as separate threaded stages")
+    parser.add_argument("--queue-size", type=int, default=8,
+                        help="maximum frames buffered between pipeline stages")
+    parser.add_argument("--headless", action="store_true",
+                        help="no window and no per-frame debug JPEGs or prints")
+    parser.add_argument("--debug-interval", type=int, default=None,
+                        help="save a debug JPEG and print every N frames (0 = never; "
+                             "default 1, or 0 with --headless)")
+    parser.add_argument("--band-strips", action="store_true",
+                        help="only process horizontal strips around the three cable bands")
+    parser.add_argument("--detector", choices=("hough", "profile"), default="hough",
+                        help="line detector: Canny + HoughLinesP, or sub-pixel band intensity profiles")
+    parser.add_argument("--tracker", action="store_true",
+                        help="alpha-beta band tracker (smoothing, gap bridging, outlier rejection) "
+                             "instead of the scripted band positions")
+    parser.add_argument("--search-window", action="store_true",
+                        help="once the bands are found, run the Hough chain only in small windows around them "
+                             "(full scan when a band is lost)")
+    parser.add_argument("--pyramid", type=int, choices=(0, 1, 2), default=0,
+                        help="find lines on a 2x (1) or 4x (2) reduced frame, refine them at full resolution")
+    parser.add_argument("--skip-static", action="store_true",
+                        help="reuse the previous detection when the detector's thresholded (or edge) image "
+                             "is unchanged")
+    parser.add_argument("--measurements", metavar="PATH",
+                        help="write per-frame line measurements to a .csv, .npy or .parquet log")
+    parser.add_argument("--taps", default="",
+                        help="intermediate stage videos to record: comma list of gray,contrast,edges,lines or 'all'")
+    parser.add_argument("--tap-every", type=int, default=1, help="keep only every Nth frame in the tap videos")
+    parser.add_argument("--calibration", metavar="PATH",
+                        help="calibration.json from Correlation_Performance_2.py: report the bend angle per frame")
+    parser.add_argument("--angle-model", choices=("linear", "quadratic", "sine"),
+                        help="calibration model to use (default: the one selected in the artifact)")
+    parser.add_argument("--out-of-domain", choices=("nan", "clip", "error"), default="nan",
+                        help="what to report for displacements beyond the calibrated range")
+    parser.add_argument("--cache", metavar="DIR",
+                        help="keep the decoded and preprocessed frames (gray, thresh, contrast, edges) in DIR "
+                             "and reuse them on later runs of the same video")
+    parser.add_argument("--cache-size", type=float, default=20.0, help="cache size limit in GB (least recently used "
+                                                                      "stacks are evicted)")
+    parser.add_argument("--timing", action="store_true",
+                        help="time every pipeline stage and print a table at exit (and on SIGUSR1 while running)")
+    parser.add_argument("--timing-json", metavar="PATH", help="also write the stage timings to a JSON file")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="cProfile the detection loop into a .prof file (detection thread only with --pipeline)")
+    parser.add_argument("--profile-frames", metavar="START:COUNT", default="0:",
+                        help="frames to profile, e.g. 100:50 (default: from frame 0 to the end)")
+    args = parser.parse_args()
+    if args.search_window and args.detector != "hough":
+        parser.error("--search-window works with the hough detector only")
+    if args.pyramid and (args.detector != "hough" or args.band_strips):
+        parser.error("--pyramid works with the hough detector on full frames (not --band-strips)")
+    if args.skip_static and (args.search_window or args.pyramid):
+        parser.error("--skip-static cannot be combined with --search-window or --pyramid")
+    if args.cache and (args.band_strips or args.detector != "hough" or args.search_window or args.pyramid
+                       or args.skip_static or args.live or args.pipeline or args.video_path.isdigit()):
+        parser.error("--cache works with the full-frame hough chain on a video file "
+                     "(not with --band-strips, --detector profile, --search-window, --pyramid, --skip-static, "
+                     "--live, --pipeline or a camera)")
+    if args.ffmpeg and (args.live or args.video_path.isdigit() or args.cache):
+        parser.error("--ffmpeg decodes a video file; it cannot be combined with --live, a camera or --cache")
+    if args.debug_interval is None:
+        args.debug_interval = 0 if args.headless else 1
+    engine_options = {"band_strips": args.band_strips, "detector": args.detector, "tracker": args.tracker,
+                      "search_window": args.search_window, "skip_static": args.skip_static,
+                      "pyramid_levels": args.pyramid}
+
+    # Stage timing is off unless asked for; the engine then uses Stage_Timer.NULL_TIMER
+    timer = None
+    if args.timing or args.timing_json or args.profile:
+        from Stage_Timer import StageTimer
+        try:
+            start, _, count = args.profile_frames.partition(":")
+            profile_start, profile_frames = int(start or 0), int(count) if count else None
+        except ValueError:
+            parser.error("--profile-frames must look like START:COUNT, e.g. 100:50")
+        timer = StageTimer(profile_path=args.profile, profile_start=profile_start, profile_frames=profile_frames)
+        engine_options["timer"] = timer
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, lambda signum, stack: print(timer.table(), flush=True))
+
+    # The lookup table is built once here, so per-frame inference is a table interpolation
+    estimator = None
+    if args.calibration:
+        from Calibration import AngleLookup, BendAngleEstimator, load_calibration
+        lookup = AngleLookup(load_calibration(args.calibration), args.angle_model, out_of_domain=args.out_of_domain)
+        estimator = BendAngleEstimator(lookup, band_y=Y_BANDS[1])
+        print(f"Calibration loaded: {lookup.model} model, 0..{lookup.d_max:.1f} px")
+
+    # Load video (or open the camera)
+    from Frame_Sources import open_source, source_frame_count
+    try:
+        # Pipeline queues hold frames, so they need a fresh array per frame
+        cap = open_source(args.video_path, live=args.live, ffmpeg=args.ffmpeg, reuse=not args.pipeline)
+    except IOError as exc:
+        print(f"Error: {exc}")
+        exit()
+    live = hasattr(cap, 'mark_done')
+    if live and args.pipeline:
+        print("Error: live capture keeps only the newest frame; it cannot be combined with --pipeline queues.")
+        exit()
+
+    if not cap.isOpened():
+        print("Error: Could not open video file. Check file path or codec support.")
+        exit()
+
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    frame_count = source_frame_count(cap)
+    print(f"Video loaded: {width}x{height}, {fps} FPS, {frame_count if frame_count < 2 ** 62 else 'unbounded'} frames")
+
+    # Create output directories
+    if args.debug_interval > 0:
+        os.makedirs("debug_frames", exist_ok=True)
+
+    writers = open_writers(fps, width, height)
+    if writers is None:
+        print("Error: Could not create output videos. Exiting.")
+        cap.release()
+        exit()
+
+    taps = {}
+    if args.taps:
+        from Video_Taps import parse_taps, open_taps
+        taps = open_taps(parse_taps(args.taps), fps, width, height, every=args.tap_every)
+
+    measurements = None
+    if args.measurements:
+        from Measurement_Log import MeasurementLog
+        measurements = MeasurementLog(args.measurements)
+
+    stages = None
+    if args.cache:
+        from Frame_Cache import FrameCache, engine_stage_params
+        cache = FrameCache(args.cache, max_bytes=int(args.cache_size * 2 ** 30))
+        stages = cache.stages(args.video_path, engine_stage_params())
+        print(cache.summary())
+
+    if args.pipeline:
+        from Sensing_Pipeline import run_pipeline
+        run_pipeline(cap, writers, width, height, frame_count, queue_size=args.queue_size,
+                     debug_interval=args.debug_interval, engine_options=engine_options,
+                     measurements=measurements, taps=taps, estimator=estimator)
+    else:
+        run_serial(cap, writers, width, height, frame_count, args.headless, args.debug_interval,
+                   engine_options, measurements, taps, estimator, stages)
+
+    if timer is not None:
+        timer.stop_profile()
+        if args.timing or args.timing_json:
+            print(timer.table())
+        if args.timing_json:
+            timer.write_json(args.timing_json)
+            print(f"Stage timings written to {args.timing_json}")
+        if args.profile and timer.profiled:
+            print(timer.profile_summary())
+            print(f"Profile written to {args.profile} (open with python -m pstats or snakeviz)")
+    if measurements is not None:
+        measurements.close()
+        print(f"{measurements.rows} measurements written to {args.measurements}")
+    if live:
+        summary = cap.summary()
+        print(f"Live capture: {summary['processed']} frames processed, {summary['dropped']} dropped")
+        if summary['processed']:
+            print(f"Capture-to-result latency: mean {summary['latency_mean_ms']:.1f} ms, "
+                  f"p50 {summary['latency_p50_ms']:.1f} ms, p95 {summary['latency_p95_ms']:.1f} ms, "
+                  f"max {summary['latency_max_ms']:.1f} ms")
+    cap.release()
+    for writer in writers.values():
+        writer.release()
+    if taps:
+        from Video_Taps import close_taps
+        close_taps(taps)
+        print("Check 'intermediate_videos' folder for the tapped step-wise videos.")
+    print("Processing complete. Check 'output_video_6.mp4'.")
 
-    cv2.imwrite(f"debug_frames/frame_{frame_idx:04d}.jpg", output_frame)
-    if not window_open:
-        cv2.namedWindow('Line Detection', cv2.WINDOW_NORMAL)
-        window_open = True
-    cv2.imshow('Line Detection', output_frame)
-    out_final.write(output_frame)
-
-    print(f"Frame {frame_idx} written to all output videos")
-    frame_idx += 1
-    prev_lines = lines
-
-    key = cv2.waitKey(1) & 0xFF
-    if key == ord('q') or frame_idx >= frame_count:
-        print(f"Exiting at frame {frame_idx} due to user input or video end")
-        break
-
-cap.release()
-out_gray.release()
-out_contrast.release()
-out_edges.release()
-out_lines.release()
-out_final.release()
-if window_open:
-    cv2.destroyAllWindows()
-print("Processing complete. Check 'intermediate_videos' folder for step-wise videos and 'output_video.mp4'.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,459 @@
+import random
+
+import cv2
+import numpy as np
+
+from Band_Tracker import BandTracker, band_measurements, estimate_measurements
+from Profile_Detector import ProfileDetector
+from Sensing_5 import Y_BANDS, extend_lines, draw_lines, draw_output, output_roi
+from Stage_Timer import NULL_TIMER
+
+# Returned by the chain when is_static found its input unchanged (detect then reuses the last detection)
+STATIC = object()
+
+# Class holding the Sensing_5 detection chain with all per-frame buffers preallocated.
+# The CLAHE object and the gray/thresh/contrast/edges images are created once and every
+# OpenCV call writes into them through dst=, so steady-state frames only allocate the
+# (small) HoughLinesP result and the extended line array.
+# The stage buffers are overwritten by the next frame; copy them if they must outlive it.
+# The optional modes are described on the methods implementing them: band_strips on
+# detect_strips, detector='profile' on detect, tracker on extend, search_window on
+# detect_windows, skip_static on is_static and pyramid_levels on detect_pyramid.
+class SensingEngine:
+    # timer is a Stage_Timer.StageTimer that times every stage of the chain (cvtColor,
+    # adaptiveThreshold, clahe, canny, hough, pyrDown, static_check, profile_detector, tracker,
+    # extend_lines). The default NULL_TIMER records nothing. The same timer is shared with the
+    # read/draw/write stages of Sensing_5 and Sensing_Pipeline through engine_options.
+    def __init__(self, width, height, clip_limit=3.0, tile_grid_size=(8, 8),
+                 hough_threshold=30, min_line_length=20, max_line_gap=20, rng=random,
+                 band_strips=False, y_tolerance=15, strip_margin=6, detector="hough", peak_fit="parabola",
+                 tracker=False, search_window=False, window_rows=16, window_margin=40, max_widen=4, rescan_interval=30,
+                 skip_static=False, pyramid_levels=0, timer=NULL_TIMER):
+        if detector not in ("hough", "profile"):
+            raise ValueError(f"detector must be 'hough' or 'profile', not {detector!r}")
+        if search_window and detector != "hough":
+            raise ValueError("search_window needs the 'hough' detector (the profile detector already reads only the bands)")
+        if pyramid_levels and (detector != "hough" or band_strips):
+            raise ValueError("pyramid_levels needs the 'hough' detector on full frames (not band_strips)")
+        if skip_static and (search_window or pyramid_levels):
+            raise ValueError("skip_static cannot be combined with search_window or pyramid_levels (their "
+                             "detections depend on window state as well as on the frame)")
+        self.width = width
+        self.height = height
+        self.hough_threshold = hough_threshold
+        self.min_line_length = min_line_length
+        self.max_line_gap = max_line_gap
+        self.rng = rng
+        self.timer = timer
+        self.clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid_size)
+        self.roi = output_roi(width, height)
+
+        # Stage buffers
+        self.gray = np.empty((height, width), dtype=np.uint8)
+        self.thresh = np.empty((height, width), dtype=np.uint8)
+        self.contrast = np.empty((height, width), dtype=np.uint8)
+        self.edges = np.empty((height, width), dtype=np.uint8)
+
+        # Rendering buffers
+        self.bgr = np.empty((height, width, 3), dtype=np.uint8)
+        self.line_frame = np.empty((height, width, 3), dtype=np.uint8)
+        self.output_frame = np.empty((height, width, 3), dtype=np.uint8)
+
+        self.profile = None
+        if detector == "profile":
+            for image in (self.gray, self.thresh, self.contrast, self.edges):
+                image.fill(0)
+            self.profile = ProfileDetector(width, height, Y_BANDS, y_tolerance + strip_margin, peak_fit,
+                                           min_length=min_line_length, max_gap=max_line_gap, gray=self.gray)
+
+        self.y_tolerance = y_tolerance
+        self.search_window = search_window
+        self.window_rows = window_rows
+        self.window_margin = window_margin
+        self.max_widen = max_widen
+        self.rescan_interval = rescan_interval
+        self.skip_static = skip_static
+        if skip_static:
+            # The stage images of the last detected frame, compared by is_static
+            self.static_stage = "gray" if detector == "profile" else "thresh"
+            self.static_reference = np.zeros((height, width), dtype=np.uint8)
+        self.pyramid_levels = pyramid_levels
+        if pyramid_levels:
+            # Gray image of every pyramid level, and the chain buffers of the coarsest one
+            self.levels = []
+            level_h, level_w = height, width
+            for _ in range(pyramid_levels):
+                level_h, level_w = (level_h + 1) // 2, (level_w + 1) // 2
+                self.levels.append(np.empty((level_h, level_w), dtype=np.uint8))
+            self.coarse_thresh = np.empty((level_h, level_w), dtype=np.uint8)
+            self.coarse_contrast = np.empty((level_h, level_w), dtype=np.uint8)
+            self.coarse_edges = np.empty((level_h, level_w), dtype=np.uint8)
+            self.pyramid_stats = {"frames": 0, "bands": 0, "refined": 0}
+            for image in (self.gray, self.thresh, self.contrast, self.edges):
+                image.fill(0)
+        self.tracker = None
+        if tracker:
+            self.tracker = BandTracker(Y_BANDS, y_tolerance, **(tracker if isinstance(tracker, dict) else {}))
+
+        self.band_strips = band_strips
+        self.strips = []
+        if band_strips:
+            # A strip must hold every segment whose midpoint is within y_tolerance of the band,
+            # plus a few rows so the 11x11 threshold and Canny kernels see real neighbours
+            half = y_tolerance + strip_margin
+            self.strips = [(max(0, band - half), min(height, band + half)) for band in Y_BANDS]
+            for image in (self.gray, self.thresh, self.contrast, self.edges):
+                image.fill(0)
+        if band_strips or search_window or pyramid_levels:
+            # One CLAHE tile row per strip/window keeps tiles about as wide as on the full frame
+            self.strip_clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=(tile_grid_size[0], 1))
+
+        self.reset()
+
+    # Function to forget the persistence state (start of a new video)
+    def reset(self):
+        self.frame_idx = 0
+        self.prev_lines = None
+        if self.tracker is not None:
+            self.tracker.reset()
+        # Search windows: (x_left, y, x_right) of each locked band or None, and widening steps
+        self.windows = [None] * len(Y_BANDS)
+        self.widen = [0] * len(Y_BANDS)
+        self.since_scan = 0
+        self.search_stats = {"frames": 0, "windowed": 0, "scans": 0, "fallbacks": 0, "widened": 0}
+        # Static-frame short-circuit: the last raw detection and whether it is a valid reference
+        self.last_detection = None
+        self.has_reference = False
+        self.static_stats = {"frames": 0, "skipped": 0}
+
+    # Function to run preprocessing and Hough on one BGR frame, returning the raw segments.
+    # detector='profile' replaces the threshold/CLAHE/Canny/Hough chain with
+    # Profile_Detector.ProfileDetector on the band strips: one sub-pixel mark per band from
+    # row and column intensity profiles (the estimates are in self.profile.estimates). Only the
+    # gray stage buffer is filled in that mode.
+    def detect(self, frame):
+        if self.skip_static:
+            self.static_stats["frames"] += 1
+        if self.profile is not None:
+            if self.skip_static:
+                with self.timer("cvtColor"):
+                    for y0, y1 in self.profile.strips:
+                        self.load_gray(frame[y0:y1], self.gray[y0:y1])
+                if self.is_static():
+                    return self.last_detection
+                # The strips are already gray; the detector only reads self.gray there
+                frame = self.gray
+            with self.timer("profile_detector"):
+                lines = self.profile.detect(frame)
+        elif self.search_window:
+            lines = self.detect_windows(frame)
+        else:
+            lines = self.scan(frame)
+        if lines is not STATIC:
+            self.last_detection = lines
+            self.has_reference = True
+        return self.last_detection
+
+    # Function to tell whether the detector's input stage (thresh, or gray for the profile
+    # detector) equals the one of the last detected frame, in which case the rest of the chain
+    # would give the last detection again: everything after adaptiveThreshold is a deterministic
+    # function of its output (the Canny thresholds clamp to 20/60 for any 8-bit frame and
+    # HoughLinesP seeds its own RNG), and the profile detector reads only the gray strips. Only
+    # exact equality is accepted, since one flipped pixel can add or split a segment; with
+    # sensor noise nearly every frame differs. A changed image becomes the new reference.
+    # skip_static=True works with the Hough chain on full frames or band strips and with the
+    # profile detector, so the output series is exactly the one without skipping.
+    def is_static(self):
+        image = getattr(self, self.static_stage)
+        with self.timer("static_check"):
+            static = self.has_reference and cv2.norm(image, self.static_reference, cv2.NORM_INF) == 0
+            if not static:
+                np.copyto(self.static_reference, image)
+        if static:
+            self.static_stats["skipped"] += 1
+        return static
+
+    # Function to write the gray version of a frame (or frame region) into a stage-buffer view.
+    # Frames may be BGR or already gray (Frame_Sources.FFmpegSource decodes straight to gray);
+    # a gray frame is copied instead of being converted.
+    def load_gray(self, frame, dst):
+        if frame.ndim == 2:
+            np.copyto(dst, frame)
+        else:
+            cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=dst)
+
+    # Function to run the detection chain on the full frame (or on the band strips)
+    def scan(self, frame):
+        if self.pyramid_levels:
+            return self.detect_pyramid(frame)
+        if self.band_strips:
+            return self.detect_strips(frame)
+        timer = self.timer
+        with timer("cvtColor"):
+            self.load_gray(frame, self.gray)
+        with timer("adaptiveThreshold"):
+            cv2.adaptiveThreshold(self.gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                  cv2.THRESH_BINARY_INV, 11, 2, dst=self.thresh)
+        if self.skip_static and self.is_static():
+            return STATIC
+        with timer("clahe"):
+            self.clahe.apply(self.thresh, dst=self.contrast)
+
+        with timer("canny"):
+            mean_intensity = cv2.mean(self.gray)[0]
+            low_threshold = max(20, int(mean_intensity * 0.05))
+            high_threshold = max(60, int(mean_intensity * 0.15))
+            cv2.Canny(self.contrast, low_threshold, high_threshold, edges=self.edges, apertureSize=3)
+
+        with timer("hough"):
+            return self.hough(self.edges)
+
+    # Function to run HoughLinesP with the engine's parameters on a full-frame edge image
+    def hough(self, edges):
+        return cv2.HoughLinesP(edges, 1, np.pi / 180, threshold=self.hough_threshold,
+                               minLineLength=self.min_line_length, maxLineGap=self.max_line_gap)
+
+    # Function to run the detection chain on each band strip and map segments to frame rows.
+    # With band_strips=True only horizontal strips around Y_BANDS are processed. Each strip is
+    # a row-slice view of the full-size buffers, so nothing is copied and the stage buffers
+    # stay valid full frames (black outside the strips) for the intermediate videos.
+    def detect_strips(self, frame):
+        regions = [(y0, y1, 0, self.width) for y0, y1 in self.strips]
+        # Outside the strips thresh stays black, so the full buffer can be compared
+        canny_thresholds = self.threshold_regions(frame, regions)
+        if self.skip_static and self.is_static():
+            return STATIC
+        self.edge_regions(regions, *canny_thresholds)
+        found = [lines for lines in self.hough_regions(regions) if lines is not None]
+        if not found:
+            # The full frame nearly always yields some off-band segments, so "nothing in
+            # the strips" maps to an empty detection rather than None (which holds state)
+            return np.empty((0, 1, 4), dtype=np.int32)
+        return np.concatenate(found)
+
+    # Function to run the detection chain on (y0, y1, x0, x1) regions of the frame, written into
+    # the matching views of the stage buffers; returns the segments of each region in frame
+    # coordinates (None for a region without segments)
+    def detect_regions(self, frame, regions):
+        if not regions:
+            return []
+        self.edge_regions(regions, *self.threshold_regions(frame, regions))
+        return self.hough_regions(regions)
+
+    # Function to fill the gray and thresh buffers in each region; returns the Canny thresholds
+    def threshold_regions(self, frame, regions):
+        timer = self.timer
+        means = []
+        with timer("cvtColor"):
+            for y0, y1, x0, x1 in regions:
+                self.load_gray(frame[y0:y1, x0:x1], self.gray[y0:y1, x0:x1])
+                means.append(cv2.mean(self.gray[y0:y1, x0:x1])[0])
+        # Canny thresholds clamp to 20/60 for any 8-bit mean, so the region mean is equivalent
+        mean_intensity = float(np.mean(means))
+        low_threshold = max(20, int(mean_intensity * 0.05))
+        high_threshold = max(60, int(mean_intensity * 0.15))
+        with timer("adaptiveThreshold"):
+            for y0, y1, x0, x1 in regions:
+                cv2.adaptiveThreshold(self.gray[y0:y1, x0:x1], 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                      cv2.THRESH_BINARY_INV, 11, 2, dst=self.thresh[y0:y1, x0:x1])
+        return low_threshold, high_threshold
+
+    # Function to fill the contrast and edges buffers in each region from its thresh
+    def edge_regions(self, regions, low_threshold, high_threshold):
+        timer = self.timer
+        for y0, y1, x0, x1 in regions:
+            with timer("clahe"):
+                self.strip_clahe.apply(self.thresh[y0:y1, x0:x1], dst=self.contrast[y0:y1, x0:x1])
+            with timer("canny"):
+                cv2.Canny(self.contrast[y0:y1, x0:x1], low_threshold, high_threshold,
+                          edges=self.edges[y0:y1, x0:x1], apertureSize=3)
+
+    # Function to run HoughLinesP on the edges of each region; returns the segments of each
+    # region in frame coordinates (None for a region without segments)
+    def hough_regions(self, regions):
+        found = []
+        for y0, y1, x0, x1 in regions:
+            with self.timer("hough"):
+                lines = cv2.HoughLinesP(self.edges[y0:y1, x0:x1], 1, np.pi / 180, threshold=self.hough_threshold,
+                                        minLineLength=self.min_line_length, maxLineGap=self.max_line_gap)
+            if lines is not None:
+                lines[:, :, 0::2] += x0
+                lines[:, :, 1::2] += y0
+            found.append(lines)
+        return found
+
+    # Function to find candidate segments on the reduced frame and refine them at full resolution.
+    # pyramid_levels=1 or 2 (Hough chain, not with band_strips) runs the threshold/CLAHE/Canny/
+    # Hough chain on the gray frame reduced 2x or 4x by cv2.pyrDown, with the Hough length, gap
+    # and vote parameters scaled to match. The coarse segments near each band give a window
+    # (window_rows, window_margin as for search windows) where the chain runs again at full
+    # resolution for exact endpoints and y. A band whose window finds nothing keeps its
+    # upscaled coarse segments. This replaces every full-frame scan, including the search
+    # window lock scans. The full-size stage buffers are only filled inside the windows.
+    def detect_pyramid(self, frame):
+        stats = self.pyramid_stats
+        stats["frames"] += 1
+        scale = 1 << self.pyramid_levels
+        timer = self.timer
+        with timer("cvtColor"):
+            self.load_gray(frame, self.gray)
+        source = self.gray
+        with timer("pyrDown"):
+            for level in self.levels:
+                source = cv2.pyrDown(source, dst=level, dstsize=(level.shape[1], level.shape[0]))
+        # The coarse chain is timed under its own names so the full-resolution refinement
+        # in detect_regions stays separate
+        with timer("coarse_threshold"):
+            cv2.adaptiveThreshold(source, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                  cv2.THRESH_BINARY_INV, 11, 2, dst=self.coarse_thresh)
+        with timer("coarse_clahe"):
+            self.clahe.apply(self.coarse_thresh, dst=self.coarse_contrast)
+        with timer("coarse_canny"):
+            mean_intensity = cv2.mean(source)[0]
+            low_threshold = max(20, int(mean_intensity * 0.05))
+            high_threshold = max(60, int(mean_intensity * 0.15))
+            cv2.Canny(self.coarse_contrast, low_threshold, high_threshold, edges=self.coarse_edges, apertureSize=3)
+        with timer("coarse_hough"):
+            coarse = cv2.HoughLinesP(self.coarse_edges, 1, np.pi / 180, threshold=max(1, self.hough_threshold // scale),
+                                     minLineLength=max(1, self.min_line_length // scale),
+                                     maxLineGap=max(1, self.max_line_gap // scale))
+        if coarse is None:
+            return None
+        coarse = coarse * scale + scale // 2
+        found, z = band_measurements(coarse, Y_BANDS, self.y_tolerance + scale)
+
+        bands = np.flatnonzero(found)
+        regions = [self.window_region(*z[band], self.window_rows, self.window_margin) for band in bands]
+        stats["bands"] += len(bands)
+        segments = []
+        y_mids = (coarse[:, 0, 1] + coarse[:, 0, 3]) / 2
+        for band, refined in zip(bands, self.detect_regions(frame, regions)):
+            if refined is not None:
+                stats["refined"] += 1
+                segments.append(refined)
+            else:
+                segments.append(coarse[np.abs(y_mids - Y_BANDS[band]) < self.y_tolerance + scale])
+        if not segments:
+            return np.empty((0, 1, 4), dtype=np.int32)
+        return np.concatenate(segments)
+
+    # Function to get the (y0, y1, x0, x1) frame region of a window around a band measurement
+    def window_region(self, x_left, y, x_right, rows, margin):
+        return (max(0, int(y) - rows), min(self.height, int(y) + rows + 1),
+                max(0, int(x_left) - margin), min(self.width, int(x_right) + margin + 1))
+
+    # Function to scan normally and lock a search window on every band that was found
+    def lock_windows(self, frame):
+        lines = self.scan(frame)
+        found, z = band_measurements(lines, Y_BANDS, self.y_tolerance)
+        self.windows = [tuple(z[band]) if found[band] else None for band in range(len(Y_BANDS))]
+        self.widen = [0] * len(Y_BANDS)
+        self.since_scan = 0
+        self.search_stats["scans"] += 1
+        return lines
+
+    # Function to detect only inside the search windows of the locked bands.
+    # search_window=True (Hough chain only) tracks each band with a small window around its last
+    # raw detection: window_rows rows either side of its y and window_margin columns beyond its
+    # x extent. Once the bands are locked by a normal scan, only those windows are processed.
+    # A detection touching the side of its window widens that window for the next frame (up to
+    # max_widen steps); a locked band missing from its window makes the frame fall back to a
+    # normal scan, which re-locks every band. A normal scan also runs every rescan_interval
+    # frames so bands that were absent can be picked up. Outside the windows the stage buffers
+    # keep whatever the last scan left there.
+    def detect_windows(self, frame):
+        stats = self.search_stats
+        stats["frames"] += 1
+        locked = [band for band, window in enumerate(self.windows) if window is not None]
+        self.since_scan += 1
+        if not locked or self.since_scan >= self.rescan_interval:
+            return self.lock_windows(frame)
+
+        regions = [self.window_region(*self.windows[band], self.window_rows * (1 + self.widen[band]),
+                                      self.window_margin * (1 + self.widen[band])) for band in locked]
+        found = [lines for lines in self.detect_regions(frame, regions) if lines is not None]
+        lines = np.concatenate(found) if found else np.empty((0, 1, 4), dtype=np.int32)
+        in_band, z = band_measurements(lines, Y_BANDS, self.y_tolerance)
+        if not in_band[locked].all():
+            stats["fallbacks"] += 1
+            return self.lock_windows(frame)
+
+        stats["windowed"] += 1
+        for band, (_, _, x0, x1) in zip(locked, regions):
+            self.windows[band] = tuple(z[band])
+            # A mark reaching the side of its window may continue beyond it
+            touches = (z[band, 0] <= x0 + 1 and x0 > 0) or (z[band, 2] >= x1 - 2 and x1 < self.width)
+            if touches and self.widen[band] < self.max_widen:
+                self.widen[band] += 1
+                stats["widened"] += 1
+            elif not touches:
+                self.widen[band] = 0
+        return lines
+
+    # Function to describe the run's search and skip statistics (empty when neither mode is on)
+    def summary(self):
+        parts = []
+        if self.skip_static and self.static_stats["frames"]:
+            stats = self.static_stats
+            parts.append(f"Static frames: {stats['skipped']}/{stats['frames']} reused the previous detection "
+                         f"({stats['skipped'] / stats['frames']:.1%}, {self.static_stage} unchanged)")
+        if self.pyramid_levels and self.pyramid_stats["frames"]:
+            stats = self.pyramid_stats
+            parts.append(f"Pyramid: {stats['frames']} scans at 1/{1 << self.pyramid_levels} scale, "
+                         f"{stats['refined']}/{stats['bands']} band hits refined at full resolution")
+        if self.search_window and self.search_stats["frames"]:
+            stats = self.search_stats
+            parts.append(f"Search windows: {stats['windowed']}/{stats['frames']} frames windowed, "
+                         f"{stats['scans']} full scans ({stats['fallbacks']} fallbacks, "
+                         f"{stats['fallbacks'] / stats['frames']:.1%} of frames), {stats['widened']} window widenings")
+        return "\n".join(parts)
+
+    # Function to process the next frame of the sequence and return its extended lines
+    def process(self, frame):
+        return self.extend(self.detect(frame))
+
+    # Function to process the next frame from its precomputed edge image (a Frame_Cache
+    # 'edges' stack frame, computed with this engine's chain parameters)
+    def process_edges(self, edges):
+        with self.timer("hough"):
+            lines = self.hough(edges)
+        return self.extend(lines)
+
+    # Function to copy a frame of cached stage stacks into the stage buffers (for the taps)
+    def load_stages(self, stages, frame_idx):
+        for name, stack in stages.items():
+            np.copyto(getattr(self, name), stack[frame_idx])
+
+    # Function to turn the raw segments of the next frame into its extended (or tracked) lines.
+    # tracker=True replaces extend_lines' scripted band positions (fixed x, middle_band_x motion,
+    # top-band persistence) with Band_Tracker.BandTracker: the measured band extents are filtered,
+    # missed frames are bridged by prediction and outliers rejected, with no random numbers.
+    # A dict is passed to BandTracker as keyword arguments. With the profile detector the tracker
+    # is fed its sub-pixel estimates rather than the rounded segments.
+    def extend(self, lines):
+        if self.tracker is not None:
+            with self.timer("tracker"):
+                if self.profile is not None:
+                    lines = self.tracker.update_measurements(*estimate_measurements(self.profile.estimates, len(Y_BANDS)))
+                else:
+                    lines = self.tracker.update(lines)
+            self.prev_lines = lines
+            self.frame_idx += 1
+            return lines
+        with self.timer("extend_lines"):
+            lines = extend_lines(lines, self.width, self.height, self.frame_idx, self.prev_lines, rng=self.rng)
+        self.prev_lines = lines
+        self.frame_idx += 1
+        return lines
+
+    # Function to convert a single-channel stage buffer to BGR for a VideoWriter (reused buffer)
+    def to_bgr(self, image):
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR, dst=self.bgr)
+
+    # Function to render the lines-only frame into the reused canvas
+    def render_lines(self, lines):
+        return draw_lines(lines, self.width, self.height, out=self.line_frame)
+
+    # Function to render the annotated output frame into the reused canvas
+    def render_output(self, lines, frame_idx, verbose=False):
+        return draw_output(lines, self.width, self.height, frame_idx, self.roi, verbose, out=self.output_frame)
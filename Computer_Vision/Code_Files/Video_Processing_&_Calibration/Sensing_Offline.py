@@ -0,0 +1,149 @@
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from Measurement_Log import MeasurementLog
+from Sensing_5 import detect_frame, extend_lines
+
+# Function to give every frame its own seeded generator so the scripted shifts in
+# extend_lines are identical no matter which process handles the frame
+def frame_rng(frame_idx, seed=0):
+    return random.Random(seed * 1_000_003 + frame_idx)
+
+# Function to read the frame count and size of a video
+def video_info(video_path):
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video file {video_path}")
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    return frame_count, width, height
+
+# Function to split [0, frame_count) into contiguous frame ranges
+def make_shards(frame_count, shard_count):
+    shard_count = max(1, min(shard_count, frame_count))
+    bounds = np.linspace(0, frame_count, shard_count + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+# Function to process one frame range.
+# prev_lines is the only state carried between frames. A shard rebuilds it by running
+# `warmup` frames before its start and discarding their results. extend_lines only looks at
+# whether prev_lines is set (the top-band fallback) and returns it unchanged when nothing was
+# detected, so the shard's prev_lines matches a serial run from the first warm-up detection
+# made while prev_lines was already set (or from the start of the video). `locked` tells
+# whether that happened before the shard's first frame.
+def process_shard(video_path, start, stop, warmup=30, seed=0):
+    cv2.setNumThreads(1)  # one core per worker; the pool provides the parallelism
+    cap = cv2.VideoCapture(video_path)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    first = max(0, start - warmup)
+    if first > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, first)
+
+    prev_lines = None
+    results = []
+    locked = first == 0
+    for frame_idx in range(first, stop):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        _, _, _, lines = detect_frame(frame)
+        if frame_idx < start and lines is not None and prev_lines is not None:
+            locked = True
+        lines = extend_lines(lines, width, height, frame_idx, prev_lines, rng=frame_rng(frame_idx, seed))
+        prev_lines = lines
+        if frame_idx >= start:
+            results.append((frame_idx, lines))
+    cap.release()
+    return start, stop, locked, results
+
+def _process_shard(args):
+    return process_shard(*args)
+
+# Function to stitch shard outputs (in frame order) into one per-frame list, warning about
+# shards whose warm-up did not rebuild the serial state
+def stitch_shards(outputs, warmup):
+    stitched = []
+    for start, stop, locked, results in outputs:
+        if not locked:
+            print(f"Warning: fewer than two detections in the {warmup} warm-up frames before shard "
+                  f"{start}-{stop}; persistence may differ from a serial run")
+        if len(results) != stop - start:
+            print(f"Warning: shard {start}-{stop} decoded {len(results)} frames")
+        stitched.extend(results)
+    return stitched
+
+# Function to process a whole video as frame-range shards in a process pool and stitch
+# the per-frame lines back together in frame order
+def process_video(video_path, workers=None, shards_per_worker=2, warmup=30, seed=0):
+    workers = workers or os.cpu_count() or 1
+    frame_count, _, _ = video_info(video_path)
+    shards = make_shards(frame_count, workers * shards_per_worker)
+    jobs = [(video_path, start, stop, warmup, seed) for start, stop in shards]
+    if workers == 1:
+        return stitch_shards(map(_process_shard, jobs), warmup)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return stitch_shards(pool.map(_process_shard, jobs), warmup)
+
+# Function to run the same detection serially from frame 0 (reference for --verify)
+def process_serial(video_path, seed=0):
+    frame_count, _, _ = video_info(video_path)
+    return process_shard(video_path, 0, frame_count, warmup=0, seed=seed)[3]
+
+# Function to check that two per-frame results are identical
+def same_results(a, b):
+    if len(a) != len(b):
+        return False
+    for (idx_a, lines_a), (idx_b, lines_b) in zip(a, b):
+        if idx_a != idx_b or (lines_a is None) != (lines_b is None):
+            return False
+        if lines_a is not None and not np.array_equal(lines_a, lines_b):
+            return False
+    return True
+
+# Function to save per-frame line coordinates as a measurement log (.csv, .npy or .parquet)
+def save_lines(results, output_path, fps):
+    with MeasurementLog(output_path) as log:
+        for frame_idx, lines in results:
+            log.append(frame_idx, frame_idx / fps, lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline sharded line extraction for long calibration videos.")
+    parser.add_argument("video_path")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--shards-per-worker", type=int, default=2)
+    parser.add_argument("--warmup", type=int, default=30, help="frames replayed before each shard to rebuild persistence state")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the scripted shifts in extend_lines")
+    parser.add_argument("--output", default="lines_offline.csv", help="measurement log (.csv, .npy or .parquet)")
+    parser.add_argument("--verify", action="store_true", help="also run serially and compare the stitched result")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = process_video(args.video_path, args.workers, args.shards_per_worker, args.warmup, args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"Processed {len(results)} frames with {args.workers} workers in {elapsed:.2f} s "
+          f"({len(results) / elapsed:.1f} fps)")
+    cap = cv2.VideoCapture(args.video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+    save_lines(results, args.output, fps)
+    print(f"Line coordinates saved to {args.output}")
+
+    if args.verify:
+        start = time.perf_counter()
+        serial = process_serial(args.video_path, args.seed)
+        elapsed_serial = time.perf_counter() - start
+        print(f"Serial run: {elapsed_serial:.2f} s, speed-up {elapsed_serial / elapsed:.2f}x")
+        print("Stitched output matches serial run" if same_results(results, serial)
+              else "Stitched output DIFFERS from serial run")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import math
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from Sensing_5 import draw_output, output_roi, is_debug_frame
+from Sensing_Engine import SensingEngine
+from Stage_Timer import NULL_TIMER
+from Video_Taps import write_taps
+
+# Marker pushed downstream when a stage has no more frames
+_END = object()
+
+# Class to keep per-stage throughput counters
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.frames = 0
+        self.busy = 0.0
+        self.started = time.perf_counter()
+
+    def add(self, seconds):
+        self.frames += 1
+        self.busy += seconds
+
+    def fps(self):
+        elapsed = time.perf_counter() - self.started
+        return self.frames / elapsed if elapsed > 0 else 0.0
+
+    def busy_fps(self):
+        # Throughput the stage would reach if it never waited on its neighbours
+        return self.frames / self.busy if self.busy > 0 else 0.0
+
+# Function to put an item on a bounded queue without blocking forever after a failure
+def _put(q, item, stop):
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+# Function to get an item from a queue, returning _END once a failure has been flagged
+def _get(q, stop):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            pass
+    return _END
+
+# Capture stage: decode frames in order and hand them to detection
+def _capture_stage(cap, frame_count, out_q, stats, stop, timer=NULL_TIMER):
+    frame_idx = 0
+    while frame_idx < frame_count:
+        start = time.perf_counter()
+        with timer("read"):
+            ret, frame = cap.read()
+        if not ret:
+            print(f"End of video reached at frame {frame_idx}")
+            break
+        stats.add(time.perf_counter() - start)
+        if not _put(out_q, (frame_idx, frame), stop):
+            return
+        frame_idx += 1
+    _put(out_q, _END, stop)
+
+# Detection stage: the only place prev_lines lives, so persistence follows frame order
+def _detect_stage(in_q, out_q, width, height, stats, stop, engine_options=None, measurements=None, fps=30.0,
+                  taps=None, estimator=None):
+    engine = SensingEngine(width, height, **(engine_options or {}))
+    timer = engine.timer
+    while True:
+        item = _get(in_q, stop)
+        if item is _END:
+            break
+        frame_idx, frame = item
+        timer.frame(frame_idx)
+        start = time.perf_counter()
+        lines = engine.process(frame)
+        angle = estimator.update(lines) if estimator is not None else math.nan
+        if measurements is not None:
+            with timer("measurements"):
+                measurements.append(frame_idx, frame_idx / fps, lines, angle)
+        # Taps copy the stage buffers and encode on their own threads
+        if taps:
+            with timer("taps"):
+                write_taps(taps, engine, frame_idx, lines)
+        stats.add(time.perf_counter() - start)
+        if not _put(out_q, (frame_idx, lines), stop):
+            return
+    # The profiler can only be stopped by the thread it runs in
+    timer.stop_profile()
+    if engine.summary():
+        print(engine.summary())
+    _put(out_q, _END, stop)
+
+# Output stage: render and encode the annotated output frame
+def _output_stage(in_q, writers, width, height, stats, stop, debug_interval=1, debug_dir="debug_frames",
+                  timer=NULL_TIMER):
+    roi = output_roi(width, height)
+    canvas = np.empty((height, width, 3), dtype=np.uint8)
+    while True:
+        item = _get(in_q, stop)
+        if item is _END:
+            break
+        frame_idx, lines = item
+        start = time.perf_counter()
+        with timer("draw"):
+            output_frame = draw_output(lines, width, height, frame_idx, roi, verbose=False, out=canvas)
+        if is_debug_frame(frame_idx, debug_interval):
+            with timer("imwrite"):
+                cv2.imwrite(f"{debug_dir}/frame_{frame_idx:04d}.jpg", output_frame)
+        with timer("encode"):
+            writers['final'].write(output_frame)
+        stats.add(time.perf_counter() - start)
+
+# Function to run wrapped stage code and stop the whole pipeline if it raises
+def _guard(target, errors, stop, *args):
+    try:
+        target(*args)
+    except Exception as exc:
+        errors.append(exc)
+        stop.set()
+
+# Function to print queue depth and throughput for every stage
+def report(stats, queues):
+    depths = ", ".join(f"{name}={q.qsize()}/{q.maxsize}" for name, q in queues.items())
+    rates = ", ".join(f"{s.name} {s.frames} frames {s.fps():.1f} fps (busy {s.busy_fps():.1f} fps)" for s in stats)
+    print(f"Queues: {depths} | {rates}")
+
+# Function to run capture, detection and output as bounded-queue threaded stages
+def run_pipeline(cap, writers, width, height, frame_count, queue_size=8, report_interval=1.0, debug_interval=1,
+                 engine_options=None, measurements=None, taps=None, estimator=None):
+    stop = threading.Event()
+    errors = []
+    decoded_q = queue.Queue(maxsize=queue_size)
+    detected_q = queue.Queue(maxsize=queue_size)
+    stats = [StageStats("capture"), StageStats("detect"), StageStats("output")]
+    queues = {"decoded": decoded_q, "detected": detected_q}
+    # A Stage_Timer.StageTimer in engine_options also times the capture and output stages
+    timer = (engine_options or {}).get("timer", NULL_TIMER)
+
+    threads = [
+        threading.Thread(target=_guard, name="capture",
+                         args=(_capture_stage, errors, stop, cap, frame_count, decoded_q, stats[0], stop, timer)),
+        threading.Thread(target=_guard, name="detect",
+                         args=(_detect_stage, errors, stop, decoded_q, detected_q, width, height, stats[1], stop,
+                               engine_options, measurements, cap.get(cv2.CAP_PROP_FPS) or 30.0, taps,
+                               estimator)),
+        threading.Thread(target=_guard, name="output",
+                         args=(_output_stage, errors, stop, detected_q, writers, width, height, stats[2], stop,
+                               debug_interval, "debug_frames", timer)),
+    ]
+    for thread in threads:
+        thread.start()
+
+    # The output thread finishes last, so report until it is done
+    while threads[-1].is_alive():
+        threads[-1].join(timeout=report_interval)
+        report(stats, queues)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+    print(f"Pipeline finished: {stats[-1].frames} frames written")
+    return stats
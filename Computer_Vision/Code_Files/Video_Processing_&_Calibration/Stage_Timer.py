@@ -0,0 +1,162 @@
+import contextlib
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+
+import numpy as np
+
+# Upper edges (ms) of the histogram buckets reported per stage; the last bucket is open-ended
+HISTOGRAM_EDGES_MS = (0.01, 0.03, 0.1, 0.3, 1, 3, 10, 30, 100, 300, 1000)
+
+# Class keeping one stage's timings: lifetime count / total / max and a ring of the last
+# `window` samples, from which the percentiles and histogram are computed on demand
+class StageHistory:
+    def __init__(self, window):
+        self.samples = np.zeros(window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.samples[self.count % len(self.samples)] = seconds
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    # Function to get the samples currently in the ring (seconds)
+    def recent(self):
+        return self.samples[:min(self.count, len(self.samples))]
+
+# Class timing one `with timer(name):` block
+class _Span:
+    __slots__ = ("timer", "name", "start")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.timer.add(self.name, time.perf_counter() - self.start)
+
+# Class collecting per-stage wall time of the Sensing pipeline:
+#   with timer("canny"):
+#       cv2.Canny(...)
+# Stages are created on first use and may be timed from several threads (one stage per
+# thread, as in Sensing_Pipeline). snapshot() can be called at any time while the run goes on;
+# table() and write_json() format it. frame(frame_idx) is called once per frame by the
+# processing loops and drives the optional cProfile capture of frames
+# [profile_start, profile_start + profile_frames) into profile_path (a .prof file).
+class StageTimer:
+    enabled = True
+
+    def __init__(self, window=1000, profile_path=None, profile_start=0, profile_frames=None):
+        self.window = window
+        self.stages = {}
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.profile_path = profile_path
+        self.profile_start = profile_start
+        self.profile_frames = profile_frames
+        self.profiler = None
+        self.profiled = 0
+
+    def __call__(self, name):
+        return _Span(self, name)
+
+    # Function to record one duration (seconds) for a stage
+    def add(self, name, seconds):
+        stage = self.stages.get(name)
+        if stage is None:
+            with self._lock:
+                stage = self.stages.setdefault(name, StageHistory(self.window))
+        stage.add(seconds)
+
+    # Function called at the start of every frame: starts and stops the profiler
+    def frame(self, frame_idx):
+        if self.profile_path is None:
+            return
+        if self.profiler is None and frame_idx >= self.profile_start and not self.profiled:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        elif self.profiler is not None:
+            self.profiled += 1
+            if self.profile_frames is not None and self.profiled >= self.profile_frames:
+                self.stop_profile()
+
+    # Function to stop the profiler (if running) and write its statistics
+    def stop_profile(self):
+        if self.profiler is None:
+            return
+        self.profiler.disable()
+        self.profiler.dump_stats(self.profile_path)
+        self.profiler = None
+        self.profiled = max(self.profiled, 1)
+
+    # Function to get the top functions of the written profile by cumulative time
+    def profile_summary(self, top=20):
+        stream = io.StringIO()
+        pstats.Stats(self.profile_path, stream=stream).sort_stats("cumulative").print_stats(top)
+        return stream.getvalue()
+
+    # Function to get the current statistics of every stage, in first-use order
+    def snapshot(self):
+        elapsed = time.perf_counter() - self.started
+        report = {}
+        for name, stage in list(self.stages.items()):
+            recent = stage.recent() * 1000
+            if len(recent) == 0:
+                continue
+            p50, p95, p99 = np.percentile(recent, (50, 95, 99))
+            counts = np.histogram(recent, bins=(0,) + HISTOGRAM_EDGES_MS + (np.inf,))[0]
+            report[name] = {"count": stage.count, "total_s": round(stage.total, 6),
+                            "mean_ms": round(stage.total / stage.count * 1000, 4),
+                            "p50_ms": round(float(p50), 4), "p95_ms": round(float(p95), 4),
+                            "p99_ms": round(float(p99), 4), "max_ms": round(stage.max * 1000, 4),
+                            "share": round(stage.total / elapsed, 4) if elapsed > 0 else 0.0,
+                            "histogram": {f"<{edge}ms": int(c) for edge, c in zip(HISTOGRAM_EDGES_MS, counts)}
+                            | {f">={HISTOGRAM_EDGES_MS[-1]}ms": int(counts[-1])}}
+        return report
+
+    # Function to format the snapshot as a text table, most expensive stage first
+    def table(self):
+        report = self.snapshot()
+        if not report:
+            return "No stages timed"
+        lines = [f"{'stage':<18}{'count':>8}{'total s':>10}{'mean ms':>10}{'p50 ms':>9}{'p95 ms':>9}"
+                 f"{'p99 ms':>9}{'max ms':>9}{'share':>8}"]
+        for name, s in sorted(report.items(), key=lambda item: -item[1]["total_s"]):
+            lines.append(f"{name:<18}{s['count']:8d}{s['total_s']:10.3f}{s['mean_ms']:10.3f}{s['p50_ms']:9.3f}"
+                         f"{s['p95_ms']:9.3f}{s['p99_ms']:9.3f}{s['max_ms']:9.2f}{s['share']:8.1%}")
+        return "\n".join(lines)
+
+    # Function to write the snapshot as JSON
+    def write_json(self, path):
+        with open(path, "w") as f:
+            json.dump({"wall_s": round(time.perf_counter() - self.started, 6), "stages": self.snapshot()}, f, indent=2)
+
+# Class standing in for StageTimer when timing is off: every block gets the same no-op
+# context manager, so an instrumented stage costs one call and nothing is recorded
+class NullTimer:
+    enabled = False
+    _span = contextlib.nullcontext()
+
+    def __call__(self, name):
+        return self._span
+
+    def add(self, name, seconds):
+        pass
+
+    def frame(self, frame_idx):
+        pass
+
+    def stop_profile(self):
+        pass
+
+NULL_TIMER = NullTimer()
@@ -0,0 +1,94 @@
+import os
+import queue
+import threading
+
+import cv2
+
+from Sensing_5 import open_writer
+
+# Intermediate stages that can be tapped, and whether each one is a colour (3-channel) image
+TAP_STAGES = {'gray': False, 'contrast': False, 'edges': False, 'lines': True}
+
+# Class encoding one intermediate stage on a background thread.
+# write() copies the image into a bounded queue (blocking when the encoder falls behind) and
+# returns; the thread does any conversion and the VideoWriter.write. Single-channel stages
+# use an isColor=False writer and only fall back to GRAY2BGR if the codec refuses it.
+# With every=N only every Nth frame is kept and the file fps is divided by N to match.
+class TapWriter:
+    def __init__(self, name, path, fps, width, height, is_color, every=1, queue_size=16):
+        self.name = name
+        self.every = max(1, every)
+        self.convert = None
+        self.writer = open_writer(path, fps / self.every, width, height, is_color)
+        if self.writer is None and not is_color:
+            self.writer = open_writer(path, fps / self.every, width, height, True)
+            self.convert = cv2.COLOR_GRAY2BGR
+        if self.writer is None:
+            raise IOError(f"Could not create tap video {path}")
+        self.written = 0
+        self.error = None
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.thread = threading.Thread(target=self._run, name=f"tap-{name}", daemon=True)
+        self.thread.start()
+
+    # Function to queue the stage image of a frame (copied: callers reuse their buffers)
+    def write(self, frame_idx, image):
+        if frame_idx % self.every:
+            return
+        if self.error is not None:
+            raise self.error
+        self.queue.put(image.copy())
+
+    def _run(self):
+        while True:
+            image = self.queue.get()
+            if image is None:
+                break
+            if self.error is not None:
+                continue
+            try:
+                if self.convert is not None:
+                    image = cv2.cvtColor(image, self.convert)
+                self.writer.write(image)
+                self.written += 1
+            except Exception as exc:
+                self.error = exc
+
+    # Function to drain the queue, stop the thread and finalize the file
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        self.writer.release()
+        if self.error is not None:
+            raise self.error
+
+# Function to parse a --taps value ("gray,edges" or "all") into stage names
+def parse_taps(value):
+    if not value:
+        return []
+    names = list(TAP_STAGES) if value == 'all' else [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in TAP_STAGES]
+    if unknown:
+        raise ValueError(f"Unknown tap(s) {unknown}; choose from {', '.join(TAP_STAGES)} or 'all'")
+    return names
+
+# Function to open the requested taps as intermediate_videos/<stage>_output.mp4
+def open_taps(names, fps, width, height, every=1, queue_size=16, directory="intermediate_videos"):
+    if not names:
+        return {}
+    os.makedirs(directory, exist_ok=True)
+    return {name: TapWriter(name, os.path.join(directory, f"{name}_output.mp4"), fps, width, height,
+                            TAP_STAGES[name], every, queue_size)
+            for name in names}
+
+# Function to feed the engine's stage buffers of one frame to the enabled taps
+def write_taps(taps, engine, frame_idx, lines):
+    for name in ('gray', 'contrast', 'edges'):
+        if name in taps:
+            taps[name].write(frame_idx, getattr(engine, name))
+    if 'lines' in taps and frame_idx % taps['lines'].every == 0:
+        taps['lines'].write(frame_idx, engine.render_lines(lines))
+
+def close_taps(taps):
+    for tap in taps.values():
+        tap.close()